@@ -0,0 +1,36 @@
+# Compares repeated root.find(".//...") walks against index lookups as a
+# pacs.008 grows. Run with: python -m benchmarks.copilot_index
+import timeit
+from paymentlabs.copilot import parse_xml, index_message, lookup
+
+SIZES = (10, 1_000, 10_000)
+LOOKUPS = 200
+TAGS = ("PstlAdr", "Purp", "Dbtr", "CdtTrfTxInf")
+
+def build_pacs008(num_transactions):
+    # Only the last transaction carries PstlAdr and Purp, so find() has to
+    # walk the whole message before it hits them.
+    txs = "".join(
+        f"<CdtTrfTxInf><PmtId><EndToEndId>E2E{i}</EndToEndId></PmtId>"
+        f"<Dbtr><Nm>Debtor {i}</Nm></Dbtr><Cdtr><Nm>Creditor {i}</Nm></Cdtr></CdtTrfTxInf>"
+        for i in range(num_transactions - 1)
+    )
+    txs += (
+        "<CdtTrfTxInf><PmtTpInf><Purp><Cd>GDDS</Cd></Purp></PmtTpInf>"
+        "<Dbtr><Nm>Last</Nm><PstlAdr><Ctry>SG</Ctry></PstlAdr></Dbtr></CdtTrfTxInf>"
+    )
+    return f"<Document><FIToFICstmrCdtTrf><GrpHdr><MsgId>BENCH</MsgId></GrpHdr>{txs}</FIToFICstmrCdtTrf></Document>"
+
+def run():
+    print(f"{'transactions':>12} | {'find() us/lookup':>16} | {'index us/lookup':>15} | {'index build ms':>14}")
+    for size in SIZES:
+        root = parse_xml(build_pacs008(size))
+        find_time = timeit.timeit(lambda: [root.find(f".//{tag}") for tag in TAGS], number=LOOKUPS)
+        build_time = timeit.timeit(lambda: index_message(root), number=1)
+        index = index_message(root)
+        lookup_time = timeit.timeit(lambda: [lookup(index, tag) for tag in TAGS], number=LOOKUPS)
+        per_lookup = LOOKUPS * len(TAGS)
+        print(f"{size:>12} | {find_time / per_lookup * 1e6:>16.2f} | {lookup_time / per_lookup * 1e6:>15.3f} | {build_time * 1e3:>14.1f}")
+
+if __name__ == "__main__":
+    run()
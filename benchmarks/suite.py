@@ -0,0 +1,209 @@
+# Times the core functions of each page on synthetic workloads, so a
+# throughput regression shows up as a failing comparison.
+#
+#   python -m benchmarks.suite --size 100k --save baseline.json
+#   python -m benchmarks.suite --size 100k --compare baseline.json --tolerance 0.25
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from paymentlabs import workload
+from paymentlabs.address_validation import extract_words_from_adrline, extract_words_from_structured_json, validate_word_match
+from paymentlabs.copilot import apply_suggestions, find_missing_fields, index_message, parse_xml, stream_repair, suggest_fixes
+from paymentlabs.data_quality import (
+    filter_messages,
+    find_message,
+    generate_dummy_payments,
+    page_positions,
+    page_table,
+    prepare_dataset,
+    quality_score,
+    summary_metrics,
+)
+from paymentlabs.fraud import risk_summaries, score_transactions
+from paymentlabs.gazetteer import address_lines, default_gazetteer, structure_address
+from paymentlabs.payment_store import iter_payments, open_store, plan_columns, scan_payments, write_payments
+from paymentlabs.report_export import EXPORT_FORMATS, export_report
+from paymentlabs.reporting import chart_report, plan_query, prepare_reporting, rollup_cube, run_query
+from paymentlabs.truncation import extract_fields_pacs008, extract_uetr_mt103, parse_block4
+from paymentlabs.velocity import velocity_features
+
+SEED = 2025
+REPAIR_CHOICES = {'address_type': 'Structured', 'fix_lei': True, 'fix_purpose': True, 'fix_remittance': True, 'fix_uetr': True}
+# Whole-tree parsing is what the Copilot page does for one upload; past this
+# size only the streaming path is realistic
+IN_MEMORY_LIMIT = 100_000
+REPORT_QUERIES = (
+    "Show me number of payments to Canada with purpose code SALA",
+    "Total amount of supplier payments to Germany",
+    "All intercompany payments",
+    "Total amount by currency of supplier and salary payments to Germany or France over 10k between 2025-05-01 and 2025-08-31",
+    "Average amount per month of euro payments to SG in the last 90 days",
+)
+
+def _time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def _suggest_and_apply(data):
+    # A fresh tree per run: suggestions point at its elements and applying
+    # them changes it
+    root = parse_xml(data)
+    return apply_suggestions(root, suggest_fixes(root, REPAIR_CHOICES, index_message(root)))
+
+# ---- Page Benchmarks ----
+# Each yields (name, items, callable); items is what throughput is counted in
+
+def copilot_cases(size, workdir):
+    path = os.path.join(workdir, "pacs008.xml")
+    workload.write_xml('pacs008', path, size, SEED)
+    if size <= IN_MEMORY_LIMIT:
+        with open(path, 'rb') as source:
+            data = source.read()
+        root = parse_xml(data)
+        index = index_message(root)
+        yield "copilot.parse_xml", size, lambda: parse_xml(data)
+        yield "copilot.index_message", size, lambda: index_message(root)
+        yield "copilot.find_missing_fields", size, lambda: find_missing_fields(root, index)
+        yield "copilot.suggest_and_apply", size, lambda: _suggest_and_apply(data)
+    yield "copilot.stream_repair", size, lambda: stream_repair(path, os.path.join(workdir, "repaired.xml"), REPAIR_CHOICES)
+
+def data_quality_cases(size, workdir):
+    df = generate_dummy_payments(size, SEED)
+    yield "data_quality.generate", size, lambda: generate_dummy_payments(size, SEED)
+    yield "data_quality.quality_score", size, lambda: quality_score(df)
+    dataset = prepare_dataset(df)
+    yield "data_quality.prepare_dataset", size, lambda: prepare_dataset(df)
+    yield "data_quality.filter_and_metrics", size, lambda: [
+        (filter_messages(dataset, option), summary_metrics(dataset)) for option in ("All", "Correct Only", "Incorrect Only")
+    ]
+    # A warm page view: sort order cached, one page styled, one ID looked up
+    page_positions(dataset, "Incorrect Only", "Debtor Name")
+    yield "data_quality.page_view", 1, lambda: (
+        page_table(dataset, page_positions(dataset, "Incorrect Only", "Debtor Name", page=2)).to_html(),
+        find_message(dataset, df["Message ID"].iloc[-1])
+    )
+
+def fraud_cases(size, workdir):
+    frame = workload.fraud_frame(size, SEED)
+    yield "fraud.generate", size, lambda: workload.fraud_frame(size, SEED)
+    yield "fraud.velocity_features", size, lambda: velocity_features(frame)
+    flags = score_transactions(frame)
+    yield "fraud.score_transactions", size, lambda: score_transactions(frame)
+    yield "fraud.risk_summaries_page", 50, lambda: risk_summaries(flags, range(50))
+
+def address_cases(size, workdir):
+    pairs = []
+    for chunk in workload.generate_transactions(size, SEED):
+        for tx in chunk:
+            adrline = f"<PstlAdr><AdrLine>{tx['building']} {tx['street']}</AdrLine><AdrLine>{tx['postcode']} {tx['town']}</AdrLine></PstlAdr>"
+            structured = json.dumps({"PstlAdr": {"building_number": tx['building'], "street_name": tx['street'], "postcode": tx['postcode']}})
+            pairs.append((adrline, structured))
+    yield "address.validate_word_match", size, lambda: [
+        validate_word_match(extract_words_from_adrline(adrline), extract_words_from_structured_json(structured))
+        for adrline, structured in pairs
+    ]
+    gazetteer = default_gazetteer()
+    yield "address.structure_address", size, lambda: [structure_address(address_lines(adrline), gazetteer=gazetteer) for adrline, _ in pairs]
+
+def reporting_cases(size, workdir):
+    df = prepare_reporting(workload.reporting_frame(size, SEED))
+    yield "reporting.generate", size, lambda: workload.reporting_frame(size, SEED)
+    for position, query in enumerate(REPORT_QUERIES, 1):
+        yield f"reporting.query{position}", size, lambda query=query: run_query(query, df, today="2025-09-30")
+    yield "reporting.rollup_build", size, lambda: rollup_cube(df)
+    cube = rollup_cube(df)
+    for position, query in enumerate(REPORT_QUERIES, 1):
+        plan = plan_query(query, today="2025-09-30")
+        if cube.covers(plan):
+            yield f"reporting.rollup_query{position}", size, lambda plan=plan: chart_report(plan, df, cube)
+    store_dir = os.path.join(workdir, "payment_store")
+    write_payments(df, store_dir)
+    store = open_store(store_dir)
+    for position, query in enumerate(REPORT_QUERIES, 1):
+        plan = plan_query(query, today="2025-09-30")
+        yield f"reporting.store_query{position}", size, lambda plan=plan: chart_report(plan, scan_payments(store, plan, plan_columns(plan)))
+    for fmt in EXPORT_FORMATS:
+        path = os.path.join(workdir, f"report.{fmt}")
+        yield f"reporting.export_{fmt}", size, lambda fmt=fmt, path=path: export_report(iter_payments(store), fmt, path)
+
+def truncation_cases(size, workdir):
+    messages = list(workload.mt103_messages(size, SEED))
+    # pacs.008 extraction runs on one message per upload; time a bounded sample
+    singles = [workload.pacs008_message(1, seed) for seed in range(min(size, 1_000))]
+    yield "truncation.mt103", size, lambda: [(extract_uetr_mt103(text), parse_block4(text)) for text in messages]
+    yield "truncation.extract_fields_pacs008", len(singles), lambda: [extract_fields_pacs008(data) for data in singles]
+
+def generator_cases(size, workdir):
+    for fmt in sorted(workload.FORMATS):
+        yield f"workload.{fmt}", size, lambda fmt=fmt: workload.write_xml(fmt, io.BytesIO(), size, SEED)
+    yield "workload.mt103", size, lambda: sum(1 for _ in workload.mt103_messages(size, SEED))
+
+PAGES = {
+    'copilot': copilot_cases,
+    'data_quality': data_quality_cases,
+    'fraud': fraud_cases,
+    'address': address_cases,
+    'reporting': reporting_cases,
+    'truncation': truncation_cases,
+    'workload': generator_cases,
+}
+
+# ---- Runner ----
+
+def run(size, pages, repeat=3):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for page in pages:
+            for name, items, func in PAGES[page](size, workdir):
+                seconds, _ = _time(func, repeat)
+                results[name] = {'items': items, 'seconds': round(seconds, 6), 'per_second': round(items / seconds, 1)}
+                print(f"{name:<36} {items:>9} {seconds * 1e3:>12.1f} ms {items / seconds:>14,.0f} /s", flush=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    # A benchmark regresses when its throughput drops by more than `tolerance`
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and previous['items'] == result['items']:
+            if result['per_second'] < previous['per_second'] * (1 - tolerance):
+                regressions.append((name, previous['per_second'], result['per_second']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Benchmark PaymentLabs page functions.")
+    parser.add_argument("--size", default="1k", help="1k, 100k, 1m or a transaction count")
+    parser.add_argument("--pages", nargs="+", choices=sorted(PAGES), default=sorted(PAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs per benchmark")
+    parser.add_argument("--save", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop before failing")
+    args = parser.parse_args(argv)
+
+    size = workload.resolve_size(args.size)
+    print(f"{'benchmark':<36} {'items':>9} {'best':>15} {'throughput':>16}")
+    results = run(size, args.pages, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as out:
+            json.dump(results, out, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as source:
+            regressions = compare(results, json.load(source), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:,.0f}/s -> {after:,.0f}/s", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,12 @@
-import streamlit as st
 import json
-import re
-
-# ---- Helper Functions ----
-
-def extract_words_from_adrline(xml_text):
-    adr_lines = re.findall(r"<AdrLine>(.*?)</AdrLine>", xml_text, re.DOTALL)
-    full_text = " ".join(adr_lines)
-    words = re.findall(r'\b\w+\b', full_text)  # Extract words only
-    return [word.lower() for word in words if word]
-
-def extract_words_from_structured_json(json_text):
-    try:
-        parsed = json.loads(json_text)
-        structured_text = ""
-        for value in parsed.get("PstlAdr", {}).values():
-            structured_text += str(value) + " "
-        words = re.findall(r'\b\w+\b', structured_text)
-        return [word.lower() for word in words if word]
-    except:
-        return []
-
-def validate_word_match(input_words, output_words):
-    missing_words = []
-    for word in input_words:
-        if word not in output_words:
-            missing_words.append(word)
-    return missing_words
+import streamlit as st
+from paymentlabs.address_validation import (
+    added_words,
+    extract_words_from_adrline,
+    extract_words_from_structured_json,
+    validate_word_match,
+)
+from paymentlabs.gazetteer import address_lines, country_words, structure_address
 
 # ---- Streamlit App ----
 
@@ -53,17 +33,42 @@ example_structured = """{
   }
 }"""
 
+example_unit_unstructured = """<PstlAdr>
+  <AdrLine>#05-12 Tower A</AdrLine>
+  <AdrLine>1 Raffles Place</AdrLine>
+  <AdrLine>048616 Singapore</AdrLine>
+</PstlAdr>"""
+
+example_unit_structured = """{
+  "PstlAdr": {
+    "building_name": "Tower A",
+    "floor": "05",
+    "room": "12",
+    "building_number": "1",
+    "street_name": "Raffles Place",
+    "postcode": "048616",
+    "town_name": "Singapore"
+  }
+}"""
+
+EXAMPLES = {
+    "House number and room": (example_unstructured, example_structured),
+    "Office tower unit (#floor-room)": (example_unit_unstructured, example_unit_structured),
+}
+
+example = st.selectbox("Example:", list(EXAMPLES))
+
 st.markdown("### 📥 Step 1: Paste Unstructured Address (AdrLine Format)")
 original_input = st.text_area(
     "Paste your original `<PstlAdr>` block here:",
-    value=example_unstructured,
+    value=EXAMPLES[example][0],
     height=200
 )
 
 st.markdown("### 📤 Step 2: Paste Transformed Structured Address (JSON Format)")
 transformed_input = st.text_area(
     "Paste your structured address output here (JSON format):",
-    value=example_structured,
+    value=EXAMPLES[example][1],
     height=250
 )
 
@@ -75,6 +80,7 @@ if st.button("🚀 Validate Structuring at Word Level"):
         output_words = extract_words_from_structured_json(transformed_input)
 
         missing_words = validate_word_match(input_words, output_words)
+        extra_words = added_words(input_words, output_words)
 
         if missing_words:
             st.error(f"❌ Data Loss Detected! Missing Words: {', '.join(missing_words)}")
@@ -87,6 +93,8 @@ if st.button("🚀 Validate Structuring at Word Level"):
                 """,
                 unsafe_allow_html=True
             )
+        elif extra_words:
+            st.warning(f"⚠️ No data loss, but the structured output adds words: {', '.join(extra_words)}")
         else:
             st.success("✅ Perfect Structuring! No data loss detected.")
             st.markdown(
@@ -98,3 +106,19 @@ if st.button("🚀 Validate Structuring at Word Level"):
                 """,
                 unsafe_allow_html=True
             )
+
+# ---- Gazetteer Suggestion ----
+st.markdown("### 🧭 Step 3: Suggest a Structured Address")
+st.caption("Structures the original AdrLine block with the postcode/town gazetteer used by the Structured Payment Copilot.")
+if st.button("🧭 Structure with Gazetteer"):
+    fields, hits = structure_address(address_lines(original_input))
+    suggestion = json.dumps({"PstlAdr": fields}, indent=2, ensure_ascii=False)
+    st.code(suggestion, language="json")
+    st.caption(f"Gazetteer matches: {', '.join(sorted(hits)) or 'none'}")
+    lost = validate_word_match(extract_words_from_adrline(original_input), extract_words_from_structured_json(suggestion))
+    # A recognised country name is carried by its ISO code in Ctry
+    lost = [word for word in lost if word not in country_words(fields.get('Ctry'))]
+    if lost:
+        st.error(f"❌ Suggestion drops words: {', '.join(lost)}")
+    else:
+        st.success("✅ Suggestion keeps every word of the original address.")
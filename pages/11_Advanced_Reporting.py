@@ -1,125 +1,150 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import random
-import io
+import os
+from paymentlabs.cache import LRUCache
+from paymentlabs.payment_store import (
+    DEFAULT_STORE_DIR, count_payments, iter_payments, open_store, plan_columns, scan_payments, store_cube, store_exists, store_info,
+    store_version,
+)
+from paymentlabs.report_export import EXPORT_FORMATS, export_report, frame_chunks
+from paymentlabs.reporting import (
+    chart_report, describe_plan, plan_positions, plan_query, prepare_reporting, report_key, report_nbytes, rollup_cube
+)
+from paymentlabs.workload import reporting_frame
 
 # ---- Streamlit Page Setup ----
 st.set_page_config(page_title="Advanced Reporting (NLP-Based)", layout="wide")
 st.title("📊 Advanced Reporting (NLP-Based)")
 
 # ---- Dummy Swift CBPR+ Data ----
-random.seed(42)  # for consistency
-currencies = ['USD', 'EUR', 'GBP', 'SGD']
-purposes = ['SALA', 'SUPP', 'INTC']
-countries = ['CA', 'FR', 'IN', 'HK', 'MY', 'AE', 'DE', 'SG']
-
-data = {
-    "SettlementDate": pd.date_range(start="2025-04-01", periods=50, freq='D'),
-    "TxnRef": [f"TRX{str(i).zfill(3)}" for i in range(1, 51)],
-    "InstdAmt": [random.randint(4000, 20000) for _ in range(50)],
-    "Ccy": [random.choice(currencies) for _ in range(50)],
-    "DbtrNm": [f"Debtor {i}" for i in range(1, 51)],
-    "DbtrAcct": [f"DBTRACCT{i}" for i in range(1, 51)],
-    "CdtrNm": [f"Creditor {i}" for i in range(1, 51)],
-    "CdtrAcct": [f"CDTRACCT{i}" for i in range(1, 51)],
-    "CdtrCountry": [random.choice(countries) for _ in range(50)],
-    "PurposeCode": [random.choice(purposes) for _ in range(50)]
-}
-
-df = pd.DataFrame(data)
+DATASET_SIZES = {"Sample (50 payments)": 50, "100,000 payments": 100_000, "1,000,000 payments": 1_000_000}
+
+@st.cache_resource
+def get_reporting_data(num_payments):
+    # Sorted and categorical once, so every query is a date slice plus one mask
+    return prepare_reporting(reporting_frame(num_payments, seed=42))  # seeded for consistency
+
+@st.cache_resource
+def get_reporting_cube(num_payments):
+    # Count and amount per country, purpose, currency and day for the charts
+    return rollup_cube(get_reporting_data(num_payments))
+
+# ---- Settled Payment History ----
+# Parquet files on disk, scanned per query with the plan's filters and
+# columns; only the rollup cube is kept in memory.
+STORE_DATASET = "Payment store (on disk)"
+
+# Keyed by store_version, so files added since the last run reopen the
+# store and rebuild the cube
+@st.cache_resource(max_entries=1)
+def get_payment_store(version):
+    return open_store(DEFAULT_STORE_DIR)
+
+@st.cache_resource(max_entries=1)
+def get_store_cube(version):
+    return store_cube(get_payment_store(version))
+
+# ---- Report Cache ----
+# Chart results by dataset and canonical plan, so rewording a request or
+# re-running a dashboard skips the computation. New store data means a new
+# version and an empty cache.
+
+@st.cache_resource(max_entries=1)
+def get_report_cache(version):
+    return LRUCache(max_entries=64, max_bytes=64 * 1024 * 1024, ttl=15 * 60)
+
+def build_chart_report(plan, store, df, cube):
+    if store is not None and not cube.covers(plan):
+        df = scan_payments(store, plan, plan_columns(plan))
+    matched, grouped = chart_report(plan, df, cube)
+    rows = None
+    if matched and grouped is None:
+        rows = scan_payments(store, plan, limit=1000) if store is not None else df.iloc[plan_positions(plan, df)[:1000]]
+    return {'matched': matched, 'grouped': grouped, 'rows': rows}
+
+version = store_version() if store_exists() else None
+report_cache = get_report_cache(version)
+datasets = list(DATASET_SIZES) + ([STORE_DATASET] if version else [])
+dataset = st.selectbox("Dataset", datasets)
+if dataset == STORE_DATASET:
+    store, df, cube = get_payment_store(version), None, get_store_cube(version)
+    st.caption(f"{store_info(store)['payments']:,} settled payments in {DEFAULT_STORE_DIR}")
+else:
+    store, df, cube = None, get_reporting_data(DATASET_SIZES[dataset]), get_reporting_cube(DATASET_SIZES[dataset])
+    if not version:
+        st.caption("Build an on-disk history with `python -m paymentlabs.payment_store generate 1000000` to report over it.")
 
 # ---- User Inputs ----
 st.markdown("### ✍️ Enter Your Report Request")
 user_query = st.text_area(
-    "Example: 'Show me number of payments to Canada with purpose code SALA'",
+    "Example: 'Show me number of payments to Canada with purpose code SALA', "
+    "'Total amount by currency of supplier payments to Germany or France over 10k between 2025-05-01 and 2025-08-31'",
     height=150
 )
 
 st.markdown("### 🗂️ Select Output Format")
+DOWNLOAD_FORMATS = {f"{spec['label']} Download": fmt for fmt, spec in EXPORT_FORMATS.items()}
 output_format = st.radio(
     "Choose output format:",
-    ("Chart Only", "Excel Download"),
+    ("Chart Only", *DOWNLOAD_FORMATS),
     index=0
 )
 
-# ---- Basic NLP Parsing Function ----
-def parse_nlp_query(query, df):
-    query = query.lower()
-    filtered_df = df.copy()
-
-    # Country matching
-    countries_map = {
-        "canada": "CA",
-        "france": "FR",
-        "india": "IN",
-        "hong kong": "HK",
-        "malaysia": "MY",
-        "uae": "AE",
-        "germany": "DE",
-        "singapore": "SG"
-    }
-    for name, code in countries_map.items():
-        if name in query:
-            filtered_df = filtered_df[filtered_df["CdtrCountry"] == code]
-            break
-
-    # Purpose matching
-    purposes_map = {
-        "salaries": "SALA",
-        "salary": "SALA",
-        "supplier": "SUPP",
-        "supplies": "SUPP",
-        "internal": "INTC",
-        "intercompany": "INTC"
-    }
-    for keyword, purpose_code in purposes_map.items():
-        if keyword in query:
-            filtered_df = filtered_df[filtered_df["PurposeCode"] == purpose_code]
-            break
-
-    # Report type
-    if "amount" in query or "volume" in query:
-        report_type = "amount"
-    elif "count" in query or "number of payments" in query:
-        report_type = "count"
-    else:
-        report_type = "general"
-
-    return filtered_df, report_type
-
 # ---- Report Generation Section ----
 if st.button("🚀 Generate Report"):
     if not user_query.strip():
         st.warning("⚠️ Please enter a report description.")
     else:
-        filtered_df, report_type = parse_nlp_query(user_query, df)
-
-        if filtered_df.empty:
+        plan = plan_query(user_query)
+        from_cache = False
+        if output_format == "Chart Only":
+            key = (dataset, report_key(plan))
+            report = report_cache.get(key)
+            from_cache = report is not None
+            if not from_cache:
+                report = build_chart_report(plan, store, df, cube)
+                report_cache.put(key, report, size=report_nbytes(report))
+            matched = report['matched']
+        elif store is not None:
+            matched = count_payments(store, plan)
+        else:
+            positions = plan_positions(plan, df)
+            matched = len(positions)
+
+        with st.expander("🧭 Query Plan"):
+            for step in describe_plan(plan):
+                st.markdown(f"- {step}")
+            if from_cache:
+                st.caption(f"Served from the report cache ({report_cache.hits:,} hits, {report_cache.misses:,} misses)")
+            elif cube.covers(plan):
+                st.caption("Answered from the rollup cube")
+
+        if not matched:
             st.error("❌ No matching data found for your query.")
         else:
-            st.success(f"✅ {len(filtered_df)} matching transactions found!")
+            st.success(f"✅ {matched:,} matching transactions found!")
 
             if output_format == "Chart Only":
                 st.markdown("### 📈 Chart View")
 
-                if report_type == "amount":
-                    grouped = filtered_df.groupby("CdtrCountry")["InstdAmt"].sum()
-                    st.bar_chart(grouped)
-                elif report_type == "count":
-                    grouped = filtered_df.groupby("CdtrCountry")["TxnRef"].count()
-                    st.bar_chart(grouped)
+                if report['grouped'] is not None:
+                    st.bar_chart(report['grouped'])
                 else:
-                    st.dataframe(filtered_df)
-
-            elif output_format == "Excel Download":
-                st.markdown("### 📄 Excel Download")
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    filtered_df.to_excel(writer, index=False, sheet_name='Report')
-                st.download_button(
-                    label="⬇️ Download Report Excel",
-                    data=output.getvalue(),
-                    file_name="generated_report.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                    st.dataframe(report['rows'])
+
+            else:
+                fmt = DOWNLOAD_FORMATS[output_format]
+                st.markdown(f"### 📄 {EXPORT_FORMATS[fmt]['label']} Download")
+                # Written chunk by chunk to a temp file, then handed to the download button
+                chunks = iter_payments(store, plan) if store is not None else frame_chunks(df, positions)
+                with st.spinner(f"Exporting {matched:,} payments..."):
+                    path, _ = export_report(chunks, fmt)
+                try:
+                    with open(path, "rb") as report:
+                        st.download_button(
+                            label=f"⬇️ Download Report {EXPORT_FORMATS[fmt]['label']}",
+                            data=report,
+                            file_name=f"generated_report.{fmt}",
+                            mime=EXPORT_FORMATS[fmt]['mime']
+                        )
+                finally:
+                    os.remove(path)
@@ -1,174 +1,23 @@
 import streamlit as st
-import xml.etree.ElementTree as ET
-import io
+import os
+import tempfile
 from lxml import etree
+from paymentlabs.cache import LRUCache
+from paymentlabs.copilot import load_message, repair_message, stream_repair
+from paymentlabs.copilot_rules import REPAIR_OPTIONS
+from paymentlabs.schema_validation import SCHEMA_FILES, available_schemas, validate_message
+from paymentlabs.xml_diff import render_change, render_context, summarize_changes
 
-# --- Helper Functions ---
+DIFF_PAGE_SIZE = 20
 
-def build_final_envelope(apphdr_xml, document_xml):
-    NSMAP = {
-        'env': 'urn:swift:xsd:envelope',
-        'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
-    }
-    envelope = etree.Element("{urn:swift:xsd:envelope}Envelope", nsmap=NSMAP)
-    apphdr = etree.fromstring(apphdr_xml)
-    apphdr.attrib['xmlns'] = 'urn:iso:std:iso:20022:tech:xsd:head.001.001.02'
-    document = etree.fromstring(document_xml)
-    document.attrib['xmlns'] = 'urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08'
-    envelope.append(apphdr)
-    envelope.append(document)
-    return etree.tostring(envelope, pretty_print=True, encoding='unicode')
-
-def parse_xml(xml_string):
-    try:
-        root = ET.fromstring(xml_string)
-        for elem in root.iter():
-            if elem.tag.startswith('{'):
-                elem.tag = elem.tag.split('}', 1)[1]
-        return root
-    except ET.ParseError:
-        return None
-
-def find_missing_fields(root):
-    issues = []
-    if root.find(".//PstlAdr") is None:
-        issues.append("Missing Debtor Postal Address (PstlAdr)")
-    if root.find(".//Purp") is None:
-        issues.append("Missing Payment Purpose Code (Purp)")
-    return issues
-
-def suggest_fixes(root, user_choices):
-    suggestions = {}
-    address_choice = user_choices.get('address_type', 'Structured')
-
-    dbtr = root.find(".//Dbtr")
-    if dbtr is not None:
-        pstlAdr = dbtr.find("PstlAdr")
-        if pstlAdr is not None:
-            existing_fields = {child.tag: child.text for child in pstlAdr}
-
-            if address_choice == "Structured":
-                if "AdrLine" in existing_fields or any(child.tag == "AdrLine" for child in pstlAdr):
-                    adr_lines = [child.text for child in pstlAdr if child.tag == "AdrLine"]
-                    if adr_lines:
-                        line1 = adr_lines[0]
-                        line2 = adr_lines[1] if len(adr_lines) > 1 else ''
-                        if ' ' in line1:
-                            bldg, street = line1.split(' ', 1)
-                        else:
-                            bldg, street = '', line1
-                        if ' ' in line2:
-                            postcode, town = line2.split(' ', 1)
-                        else:
-                            postcode, town = '', line2
-
-                        suggestions['StructuredAddress'] = {
-                            'BldgNb': bldg.strip(),
-                            'StrtNm': street.strip(),
-                            'PstCd': postcode.strip(),
-                            'TwnNm': town.strip(),
-                            'Ctry': existing_fields.get('Ctry', 'SG')
-                        }
-                else:
-                    suggestions['StructuredAddress'] = {
-                        'StrtNm': existing_fields.get('StrtNm', ''),
-                        'BldgNb': existing_fields.get('BldgNb', ''),
-                        'PstCd': existing_fields.get('PstCd', ''),
-                        'TwnNm': existing_fields.get('TwnNm', ''),
-                        'Ctry': existing_fields.get('Ctry', 'SG')
-                    }
-
-            elif address_choice == "Hybrid":
-                adr_lines = [child.text for child in pstlAdr if child.tag == "AdrLine"]
-                if not adr_lines:
-                    line1 = f"{existing_fields.get('BldgNb', '')} {existing_fields.get('StrtNm', '')}".strip()
-                    line2 = f"{existing_fields.get('PstCd', '')} {existing_fields.get('TwnNm', '')}".strip()
-                    adr_lines = [line1, line2]
-
-                suggestions['HybridAddress'] = {
-                    'AdrLine1': adr_lines[0] if len(adr_lines) > 0 else '',
-                    'AdrLine2': adr_lines[1] if len(adr_lines) > 1 else '',
-                    'TwnNm': existing_fields.get('TwnNm', 'Singapore'),
-                    'Ctry': existing_fields.get('Ctry', 'SG')
-                }
 
-    if user_choices.get('fix_lei', False):
-        suggestions['LEI'] = '5493001KJTIIGC8Y1R12'
-    if user_choices.get('fix_purpose', False):
-        suggestions['PurposeCode'] = 'GDDS'
-    if user_choices.get('fix_remittance', False):
-        suggestions['RemittanceReference'] = 'RF712345678901234567'
-    return suggestions
-
-def apply_suggestions(root, suggestions):
-    dbtr = root.find(".//Dbtr")
-    if dbtr is not None:
-        pstlAdr = dbtr.find("PstlAdr")
-        if pstlAdr is None:
-            pstlAdr = ET.SubElement(dbtr, "PstlAdr")
-        else:
-            pstlAdr.clear()
-
-        if 'StructuredAddress' in suggestions:
-            for field, value in suggestions['StructuredAddress'].items():
-                ET.SubElement(pstlAdr, field).text = value
+# ---- Parsed Upload Cache ----
+# Shared across reruns and sessions; bounded by upload bytes so a few large
+# files cannot pin the server's memory.
 
-        if 'HybridAddress' in suggestions:
-            for key, value in suggestions['HybridAddress'].items():
-                if key.startswith('AdrLine'):
-                    adrLine = ET.SubElement(pstlAdr, "AdrLine")
-                    adrLine.text = value
-                else:
-                    ET.SubElement(pstlAdr, key).text = value
-
-    if 'LEI' in suggestions:
-        id_elem = dbtr.find("Id")
-        if id_elem is None:
-            id_elem = ET.SubElement(dbtr, "Id")
-        org_id = id_elem.find("OrgId")
-        if org_id is None:
-            org_id = ET.SubElement(id_elem, "OrgId")
-        lei = org_id.find("LEI")
-        if lei is None:
-            lei = ET.SubElement(org_id, "LEI")
-        lei.text = suggestions['LEI']
-
-    if 'PurposeCode' in suggestions:
-        cdt_trf_tx_inf = root.find(".//CdtTrfTxInf")
-        if cdt_trf_tx_inf is not None:
-            pmt_tp_inf = cdt_trf_tx_inf.find("PmtTpInf")
-            if pmt_tp_inf is None:
-                pmt_tp_inf = ET.SubElement(cdt_trf_tx_inf, "PmtTpInf")
-            purp = pmt_tp_inf.find("Purp")
-            if purp is None:
-                purp = ET.SubElement(pmt_tp_inf, "Purp")
-            cd = purp.find("Cd")
-            if cd is None:
-                cd = ET.SubElement(purp, "Cd")
-            cd.text = suggestions['PurposeCode']
-
-    if 'RemittanceReference' in suggestions:
-        cdt_trf_tx_inf = root.find(".//CdtTrfTxInf")
-        if cdt_trf_tx_inf is not None:
-            rmt_inf = cdt_trf_tx_inf.find("RmtInf")
-            if rmt_inf is None:
-                rmt_inf = ET.SubElement(cdt_trf_tx_inf, "RmtInf")
-            strd = rmt_inf.find("Strd")
-            if strd is None:
-                strd = ET.SubElement(rmt_inf, "Strd")
-            cdtr_ref_inf = strd.find("CdtrRefInf")
-            if cdtr_ref_inf is None:
-                cdtr_ref_inf = ET.SubElement(strd, "CdtrRefInf")
-            ref = cdtr_ref_inf.find("Ref")
-            if ref is None:
-                ref = ET.SubElement(cdtr_ref_inf, "Ref")
-            ref.text = suggestions['RemittanceReference']
-
-    return root
-
-def prettify_xml(elem):
-    rough_string = ET.tostring(elem, 'utf-8')
-    return rough_string.decode('utf-8')
+@st.cache_resource
+def get_message_cache():
+    return LRUCache(max_entries=16, max_bytes=64 * 1024 * 1024)
 
 
 # ---- Streamlit App ----
@@ -182,31 +31,74 @@ uploaded_file = st.file_uploader("Choose a Payment XML File", type=["xml"])
 st.caption("Or use an example file below:")
 
 example_xml = """
-<pacs.008>
-  <Dbtr>
-    <Nm>John Doe</Nm>
-  </Dbtr>
-  <DbtrAcct>
-    <IBAN>DE89370400440532013000</IBAN>
-  </DbtrAcct>
-  <RmtInf>
-    <Ustrd>Invoice 9914</Ustrd>
-  </RmtInf>
-</pacs.008>
+<Envelope xmlns="urn:swift:xsd:envelope">
+  <AppHdr xmlns="urn:iso:std:iso:20022:tech:xsd:head.001.001.02">
+    <BizMsgIdr>pacs8bizmsgidr01</BizMsgIdr>
+    <MsgDefIdr>pacs.008.001.08</MsgDefIdr>
+  </AppHdr>
+  <Document xmlns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08">
+    <FIToFICstmrCdtTrf>
+      <GrpHdr>
+        <MsgId>pacs8bizmsgidr01</MsgId>
+        <NbOfTxs>1</NbOfTxs>
+        <SttlmInf>
+          <SttlmMtd>INDA</SttlmMtd>
+        </SttlmInf>
+      </GrpHdr>
+      <CdtTrfTxInf>
+        <PmtId>
+          <EndToEndId>Invoice 9914</EndToEndId>
+        </PmtId>
+        <ChrgBr>SHAR</ChrgBr>
+        <Dbtr>
+          <Nm>John Doe</Nm>
+          <PstlAdr>
+            <AdrLine>18 Leicester Road</AdrLine>
+            <AdrLine>358828 Singapore</AdrLine>
+          </PstlAdr>
+        </Dbtr>
+        <DbtrAcct>
+          <Id>
+            <IBAN>DE89370400440532013000</IBAN>
+          </Id>
+        </DbtrAcct>
+        <DbtrAgt>
+          <FinInstnId>
+            <BICFI>SBININBBXXX</BICFI>
+          </FinInstnId>
+        </DbtrAgt>
+        <CdtrAgt>
+          <FinInstnId>
+            <BICFI>CITIUS33</BICFI>
+          </FinInstnId>
+        </CdtrAgt>
+        <Cdtr>
+          <Nm>Volkswagen AG</Nm>
+          <PstlAdr>
+            <TwnNm>Wolfsburg</TwnNm>
+            <Ctry>DE</Ctry>
+          </PstlAdr>
+        </Cdtr>
+      </CdtTrfTxInf>
+    </FIToFICstmrCdtTrf>
+  </Document>
+</Envelope>
 """
 
 if st.button("Load Example Message"):
-    uploaded_file = io.StringIO(example_xml)
-
+    st.session_state.copilot_example = True
 if uploaded_file:
-    xml_content = uploaded_file.read()
-    root = parse_xml(xml_content)
+    st.session_state.copilot_example = False
+
+if uploaded_file or st.session_state.get("copilot_example"):
+    xml_content = uploaded_file.getvalue() if uploaded_file else example_xml
+    message = load_message(xml_content, get_message_cache())
 
-    if root is None:
+    if message is None:
         st.error("❌ Invalid XML format. Please upload a valid pacs.008 message.")
     else:
         st.subheader("🔍 Detected Issues")
-        issues = find_missing_fields(root)
+        issues = message['issues']
 
         if issues:
             st.warning("We found the following issues in your payment XML:")
@@ -216,76 +108,134 @@ if uploaded_file:
             st.subheader("🛠️ Select Repair Actions")
 
             address_type = st.radio("Choose Address Type:", ("Structured", "Hybrid"), index=0)
-            fix_lei = st.checkbox("Fix Missing LEI")
-            fix_purpose = st.checkbox("Fix Missing Purpose Code")
-            fix_remittance = st.checkbox("Fix Missing Remittance Information")
-
-            user_choices = {
-                'address_type': address_type,
-                'fix_lei': fix_lei,
-                'fix_purpose': fix_purpose,
-                'fix_remittance': fix_remittance
-            }
+            user_choices = {'address_type': address_type}
+            for option, label in REPAIR_OPTIONS:
+                user_choices[option] = st.checkbox(label)
 
             if st.button("🚀 Apply Copilot Suggestions", key="apply_copilot"):
-                suggestions = suggest_fixes(root, user_choices)
-                original_root = parse_xml(xml_content)
-                repaired_root = apply_suggestions(root, suggestions)
-                st.success("✅ Suggestions Applied!")
-
-                # Generate Repaired Swift Envelope
-                fixed_xml_string = prettify_xml(repaired_root)
-
-                start_apphdr = fixed_xml_string.find("<AppHdr")
-                end_apphdr = fixed_xml_string.find("</AppHdr>") + len("</AppHdr>")
-                apphdr_xml = fixed_xml_string[start_apphdr:end_apphdr]
-
-                start_doc = fixed_xml_string.find("<Document")
-                end_doc = fixed_xml_string.find("</Document>") + len("</Document>")
-                document_xml = fixed_xml_string[start_doc:end_doc]
+                # Kept in the session so paging and context toggles survive reruns
+                st.session_state.copilot_repair = {
+                    'key': message['key'],
+                    'choices': user_choices,
+                    **repair_message(message, user_choices)
+                }
+                repair = st.session_state.copilot_repair
+                repair['schema_errors'] = validate_message(repair['envelope']) if available_schemas() else None
 
-                final_xml = build_final_envelope(apphdr_xml, document_xml)
+            repair = st.session_state.get("copilot_repair")
+            if repair and repair['key'] == message['key'] and repair['choices'] == user_choices:
+                st.success("✅ Suggestions Applied!")
+                changes = repair['changes']
 
                 # --- Show Before vs After ---
                 st.subheader("📝 Before vs ✨ After Comparison")
 
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.markdown("### 📝 Original Message")
-                    st.code(prettify_xml(original_root), language='xml')
-
-                with col2:
-                    st.markdown("### ✨ Repaired Message")
-                    st.code(final_xml, language='xml')
+                if not changes:
+                    st.info("The repaired message is identical to the original.")
+                else:
+                    pages = (len(changes) - 1) // DIFF_PAGE_SIZE + 1
+                    page = st.number_input(f"Changed subtrees ({len(changes)} total) — page", 1, pages, 1) if pages > 1 else 1
+                    first = (page - 1) * DIFF_PAGE_SIZE
+
+                    for position, change in enumerate(changes[first:first + DIFF_PAGE_SIZE], start=first):
+                        before_xml, after_xml = render_change(change)
+                        st.markdown(f"**{change['kind'].title()}** `{change['path']}`")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.code(before_xml or "— not present —", language='xml')
+                        with col2:
+                            st.code(after_xml or "— removed —", language='xml')
+                        if st.checkbox("Show surrounding context", key=f"diff_context_{position}"):
+                            st.code(render_context(change), language='xml')
+
+                if st.checkbox("Show full original and repaired messages", key="show_full_messages"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.markdown("### 📝 Original Message")
+                        st.code(message['xml'], language='xml')
+                    with col2:
+                        st.markdown("### ✨ Repaired Message")
+                        st.code(repair['xml'], language='xml')
 
                 # --- Changes Summary ---
                 st.subheader("🛠️ Fields Updated by Copilot")
-                changes_made = []
-                if user_choices.get('fix_lei', False):
-                    changes_made.append("• Debtor LEI added or updated")
-                if user_choices.get('fix_purpose', False):
-                    changes_made.append("• Purpose Code (Purp) added or updated")
-                if user_choices.get('fix_remittance', False):
-                    changes_made.append("• Remittance Information (RmtInf) added or updated")
-                if address_type:
-                    changes_made.append(f"• Address structured as **{address_type} Address**")
+                changes_made = [
+                    f"• {line['kind'].title()} `{line['path']}`" + (f" ({line['count']}×)" if line['count'] > 1 else "")
+                    for line in summarize_changes(changes)
+                ]
 
                 if changes_made:
                     st.success("\n".join(changes_made))
                 else:
                     st.info("No structural changes were required.")
 
+                # --- Schema Validation ---
+                st.subheader("📐 Schema Validation")
+                if repair['schema_errors'] is None:
+                    st.info(f"Add {' and '.join(SCHEMA_FILES.values())} to paymentlabs/schemas to validate repaired messages.")
+                elif repair['schema_errors']:
+                    st.error(f"❌ {len(repair['schema_errors'])} schema errors in the repaired message:")
+                    for error in repair['schema_errors']:
+                        # Validated in memory, so the element path locates the error
+                        st.write(f"- {error['part']}" + (f" `{error['path']}`" if error['path'] else "") + f": {error['message']}")
+                else:
+                    st.success("✅ Repaired message is valid against head.001.001.02 and pacs.008.001.08.")
+
                 st.subheader("⬇️ Download Repaired Swift CBPR+ XML")
                 st.download_button(
                     label="Download Repaired XML",
-                    data=final_xml,
+                    data=repair['xml'],
                     file_name="repaired_payment.xml",
                     mime="application/xml"
                 )
         else:
             st.success("✅ No issues found. Payment is clean!")
-            st.code(prettify_xml(root), language='xml')
+            st.code(message['xml'], language='xml')
+
+# ---- Bulk Streaming Repair ----
+st.markdown("---")
+st.subheader("📦 Bulk Streaming Repair")
+st.caption("For large overnight files: every CdtTrfTxInf is repaired as it is read and written straight to the output envelope.")
+
+bulk_file = st.file_uploader("Choose a Bulk pacs.008 File", type=["xml"], key="bulk_file")
+
+if bulk_file:
+    bulk_address_type = st.radio("Choose Address Type:", ("Structured", "Hybrid"), index=0, key="bulk_address_type")
+    bulk_choices = {'address_type': bulk_address_type}
+    for option, label in REPAIR_OPTIONS:
+        bulk_choices[option] = st.checkbox(label, key=f"bulk_{option}")
+
+    if st.button("🚀 Run Bulk Repair", key="run_bulk_repair"):
+        progress = st.empty()
+        output = tempfile.NamedTemporaryFile(suffix=".xml", delete=False)
+        try:
+            with output:
+                stats = stream_repair(
+                    bulk_file,
+                    output,
+                    bulk_choices,
+                    on_progress=lambda done, elapsed: progress.info(f"⏳ {done:,} transactions repaired ({done / elapsed:,.0f} tx/s)")
+                )
+        except etree.XMLSyntaxError as exc:
+            os.remove(output.name)
+            progress.empty()
+            st.error(f"❌ The bulk file is not well-formed XML: {exc}")
+            st.stop()
+        progress.empty()
+
+        st.success(f"✅ {stats['transactions']:,} transactions repaired in {stats['seconds']}s")
+        col1, col2 = st.columns(2)
+        col1.metric("Transactions", f"{stats['transactions']:,}")
+        col2.metric("Throughput (tx/s)", f"{stats['tps']:,.0f}")
+
+        with open(output.name, "rb") as repaired:
+            st.download_button(
+                label="Download Repaired Bulk XML",
+                data=repaired,
+                file_name="repaired_bulk_payments.xml",
+                mime="application/xml"
+            )
+        os.remove(output.name)
 
 # ---- Custom Footer ----
 st.markdown(
@@ -1,6 +1,32 @@
 import streamlit as st
-import pandas as pd
-import random
+from lxml import etree
+from paymentlabs.cache import LRUCache
+from paymentlabs.data_quality import (
+    FILTER_OPTIONS,
+    find_message,
+    generate_dummy_payments,
+    load_dataset,
+    message_fields,
+    page_positions,
+    page_table,
+    prepare_dataset,
+    summary_metrics,
+)
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# --- Dataset Cache ---
+# Uploaded files are shared across sessions by content hash; the sample data
+# is drawn once per session so it stays put while the user clicks around.
+
+@st.cache_resource
+def get_dataset_cache():
+    return LRUCache(max_entries=8, max_bytes=512 * 1024 * 1024)
+
+def sample_dataset():
+    if "dq_sample" not in st.session_state:
+        st.session_state.dq_sample = prepare_dataset(generate_dummy_payments())
+    return st.session_state.dq_sample
 
 # --- Page Config ---
 st.set_page_config(page_title="ISO 20022 Data Quality Checker", layout="wide")
@@ -11,96 +37,79 @@ This module is designed for **corporates** to assess and improve the quality of
 It helps drive **Straight-Through Processing (STP)**, reduce **payment friction**, and enable the use of **rich structured data** in `pacs.008` messages — all critical for ISO 20022 compliance and operational excellence.
 """)
 
-# --- Dummy Data Generator ---
-def generate_dummy_payments(num_messages=100):
-    fields = {
-        "Debtor Name": ["ABC Corp", "XYZ Ltd", "Global Inc"],
-        "Debtor LEI": ["529900T8BM49AURSDO55", "", "875300T3KM43AURXYZ99"],
-        "Debtor BIC": ["HDFCINBBXXX", "", "SBININBB123"],
-        "Purpose Code": ["SALA", "", "CASH"],
-        "Remittance Info": ["Invoice #123", "", "PO #45678"]
-    }
-
-    address_options = [
-        "Hybrid Address: <AdrLine>#18-16 Leicester Road</AdrLine>",
-        "Fully Structured Address: <StrtNm>Leicester Road</StrtNm> <BldgNb>18-16</BldgNb> <TwnNm>Singapore</TwnNm>",
-        ""
-    ]
-
-    data = []
-    for i in range(num_messages):
-        row = {"Message ID": f"MSG{i+1:04d}"}
-        valid_count = 0
-        for field, options in fields.items():
-            value = random.choice(options)
-            row[field] = value
-            if value:
-                valid_count += 1
-
-        # Postal Address separately
-        postal_value = random.choice(address_options)
-        row["Postal Address"] = postal_value
-        if postal_value:
-            valid_count += 1
-
-        row["Quality Score"] = round((valid_count / 6) * 100, 2)  # 6 fields
-        data.append(row)
-
-    return pd.DataFrame(data)
-
-# --- Generate Data ---
-df = generate_dummy_payments()
+# --- Load Data ---
+st.subheader("Upload Payment File")
+uploaded_file = st.file_uploader("Choose a pain.001 or pacs.008 XML file (sample data is shown otherwise)", type=["xml"])
+
+dataset = None
+if uploaded_file:
+    try:
+        with st.spinner("Reading payments..."):
+            dataset = load_dataset(uploaded_file.getvalue(), get_dataset_cache())
+    except etree.XMLSyntaxError as exc:
+        st.error(f"Invalid XML: {exc}; showing sample data instead.")
+    else:
+        if dataset['df'].empty:
+            st.warning("No CdtTrfTxInf transactions found in the uploaded file; showing sample data instead.")
+            dataset = None
+if dataset is None:
+    dataset = sample_dataset()
+df = dataset['df']
 
 # --- Filter UI ---
 st.subheader("Filter Messages")
-filter_option = st.radio("Select messages to view", ["All", "Correct Only", "Incorrect Only"])
-
-if filter_option == "Correct Only":
-    display_df = df[df["Quality Score"] == 100]
-elif filter_option == "Incorrect Only":
-    display_df = df[df["Quality Score"] < 100]
-else:
-    display_df = df.copy()
+filter_option = st.radio("Select messages to view", FILTER_OPTIONS)
 
 # --- Summary Metrics ---
 st.subheader("Summary Metrics")
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("Total", df.shape[0])
-col2.metric("Fully Valid", df[df["Quality Score"] == 100].shape[0])
-col3.metric("Partially Valid", df[(df["Quality Score"] < 100) & (df["Quality Score"] > 0)].shape[0])
-col4.metric("Fully Invalid", df[df["Quality Score"] == 0].shape[0])
-
-# --- Highlight Style for Missing ---
-def highlight_missing(val):
-    if val == "":
-        return 'background-color: #ffd6d6'  # soft red for missing
-    return ''
+for col, (label, value) in zip(st.columns(4), summary_metrics(dataset).items()):
+    col.metric(label, value)
 
 # --- Two Panel Layout ---
 st.subheader("Messages")
 left, right = st.columns([2, 1])
 
 with left:
-    st.markdown("#### Message Table (Red = Missing Field)")
-    styled_df = display_df.drop(columns=["Quality Score"]).set_index("Message ID").style.applymap(highlight_missing)
-    st.dataframe(styled_df, use_container_width=True)
+    st.markdown("#### Message Table (Red = Missing Field, Amber = Invalid Field)")
+    total_rows = len(dataset['partitions'][filter_option])
+    col1, col2, col3, col4 = st.columns(4)
+    sort_by = col1.selectbox("Sort by", ["(file order)", *df.columns])
+    descending = col2.checkbox("Descending")
+    page_size = col3.selectbox("Rows per page", PAGE_SIZES, index=1)
+    pages = max(1, (total_rows - 1) // page_size + 1)
+    page = col4.number_input(f"Page (of {pages})", 1, pages, 1)
+
+    positions = page_positions(
+        dataset, filter_option,
+        sort_by=None if sort_by == "(file order)" else sort_by,
+        descending=descending, page=page, page_size=page_size
+    )
+    st.dataframe(page_table(dataset, positions), use_container_width=True)
+    first_row = (page - 1) * page_size
+    st.caption(f"Rows {min(first_row + 1, total_rows):,}–{first_row + len(positions):,} of {total_rows:,}")
 
 with right:
     st.markdown("#### Selected Message")
-    selected_msg = st.selectbox("Choose a Message ID", display_df["Message ID"].tolist())
-    selected_row = df[df["Message ID"] == selected_msg].iloc[0]
-
-    st.markdown(f"**Message ID:** `{selected_msg}`")
-    st.markdown(f"**Quality Score:** `{selected_row['Quality Score']}%`")
-    st.markdown("---")
-    st.markdown("**Field Values:**")
-
-    for field in df.columns[1:-1]:  # skip Message ID and Quality Score
-        val = selected_row[field]
-        if val == "":
-            st.markdown(f"- **{field}**: ❌ *Missing*")
-        else:
-            st.markdown(f"- **{field}**: `{val}`")
+    page_ids = df["Message ID"].iloc[positions].tolist()
+    searched = st.text_input("Look up a Message ID")
+    selected_msg = searched.strip() or st.selectbox("Or choose one from this page", page_ids)
+    position = find_message(dataset, selected_msg) if selected_msg else None
+
+    if position is None:
+        st.info(f"No message with ID `{selected_msg}`." if selected_msg else "No messages match the filter.")
+    else:
+        st.markdown(f"**Message ID:** `{selected_msg}`")
+        st.markdown(f"**Quality Score:** `{df['Quality Score'].iloc[position]}%`")
+        st.markdown("---")
+        st.markdown("**Field Values:**")
+
+        for field, val, status in message_fields(dataset, position):
+            if status == "missing":
+                st.markdown(f"- **{field}**: ❌ *Missing*")
+            elif status == "invalid":
+                st.markdown(f"- **{field}**: `{val}` ⚠️ *Invalid*")
+            else:
+                st.markdown(f"- **{field}**: `{val}`")
 
 # --- Footer ---
 st.markdown("---")
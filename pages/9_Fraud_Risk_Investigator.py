@@ -1,6 +1,21 @@
+import os
+import numpy as np
 import streamlit as st
-import pandas as pd
-import random
+from paymentlabs.fraud import FRAUD_CONFIG, FRAUD_RULES, flag_count, get_summary, score_transactions
+from paymentlabs.fraud_service import DEFAULT_SCORES_FILE, read_scores, read_stats
+from paymentlabs.sanctions import DEFAULT_INDEX_DIR, open_index, screen_name
+from paymentlabs.velocity import WINDOWS, feature_columns, velocity_features
+from paymentlabs.workload import fraud_frame
+
+# ---- Sanctions Index ----
+# Memory-mapped, so sessions share the pages; built offline with
+# python -m paymentlabs.sanctions build <dump> -o <dir>
+
+@st.cache_resource
+def get_sanctions_index():
+    if not os.path.exists(os.path.join(DEFAULT_INDEX_DIR, "meta.json")):
+        return None
+    return open_index(DEFAULT_INDEX_DIR)
 
 # ---- Page Setup ----
 st.set_page_config(page_title="Fraud Risk Investigator", layout="wide")
@@ -11,73 +26,107 @@ This module simulates fraud detection using enriched ISO 20022 fields.
 Each transaction is assessed against **FATF red flags**, **OpenSanctions**, and **Swift data quality** checks.
 """)
 
-# ---- Dummy Data ----
-data = [
-    {
-        "Transaction ID": f"TXN{1000+i}",
-        "Amount": round(random.uniform(5000, 500000), 2),
-        "Currency": "USD",
-        "Debtor": random.choice(["ACME Corp", "Global Exports", "Unknown Entity", "Midland Ltd"]),
-        "Creditor": random.choice(["SafeBank", "XYZ Bank", "Iran Financial Org", "ABC Corp"]),
-        "Country": random.choice(["IR", "US", "RU", "SG", "IN", "CN"]),
-        "Purpose Code": random.choice(["SALA", "GDSV", "INTE", "CASH", "TAXS"]),
-        "LEI": random.choice(["", "5493001KJTIIGC8Y1R12"]),
-        "Sanction Match": random.choice([True, False, False]),
-    }
-    for i in range(50)
-]
-
-df = pd.DataFrame(data)
-
-# ---- Forensic Summary Builder ----
-def get_summary(row):
-    reasons = []
-    sources = []
-
-    if row["Country"] in ["IR", "RU", "CN"]:
-        reasons.append("Country is on FATF grey/black list")
-        sources.append("FATF")
-
-    if row["Purpose Code"] == "CASH":
-        reasons.append("Unusual purpose code (CASH) for cross-border payment")
-        sources.append("Swift Guidelines")
-
-    if not row["LEI"]:
-        reasons.append("Missing LEI for corporate sender")
-        sources.append("Swift Data Quality")
-
-    if row["Sanction Match"] and "Iran" in row["Creditor"]:
-        reasons.append("Creditor flagged in OpenSanctions")
-        sources.append("OpenSanctions")
-
-    if row["Amount"] > 250000:
-        reasons.append("High-value transaction requiring additional scrutiny")
-        sources.append("FATF")
-
-    if not reasons:
-        return "✅ No fraud indicators detected", []
-
-    return f"❌ Flagged for: {', '.join(reasons)}", list(set(sources))
-
-# ---- Generate Summary and Sources ----
-df["Risk Summary"], df["Sources"] = zip(*df.apply(get_summary, axis=1))
+# ---- Data Source ----
+# Live scores come from python -m paymentlabs.fraud_service; the page only
+# reads its output. Sample data is generated and scored here.
+live_available = os.path.exists(DEFAULT_SCORES_FILE)
+source = st.radio("Transactions", ["Sample data", "Live scores"], index=1 if live_available else 0, horizontal=True)
+
+if source == "Live scores":
+    if not live_available:
+        st.info(f"No live scores at {DEFAULT_SCORES_FILE}. Start the service with `python -m paymentlabs.fraud_service --tail <transactions.jsonl>`.")
+        st.stop()
+    stats_file = f"{DEFAULT_SCORES_FILE}.stats.json"
+    if os.path.exists(stats_file):
+        stats = read_stats(stats_file)
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Scored", f"{stats['scored']:,}")
+        col2.metric("Rejected", f"{stats.get('rejected', 0):,}")
+        col3.metric("Throughput", f"{stats['per_second'] or 0:,.0f}/s")
+        col4.metric("p50 latency", f"{stats['p50_ms']} ms")
+        col5.metric("p99 latency", f"{stats['p99_ms']} ms")
+    limit = st.selectbox("Latest transactions", [50, 200, 500])
+    st.button("🔄 Refresh")
+    df = read_scores(DEFAULT_SCORES_FILE, limit)
+    if df.empty:
+        st.info("The service has not scored any transactions yet.")
+        st.stop()
+    features = df[feature_columns()]
+    flags = df["Flags"].to_numpy(dtype=np.uint32)
+    config = {**FRAUD_CONFIG, 'sanctions_index': get_sanctions_index()}
+else:
+    # ---- Dummy Data ----
+    df = fraud_frame(50)
+    features = velocity_features(df)
+
+    # ---- Rule Settings ----
+    with st.expander("⚙️ Rule Settings"):
+        enabled = [rule['id'] for rule in FRAUD_RULES if st.checkbox(rule['reason'], value=True, key=f"rule_{rule['id']}")]
+        config = {
+            'high_risk_countries': st.multiselect(
+                "FATF grey/black list countries",
+                sorted(set(df["Country"]) | set(FRAUD_CONFIG['high_risk_countries'])),
+                default=list(FRAUD_CONFIG['high_risk_countries'])
+            ),
+            'high_value_threshold': st.number_input("High-value threshold (USD)", min_value=0, value=FRAUD_CONFIG['high_value_threshold'], step=10000),
+            'sanctions_index': get_sanctions_index(),
+            'sanctions_threshold': st.slider("Sanctions name match threshold", 0.5, 1.0, FRAUD_CONFIG['sanctions_threshold'], 0.05),
+        }
+        if config['sanctions_index'] is None:
+            st.caption(f"No sanctions index at {DEFAULT_INDEX_DIR}; name screening is off. Build one with `python -m paymentlabs.sanctions build <dump>`.")
+        config.update({
+            'burst_count_1h': st.number_input("Burst: payments per debtor within 1h", min_value=1, value=FRAUD_CONFIG['burst_count_1h']),
+            'structuring_count_24h': st.number_input("Structuring: payments per debtor within 24h", min_value=1, value=FRAUD_CONFIG['structuring_count_24h']),
+            'fan_out_creditors_24h': st.number_input("Fan-out: distinct creditors per debtor within 24h", min_value=1, value=FRAUD_CONFIG['fan_out_creditors_24h']),
+            'corridor_sum_1h': st.number_input("Corridor volume limit within 1h (USD)", min_value=0, value=FRAUD_CONFIG['corridor_sum_1h'], step=100000),
+        })
+
+    # ---- Score All Transactions ----
+    flags = score_transactions(df.join(features), config, enabled)
 
 # ---- Display Table with Click to Expand ----
 st.markdown("### 📋 Transactions Overview")
-st.dataframe(df[["Transaction ID", "Amount", "Currency", "Debtor", "Creditor", "Country", "Purpose Code", "LEI", "Sanction Match"]])
-
-selected_txn = st.selectbox("🔍 Select a Transaction to Investigate:", df["Transaction ID"].tolist())
-
-if selected_txn:
-    selected = df[df["Transaction ID"] == selected_txn].iloc[0]
+overview = df[["Transaction ID", "Timestamp", "Amount", "Currency", "Debtor", "Creditor", "Debtor Country", "Country", "Purpose Code", "LEI", "Sanction Match"]].copy()
+overview["Risk Flags"] = flag_count(flags)
+st.dataframe(overview)
+
+transaction_ids = df["Transaction ID"].tolist()
+position = st.selectbox(
+    "🔍 Select a Transaction to Investigate:",
+    range(len(transaction_ids)),
+    format_func=lambda index: transaction_ids[index]
+)
+
+if position is not None:
+    selected = df.iloc[position]
+    risk_summary, sources = get_summary(flags[position])
     st.markdown(f"#### 🔍 Transaction Details: {selected['Transaction ID']}")
+    st.markdown(f"🕒 Timestamp: **{selected['Timestamp']}**")
     st.markdown(f"💸 Amount: **{selected['Amount']} {selected['Currency']}**")
     st.markdown(f"👤 Debtor: **{selected['Debtor']}**")
     st.markdown(f"🏦 Creditor: **{selected['Creditor']}**")
-    st.markdown(f"🌍 Country: **{selected['Country']}**")
+    st.markdown(f"🌍 Corridor: **{selected['Debtor Country']} → {selected['Country']}**")
     st.markdown(f"📄 Purpose Code: **{selected['Purpose Code']}**")
     st.markdown(f"🔗 LEI: **{selected['LEI'] or 'Missing'}**")
     st.markdown(f"🚨 Sanction Match: **{'Yes' if selected['Sanction Match'] else 'No'}**")
-    st.info(f"{selected['Risk Summary']}")
-    if selected['Sources']:
-        st.warning(f"📚 Flagged against: {', '.join(selected['Sources'])}")
+    st.info(f"{risk_summary}")
+    if sources:
+        st.warning(f"📚 Flagged against: {', '.join(sources)}")
+
+    velocity = features.iloc[position]
+    st.markdown("##### ⏱️ Velocity")
+    st.table({
+        label: {
+            "Debtor payments": f"{velocity[f'Debtor Count {label}']:.0f}",
+            "Debtor amount": f"{velocity[f'Debtor Sum {label}']:,.2f}",
+            "Distinct creditors": f"{velocity[f'Debtor Creditors {label}']:.0f}",
+            "Corridor payments": f"{velocity[f'Corridor Count {label}']:.0f}",
+            "Corridor amount": f"{velocity[f'Corridor Sum {label}']:,.2f}",
+        }
+        for label, _ in WINDOWS
+    })
+
+    if config['sanctions_index'] is not None:
+        for party in ("Debtor", "Creditor"):
+            for match in screen_name(config['sanctions_index'], selected[party], config['sanctions_threshold']):
+                st.error(f"🚨 {party} **{selected[party]}** ~ **{match['caption']}** (`{match['entity_id']}`, score {match['score']})")
@@ -0,0 +1,140 @@
+"""Word-level loss checks for AdrLine -> structured address conversions.
+
+    python -m paymentlabs.address_validation pairs.csv --workers 8 --report losses.jsonl
+
+Batch input is CSV or JSONL with id, adrline (the <PstlAdr> block or plain
+lines) and structured (the JSON output, as text or, in JSONL, an object).
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+ADRLINE_PATTERN = re.compile(r"<AdrLine>(.*?)</AdrLine>", re.DOTALL)
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+# ---- Word Extraction ----
+
+def extract_words_from_adrline(xml_text):
+    adr_lines = ADRLINE_PATTERN.findall(xml_text)
+    full_text = " ".join(adr_lines)
+    words = WORD_PATTERN.findall(full_text)  # Extract words only
+    return [word.lower() for word in words if word]
+
+def extract_words_from_structured_json(json_text):
+    try:
+        parsed = json.loads(json_text)
+        structured_text = ""
+        for value in parsed.get("PstlAdr", {}).values():
+            structured_text += str(value) + " "
+        words = WORD_PATTERN.findall(structured_text)
+        return [word.lower() for word in words if word]
+    except:
+        return []
+
+# ---- Validation ----
+
+# Words are compared as multisets: an input word that appears twice must
+# appear twice in the output, and each lookup is a Counter hit rather than a
+# scan of the output list.
+
+def validate_word_match(input_words, output_words):
+    # Input words (repeats included, in input order) not covered by the output
+    remaining = Counter(output_words)
+    missing_words = []
+    for word in input_words:
+        if remaining[word] > 0:
+            remaining[word] -= 1
+        else:
+            missing_words.append(word)
+    return missing_words
+
+def added_words(input_words, output_words):
+    # Output words that the input does not account for
+    return validate_word_match(output_words, input_words)
+
+# ---- Batch ----
+
+def load_records(path):
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as source:
+            return list(csv.DictReader(source))
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+def validate_record(record):
+    adrline = record.get("adrline") or ""
+    structured = record.get("structured") or ""
+    if not isinstance(structured, str):
+        structured = json.dumps(structured)
+    input_words = extract_words_from_adrline(adrline if "<AdrLine>" in adrline else f"<AdrLine>{adrline}</AdrLine>")
+    output_words = extract_words_from_structured_json(structured)
+    if not output_words and structured.strip():
+        return {'id': record.get("id"), 'status': 'error', 'missing': [], 'added': [], 'error': "Structured address is not PstlAdr JSON"}
+    missing = validate_word_match(input_words, output_words)
+    added = added_words(input_words, output_words)
+    return {
+        'id': record.get("id"),
+        'status': 'loss' if missing else ('enhanced' if added else 'ok'),
+        'missing': missing,
+        'added': added,
+        'input_words': len(input_words),
+        'output_words': len(output_words),
+    }
+
+def run_batch(records, workers=None, chunksize=256):
+    # Yields one result per record, in input order
+    if workers == 1:
+        yield from map(validate_record, records)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(validate_record, records, chunksize=chunksize)
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m paymentlabs.address_validation",
+        description="Check structured addresses for word loss against their AdrLine originals."
+    )
+    parser.add_argument("input", help="CSV or JSONL of id, adrline, structured")
+    parser.add_argument("--report", help="JSONL loss report (default: stdout)")
+    parser.add_argument("--all", action="store_true", help="Report every record, not only failures")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"No such file: {args.input}", file=sys.stderr)
+        return 1
+    records = load_records(args.input)
+    out = open(args.report, 'w', encoding='utf-8') if args.report else sys.stdout
+    started = time.perf_counter()
+    statuses = Counter()
+    lost = Counter()
+    try:
+        for result in run_batch(records, args.workers):
+            statuses[result['status']] += 1
+            lost.update(result['missing'])
+            if args.all or result['status'] != 'ok':
+                out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(records):,} records ({statuses['ok']:,} ok, {statuses['enhanced']:,} enhanced, "
+        f"{statuses['loss']:,} with loss, {statuses['error']:,} errors) in {elapsed:.2f}s",
+        file=sys.stderr
+    )
+    if lost:
+        print("Most often lost: " + ", ".join(f"{word} ({count})" for word, count in lost.most_common(10)), file=sys.stderr)
+    return 2 if statuses['loss'] or statuses['error'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
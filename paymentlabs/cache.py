@@ -0,0 +1,72 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# ---- Content Hashing ----
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+# ---- LRU Cache ----
+# Shared between Streamlit sessions (threads), hence the lock. Entries carry a
+# caller-supplied size so the cache can be bounded by bytes as well as count,
+# and with `ttl` an entry older than that many seconds counts as a miss.
+
+class LRUCache:
+    def __init__(self, max_entries=32, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries or self._expired(key):
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, size=0):
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, time.monotonic())
+            self.total_bytes += size
+            self._evict()
+
+    def _expired(self, key):
+        # Drops the entry if it has outlived the ttl
+        if self.ttl is None or time.monotonic() - self._entries[key][2] < self.ttl:
+            return False
+        self.total_bytes -= self._entries.pop(key)[1]
+        return True
+
+    def _evict(self):
+        # Never evict the entry just added, even if it alone exceeds max_bytes
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries and not self._expired(key)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,163 @@
+"""Headless batch repair for pacs.008 files.
+
+    python -m paymentlabs.copilot_batch incoming/ "archive/*.xml" -o repaired/ \
+        --fix-lei --fix-purpose --workers 8 --summary repairs.jsonl
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lxml import etree
+
+from paymentlabs.copilot import (
+    apply_suggestions,
+    build_final_envelope,
+    change_summary,
+    find_envelope_parts,
+    find_missing_fields,
+    index_message,
+    stream_repair,
+    suggest_fixes,
+)
+from paymentlabs.copilot_rules import REPAIR_OPTIONS
+
+# ---- Input Discovery ----
+
+def collect_files(inputs):
+    files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.xml"))
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        files.extend(path for path in matches if os.path.isfile(path))
+    # A file named by two patterns is only repaired once
+    return sorted(set(files))
+
+def output_path(path, output_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir, f"{stem}_repaired.xml")
+
+# ---- Single File ----
+
+def repair_file(path, output_dir, user_choices, stream=False):
+    started = time.perf_counter()
+    summary = {'file': path, 'output': None}
+    target = output_path(path, output_dir)
+
+    if stream:
+        try:
+            stats = stream_repair(path, target, user_choices)
+        except etree.XMLSyntaxError as exc:
+            # The parser fails mid-file, after part of the output was written
+            if os.path.exists(target):
+                os.remove(target)
+            summary.update(status='invalid', error=str(exc), transactions=0, changes=[])
+        else:
+            summary.update(
+                status='repaired' if stats['changes'] else 'clean',
+                output=target,
+                transactions=stats['transactions'],
+                changes=stats['changes']
+            )
+    else:
+        try:
+            with open(path, 'rb') as source:
+                root = etree.fromstring(source.read())
+        except etree.XMLSyntaxError as exc:
+            summary.update(status='invalid', error=str(exc), transactions=0, issues=[], changes=[])
+        else:
+            index = index_message(root)
+            suggestions = suggest_fixes(root, user_choices, index)
+            summary.update(
+                status='repaired' if suggestions else 'clean',
+                transactions=len(index['transactions']),
+                issues=find_missing_fields(root, index),
+                changes=change_summary(Counter((suggestion['rule'], suggestion['message']) for suggestion in suggestions))
+            )
+            if suggestions:
+                apply_suggestions(root, suggestions)
+                with open(target, 'w', encoding='utf-8') as out:
+                    out.write(build_final_envelope(*find_envelope_parts(root, index)))
+                summary['output'] = target
+
+    summary['seconds'] = round(time.perf_counter() - started, 4)
+    return summary
+
+# ---- Batch ----
+
+def run_batch(files, output_dir, user_choices, workers=None, stream=False):
+    # Yields one summary per file as workers finish, in completion order
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(repair_file, path, output_dir, user_choices, stream): path for path in files}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as exc:
+                yield {'file': futures[future], 'output': None, 'status': 'error', 'error': str(exc)}
+
+# ---- Command Line ----
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m paymentlabs.copilot_batch",
+        description="Repair Swift CBPR+ pacs.008 files in batch with the Structured Payment Copilot rules."
+    )
+    parser.add_argument("inputs", nargs="+", help="Directories or glob patterns of pacs.008 XML files")
+    parser.add_argument("-o", "--output-dir", default="repaired", help="Where repaired envelopes are written")
+    parser.add_argument("--summary", help="JSONL file for per-file summaries (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--address-type", choices=("Structured", "Hybrid"), default="Structured")
+    parser.add_argument("--stream", action="store_true", help="Stream each file transaction by transaction (bulk files)")
+    for option, label in REPAIR_OPTIONS:
+        parser.add_argument(f"--{option.replace('_', '-')}", dest=option, action="store_true", help=label)
+    parser.add_argument("--lei", help="LEI used by --fix-lei")
+    parser.add_argument("--purpose-code", help="Purpose code used by --fix-purpose")
+    parser.add_argument("--remittance-reference", help="Creditor reference used by --fix-remittance")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    files = collect_files(args.inputs)
+    if not files:
+        print("No input files matched.", file=sys.stderr)
+        return 1
+
+    user_choices = {'address_type': args.address_type}
+    for option, _ in REPAIR_OPTIONS:
+        user_choices[option] = getattr(args, option)
+    for key in ('lei', 'purpose_code', 'remittance_reference'):
+        if getattr(args, key):
+            user_choices[key] = getattr(args, key)
+
+    out = open(args.summary, 'w', encoding='utf-8') if args.summary else sys.stdout
+    started = time.perf_counter()
+    statuses = Counter()
+    transactions = 0
+    try:
+        for summary in run_batch(files, args.output_dir, user_choices, args.workers, args.stream):
+            statuses[summary['status']] += 1
+            transactions += summary.get('transactions', 0)
+            out.write(json.dumps(summary) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(files)} files ({', '.join(f'{count} {status}' for status, count in sorted(statuses.items()))}), "
+        f"{transactions} transactions in {elapsed:.2f}s — "
+        f"{len(files) / elapsed:.2f} files/s, {transactions / elapsed:.1f} tx/s",
+        file=sys.stderr
+    )
+    return 0 if not statuses['error'] else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+import uuid
+from lxml import etree
+from paymentlabs.gazetteer import structure_address
+from paymentlabs.namespaces import local_name, qualify
+from paymentlabs.validators import is_valid_bic, is_valid_lei
+
+# ---- Repair Defaults ----
+# Values used by the fixers unless the caller's choices override them.
+
+REPAIR_DEFAULTS = {
+    'address_type': 'Structured',
+    'country': 'SG',
+    'town': 'Singapore',
+    'lei': '5493001KJTIIGC8Y1R12',
+    'purpose_code': 'GDDS',
+    'remittance_reference': 'RF712345678901234567',
+}
+
+# Checkbox options offered by the Copilot; each enables the fixers tagged with it.
+REPAIR_OPTIONS = (
+    ('fix_lei', "Fix Missing LEI"),
+    ('fix_purpose', "Fix Missing Purpose Code"),
+    ('fix_remittance', "Fix Missing Remittance Information"),
+    ('fix_uetr', "Generate Missing UETR"),
+)
+
+PARTY_LABELS = {
+    'Dbtr': "Debtor",
+    'Cdtr': "Creditor",
+    'UltmtDbtr': "Ultimate Debtor",
+    'UltmtCdtr': "Ultimate Creditor",
+    'DbtrAgt': "Debtor Agent",
+    'CdtrAgt': "Creditor Agent",
+    'InstgAgt': "Instructing Agent",
+    'InstdAgt': "Instructed Agent",
+}
+
+# ---- Schema Order ----
+# Child sequences from pacs.008.001.08 for the parents the fixers write into,
+# so added elements land where the schema expects them.
+
+CHILD_ORDER = {
+    'CdtTrfTxInf': (
+        'PmtId', 'PmtTpInf', 'IntrBkSttlmAmt', 'IntrBkSttlmDt', 'SttlmPrty', 'SttlmTmIndctn',
+        'SttlmTmReq', 'AccptncDtTm', 'PoolgAdjstmntDt', 'InstdAmt', 'XchgRate', 'ChrgBr', 'ChrgsInf',
+        'PrvsInstgAgt1', 'PrvsInstgAgt1Acct', 'PrvsInstgAgt2', 'PrvsInstgAgt2Acct',
+        'PrvsInstgAgt3', 'PrvsInstgAgt3Acct', 'InstgAgt', 'InstdAgt',
+        'IntrmyAgt1', 'IntrmyAgt1Acct', 'IntrmyAgt2', 'IntrmyAgt2Acct', 'IntrmyAgt3', 'IntrmyAgt3Acct',
+        'UltmtDbtr', 'InitgPty', 'Dbtr', 'DbtrAcct', 'DbtrAgt', 'DbtrAgtAcct', 'CdtrAgt', 'CdtrAgtAcct',
+        'Cdtr', 'CdtrAcct', 'UltmtCdtr', 'InstrForCdtrAgt', 'InstrForNxtAgt', 'Purp', 'RgltryRptg',
+        'Tax', 'RltdRmtInf', 'RmtInf', 'SplmtryData'
+    ),
+    'Dbtr': ('Nm', 'PstlAdr', 'Id', 'CtryOfRes', 'CtctDtls'),
+    'Cdtr': ('Nm', 'PstlAdr', 'Id', 'CtryOfRes', 'CtctDtls'),
+    'PstlAdr': (
+        'AdrTp', 'Dept', 'SubDept', 'StrtNm', 'BldgNb', 'BldgNm', 'Flr', 'PstBx', 'Room', 'PstCd',
+        'TwnNm', 'TwnLctnNm', 'DstrctNm', 'CtrySubDvsn', 'Ctry', 'AdrLine'
+    ),
+    'OrgId': ('AnyBIC', 'LEI', 'Othr'),
+    'PmtId': ('InstrId', 'EndToEndId', 'TxId', 'UETR', 'ClrSysRef'),
+    'RmtInf': ('Ustrd', 'Strd'),
+    'Strd': (
+        'RfrdDocInf', 'RfrdDocAmt', 'CdtrRefInf', 'Invcr', 'Invcee', 'TaxRmt', 'GrnshmtRmt', 'AddtlRmtInf'
+    ),
+    'CdtrRefInf': ('Tp', 'Ref'),
+    'Tp': ('CdOrPrtry', 'Issr'),
+}
+
+def _find(elem, path):
+    return elem.find(qualify(elem, path))
+
+def _findall(elem, path):
+    return elem.findall(qualify(elem, path))
+
+def _text(elem, path):
+    found = _find(elem, path)
+    return (found.text or '').strip() if found is not None else ''
+
+def ensure_child(parent, tag):
+    # Children are created in the parent's namespace
+    qualified = qualify(parent, tag)
+    child = parent.find(qualified)
+    if child is not None:
+        return child
+    child = parent.makeelement(qualified)
+    order = CHILD_ORDER.get(local_name(parent.tag), ())
+    if tag in order:
+        rank = order.index(tag)
+        for position, sibling in enumerate(parent):
+            sibling_tag = local_name(sibling.tag) if isinstance(sibling.tag, str) else None
+            if sibling_tag in order and order.index(sibling_tag) > rank:
+                parent.insert(position, child)
+                return child
+    parent.append(child)
+    return child
+
+def ensure_path(parent, path):
+    for tag in path.split('/'):
+        parent = ensure_child(parent, tag)
+    return parent
+
+# ---- Detectors ----
+
+def _address_unstructured(party):
+    pstl_adr = _find(party, 'PstlAdr')
+    return pstl_adr is not None and (_find(pstl_adr, 'TwnNm') is None or _find(pstl_adr, 'Ctry') is None)
+
+def _address_too_many_lines(party):
+    return len(_findall(party, 'PstlAdr/AdrLine')) > 2
+
+def _address_line_too_long(party):
+    return any(len(line.text or '') > 70 for line in _findall(party, 'PstlAdr/AdrLine'))
+
+def _lei_missing(party):
+    return _find(party, 'Id/OrgId/LEI') is None and _find(party, 'Id/PrvtId') is None
+
+def _lei_malformed(party):
+    lei = _text(party, 'Id/OrgId/LEI')
+    return bool(lei) and not is_valid_lei(lei)
+
+def _bic_malformed(agent):
+    bic = _text(agent, 'FinInstnId/BICFI')
+    return bool(bic) and not is_valid_bic(bic)
+
+def _remittance_missing(tx):
+    rmt_inf = _find(tx, 'RmtInf')
+    return rmt_inf is None or (_find(rmt_inf, 'Ustrd') is None and _find(rmt_inf, 'Strd') is None)
+
+def _ustrd_too_long(rmt_inf):
+    return any(len(ustrd.text or '') > 140 for ustrd in _findall(rmt_inf, 'Ustrd'))
+
+# ---- Fixers ----
+
+def _fix_address(party, options):
+    pstl_adr = _find(party, 'PstlAdr')
+    children = [(local_name(child.tag), (child.text or '').strip()) for child in pstl_adr.iterchildren(tag=etree.Element)]
+    existing = {tag: text for tag, text in children if tag != 'AdrLine'}
+    adr_lines = [text for tag, text in children if tag == 'AdrLine']
+    # Town and country are recognised against the gazetteer; the defaults
+    # only apply when neither the address nor the gazetteer gives one
+    parsed = structure_address(adr_lines, existing.get('Ctry'), options.get('gazetteer'))[0] if adr_lines else {}
+    country = existing.get('Ctry') or parsed.get('Ctry') or options['country']
+
+    if options['address_type'] == 'Hybrid':
+        if not adr_lines:
+            adr_lines = [
+                f"{existing.get('BldgNb', '')} {existing.get('StrtNm', '')}".strip(),
+                f"{existing.get('PstCd', '')} {existing.get('TwnNm', '')}".strip()
+            ]
+        fields = {'TwnNm': existing.get('TwnNm') or parsed.get('TwnNm') or options['town'], 'Ctry': country}
+        lines = adr_lines[:2]
+    else:
+        fields = {**existing, **parsed}
+        fields['Ctry'] = country
+        lines = []
+
+    pstl_adr.clear(keep_tail=True)
+    for tag in CHILD_ORDER['PstlAdr']:
+        if fields.get(tag):
+            etree.SubElement(pstl_adr, qualify(pstl_adr, tag)).text = fields[tag]
+    for line in lines:
+        etree.SubElement(pstl_adr, qualify(pstl_adr, 'AdrLine')).text = line
+
+def _fix_lei(party, options):
+    ensure_path(party, 'Id/OrgId/LEI').text = options['lei']
+
+def _fix_purpose(tx, options):
+    ensure_path(tx, 'Purp/Cd').text = options['purpose_code']
+
+def _fix_remittance(tx, options):
+    cdtr_ref_inf = ensure_path(tx, 'RmtInf/Strd/CdtrRefInf')
+    if options['remittance_reference'].startswith('RF'):
+        ensure_path(cdtr_ref_inf, 'Tp/CdOrPrtry/Cd').text = 'SCOR'
+        ensure_path(cdtr_ref_inf, 'Tp/Issr').text = 'ISO'
+    ensure_child(cdtr_ref_inf, 'Ref').text = options['remittance_reference']
+
+def _fix_uetr(tx, options):
+    ensure_path(tx, 'PmtId/UETR').text = str(uuid.uuid4())
+
+# ---- Rule Table ----
+# scope:  tags the rule is evaluated against (one index lookup per tag)
+# detect: predicate over a scoped element
+# option: user choice that enables the fixer; rules without a fixer only report
+
+AGENTS = ('DbtrAgt', 'CdtrAgt', 'InstgAgt', 'InstdAgt')
+
+REPAIR_RULES = (
+    {
+        'id': 'PARTY_ADDRESS_MISSING',
+        'scope': ('Dbtr', 'Cdtr'),
+        'message': "Missing {party} Postal Address (PstlAdr)",
+        'detect': lambda party: _find(party, 'PstlAdr') is None,
+    },
+    {
+        'id': 'PARTY_ADDRESS_UNSTRUCTURED',
+        'scope': ('Dbtr', 'Cdtr', 'UltmtDbtr', 'UltmtCdtr'),
+        'message': "{party} Postal Address lacks Town Name or Country (TwnNm/Ctry)",
+        'detect': _address_unstructured,
+        'option': 'address_type',
+        'fix': _fix_address,
+    },
+    {
+        'id': 'PARTY_ADDRESS_TOO_MANY_LINES',
+        'scope': ('Dbtr', 'Cdtr', 'UltmtDbtr', 'UltmtCdtr'),
+        'message': "{party} Postal Address has more than 2 AdrLine",
+        'detect': _address_too_many_lines,
+    },
+    {
+        'id': 'PARTY_ADDRESS_LINE_TOO_LONG',
+        'scope': ('Dbtr', 'Cdtr', 'UltmtDbtr', 'UltmtCdtr'),
+        'message': "{party} AdrLine exceeds 70 characters",
+        'detect': _address_line_too_long,
+    },
+    {
+        'id': 'PARTY_NAME_MISSING',
+        'scope': ('Dbtr', 'Cdtr'),
+        'message': "Missing {party} Name (Nm)",
+        'detect': lambda party: not _text(party, 'Nm'),
+    },
+    {
+        'id': 'PARTY_NAME_TOO_LONG',
+        'scope': ('Dbtr', 'Cdtr', 'UltmtDbtr', 'UltmtCdtr'),
+        'message': "{party} Name exceeds 140 characters",
+        'detect': lambda party: len(_text(party, 'Nm')) > 140,
+    },
+    {
+        'id': 'DEBTOR_LEI_MISSING',
+        'scope': ('Dbtr',),
+        'message': "Missing Debtor LEI (Id/OrgId/LEI)",
+        'detect': _lei_missing,
+        'option': 'fix_lei',
+        'fix': _fix_lei,
+    },
+    {
+        'id': 'PARTY_LEI_MALFORMED',
+        'scope': ('Dbtr', 'Cdtr', 'UltmtDbtr', 'UltmtCdtr'),
+        'message': "{party} LEI is not a valid ISO 17442 format",
+        'detect': _lei_malformed,
+    },
+    {
+        'id': 'AGENT_BIC_MISSING',
+        'scope': ('DbtrAgt', 'CdtrAgt'),
+        'message': "Missing {party} BIC (FinInstnId/BICFI)",
+        'detect': lambda agent: not _text(agent, 'FinInstnId/BICFI'),
+    },
+    {
+        'id': 'AGENT_BIC_MALFORMED',
+        'scope': AGENTS,
+        'message': "{party} BIC is not a valid ISO 9362 format",
+        'detect': _bic_malformed,
+    },
+    {
+        'id': 'PURPOSE_MISSING',
+        'scope': ('CdtTrfTxInf',),
+        'message': "Missing Payment Purpose Code (Purp)",
+        'detect': lambda tx: _find(tx, 'Purp') is None,
+        'option': 'fix_purpose',
+        'fix': _fix_purpose,
+    },
+    {
+        'id': 'REMITTANCE_MISSING',
+        'scope': ('CdtTrfTxInf',),
+        'message': "Missing Remittance Information (RmtInf)",
+        'detect': _remittance_missing,
+        'option': 'fix_remittance',
+        'fix': _fix_remittance,
+    },
+    {
+        'id': 'REMITTANCE_USTRD_TOO_LONG',
+        'scope': ('RmtInf',),
+        'message': "Unstructured Remittance (Ustrd) exceeds 140 characters",
+        'detect': _ustrd_too_long,
+    },
+    {
+        'id': 'UETR_MISSING',
+        'scope': ('CdtTrfTxInf',),
+        'message': "Missing UETR (PmtId/UETR)",
+        'detect': lambda tx: not _text(tx, 'PmtId/UETR'),
+        'option': 'fix_uetr',
+        'fix': _fix_uetr,
+    },
+    {
+        'id': 'CHARGE_BEARER_MISSING',
+        'scope': ('CdtTrfTxInf',),
+        'message': "Missing Charge Bearer (ChrgBr)",
+        'detect': lambda tx: not _text(tx, 'ChrgBr'),
+    },
+    {
+        'id': 'SETTLEMENT_METHOD_MISSING',
+        'scope': ('GrpHdr',),
+        'message': "Missing Settlement Method (SttlmInf/SttlmMtd)",
+        'detect': lambda grp_hdr: not _text(grp_hdr, 'SttlmInf/SttlmMtd'),
+    },
+    {
+        'id': 'BUSINESS_MESSAGE_ID_MISSING',
+        'scope': ('AppHdr',),
+        'message': "Missing Business Message Identifier (AppHdr/BizMsgIdr)",
+        'detect': lambda apphdr: not _text(apphdr, 'BizMsgIdr'),
+    },
+)
+
+# ---- Compilation & Evaluation ----
+
+def compile_rules(rules):
+    # tag -> rules scoped to it; built once so evaluation is a dict dispatch
+    dispatch = {}
+    for rule in rules:
+        compiled = {'option': None, 'fix': None, **rule}
+        for tag in rule['scope']:
+            dispatch.setdefault(tag, []).append(compiled)
+    return {tag: tuple(scoped) for tag, scoped in dispatch.items()}
+
+COMPILED_RULES = compile_rules(REPAIR_RULES)
+RULES_BY_ID = {rule['id']: rule for scoped in COMPILED_RULES.values() for rule in scoped}
+
+def evaluate_rules(index, dispatch=COMPILED_RULES):
+    # `index` comes from a single tree walk; every scoped tag is a lookup in it
+    findings = []
+    for tag, rules in dispatch.items():
+        for elem in index['tags'].get(tag, ()):
+            for rule in rules:
+                if rule['detect'](elem):
+                    findings.append({
+                        'rule': rule['id'],
+                        'message': rule['message'].format(party=PARTY_LABELS.get(tag, tag)),
+                        'element': elem,
+                        'option': rule['option'],
+                        'fixable': rule['fix'] is not None,
+                    })
+    return findings
@@ -0,0 +1,274 @@
+import io
+import numpy as np
+import pandas as pd
+from lxml import etree
+from pandas.api.types import union_categoricals
+from paymentlabs.cache import content_hash
+from paymentlabs.namespaces import local_name, qualify
+from paymentlabs.validators import present, valid_bic, valid_iban, valid_lei, valid_purpose
+from paymentlabs.workload import data_quality_frame
+
+# ---- Quality Scoring ----
+
+QUALITY_FIELDS = ["Debtor Name", "Debtor LEI", "Debtor BIC", "Purpose Code", "Remittance Info", "Postal Address"]
+
+# Fields are scored when the frame has them; uploads also carry Debtor IBAN
+FIELD_VALIDATORS = {
+    "Debtor Name": present,
+    "Debtor LEI": valid_lei,
+    "Debtor BIC": valid_bic,
+    "Debtor IBAN": valid_iban,
+    "Purpose Code": valid_purpose,
+    "Remittance Info": present,
+    "Postal Address": present,
+}
+FIELD_WEIGHTS = {
+    "Debtor Name": 1.0,
+    "Debtor LEI": 2.0,
+    "Debtor BIC": 1.5,
+    "Debtor IBAN": 1.5,
+    "Purpose Code": 1.0,
+    "Remittance Info": 1.0,
+    "Postal Address": 2.0,
+}
+
+def field_validity(df):
+    # Boolean matrix, one column per scored field, each validated column-wise
+    fields = [field for field in FIELD_VALIDATORS if field in df]
+    valid = np.column_stack([FIELD_VALIDATORS[field](df[field]) for field in fields]) if len(df) else np.zeros((0, len(fields)), dtype=bool)
+    return fields, valid
+
+def quality_score(df):
+    # Weighted share of valid fields, as a percentage
+    fields, valid = field_validity(df)
+    weights = np.array([FIELD_WEIGHTS[field] for field in fields])
+    return pd.Series(np.round(valid @ weights / weights.sum() * 100, 2), index=df.index)
+
+def generate_dummy_payments(num_messages=100, seed=None):
+    df = data_quality_frame(num_messages, seed)
+    df["Quality Score"] = quality_score(df)
+    return df
+
+# ---- Dataset, Aggregates and Filters ----
+# One pass over the scores classifies every row; the metrics and the row
+# positions behind each filter are kept with the frame, so reruns and filter
+# switches only look them up.
+
+FILTER_OPTIONS = ["All", "Correct Only", "Incorrect Only"]
+
+def prepare_dataset(df, key=None):
+    score = df["Quality Score"].to_numpy()
+    # 0 = fully valid, 1 = partially valid, 2 = fully invalid
+    status = np.where(score == 100, 0, np.where(score == 0, 2, 1))
+    counts = np.bincount(status, minlength=3)
+    fields, missing_bits, invalid_bits = field_masks(df)
+    return {
+        'key': key,
+        'df': df,
+        'fields': fields,
+        'missing_bits': missing_bits,
+        'invalid_bits': invalid_bits,
+        'message_index': pd.Index(df["Message ID"]),
+        'sort_orders': {},
+        'metrics': {
+            "Total": len(df),
+            "Fully Valid": int(counts[0]),
+            "Partially Valid": int(counts[1]),
+            "Fully Invalid": int(counts[2]),
+        },
+        'partitions': {
+            "All": np.arange(len(df)),
+            "Correct Only": np.flatnonzero(status == 0),
+            "Incorrect Only": np.flatnonzero(status != 0),
+        },
+    }
+
+def field_masks(df):
+    # Bit i of a row is set when table field i is missing / present but invalid
+    fields = [column for column in df.columns if column not in ("Message ID", "Quality Score")]
+    missing_bits = np.zeros(len(df), dtype=np.uint16)
+    for bit, field in enumerate(fields):
+        missing_bits |= (~present(df[field])).astype(np.uint16) << bit
+    invalid_bits = np.zeros(len(df), dtype=np.uint16)
+    scored, valid = field_validity(df)
+    for column, field in enumerate(scored):
+        invalid_bits |= (~valid[:, column]).astype(np.uint16) << fields.index(field)
+    return fields, missing_bits, invalid_bits & ~missing_bits
+
+def filter_messages(dataset, filter_option):
+    return dataset['df'].iloc[dataset['partitions'][filter_option]]
+
+def summary_metrics(dataset):
+    return dataset['metrics']
+
+# ---- Table Pages and Message Lookup ----
+
+MISSING_STYLE = 'background-color: #ffd6d6'  # soft red for missing
+INVALID_STYLE = 'background-color: #ffefc2'  # amber for invalid
+
+def sort_order(dataset, column):
+    # Row positions sorted by `column`, computed once per column and dataset
+    orders = dataset['sort_orders']
+    if column not in orders:
+        values = dataset['df'][column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Sort the categories, then the rows by their category's rank
+            rank = np.argsort(np.argsort(values.cat.categories.to_numpy(dtype=str), kind='stable'))
+            codes = values.cat.codes.to_numpy()
+            keys = np.where(codes < 0, -1, rank[codes])
+        else:
+            keys = values.to_numpy()
+        orders[column] = np.argsort(keys, kind='stable')
+    return orders[column]
+
+def page_positions(dataset, filter_option, sort_by=None, descending=False, page=1, page_size=50):
+    positions = dataset['partitions'][filter_option]
+    if sort_by:
+        order = sort_order(dataset, sort_by)
+        if descending:
+            order = order[::-1]
+        if filter_option != "All":
+            keep = np.zeros(len(dataset['df']), dtype=bool)
+            keep[positions] = True
+            order = order[keep[order]]
+        positions = order
+    start = (page - 1) * page_size
+    return positions[start:start + page_size]
+
+def page_table(dataset, positions):
+    # Only the rows of one page are copied and styled
+    fields = dataset['fields']
+    table = dataset['df'].iloc[positions][["Message ID", *fields]].set_index("Message ID")
+    missing = dataset['missing_bits'][positions]
+    invalid = dataset['invalid_bits'][positions]
+    styles = np.full(table.shape, '', dtype=object)
+    for bit in range(len(fields)):
+        styles[(missing >> bit) & 1 == 1, bit] = MISSING_STYLE
+        styles[(invalid >> bit) & 1 == 1, bit] = INVALID_STYLE
+    return table.style.apply(lambda _: pd.DataFrame(styles, index=table.index, columns=table.columns), axis=None)
+
+def find_message(dataset, message_id):
+    # Row position of a Message ID (its first occurrence), or None
+    try:
+        location = dataset['message_index'].get_loc(message_id)
+    except KeyError:
+        return None
+    if isinstance(location, slice):
+        return location.start
+    if isinstance(location, np.ndarray):
+        return int(np.flatnonzero(location)[0])
+    return location
+
+def message_fields(dataset, position):
+    # (field, value, status) for the selected-message panel, from the masks
+    row = dataset['df'].iloc[position]
+    missing = int(dataset['missing_bits'][position])
+    invalid = int(dataset['invalid_bits'][position])
+    return [
+        (field, row[field], "missing" if missing >> bit & 1 else "invalid" if invalid >> bit & 1 else "valid")
+        for bit, field in enumerate(dataset['fields'])
+    ]
+
+def load_dataset(data, cache=None, chunk_size=10_000):
+    # Uploaded file bytes -> prepared dataset, keyed by content hash
+    key = content_hash(data)
+    if cache is not None:
+        dataset = cache.get(key)
+        if dataset is not None:
+            return dataset
+    dataset = prepare_dataset(load_payments(io.BytesIO(data), chunk_size), key)
+    if cache is not None:
+        cache.put(key, dataset, size=int(dataset['df'].memory_usage(deep=True).sum()))
+    return dataset
+
+# ---- File Ingestion ----
+# iterparse hands over one CdtTrfTxInf at a time and it is dropped as soon as
+# its fields are read. pain.001 keeps the debtor on the enclosing PmtInf,
+# which stays attached until its last transaction has been read.
+
+INGEST_FIELDS = ["Debtor Name", "Debtor LEI", "Debtor BIC", "Debtor IBAN", "Purpose Code", "Remittance Info", "Postal Address"]
+INGEST_COLUMNS = ["Message ID", *INGEST_FIELDS]
+
+def _findtext(elem, *paths):
+    if elem is None:
+        return ""
+    for path in paths:
+        text = (elem.findtext(qualify(elem, path)) or "").strip()
+        if text:
+            return text
+    return ""
+
+def _postal_address(party):
+    pstl_adr = party.find(qualify(party, 'PstlAdr')) if party is not None else None
+    if pstl_adr is None:
+        return ""
+    parts = [(local_name(child.tag), (child.text or "").strip()) for child in pstl_adr.iterchildren(tag=etree.Element)]
+    has_lines = any(tag == 'AdrLine' for tag, _ in parts)
+    has_fields = any(tag != 'AdrLine' for tag, _ in parts)
+    if has_lines and has_fields:
+        label = "Hybrid Address"
+    elif has_lines:
+        label = "Unstructured Address"
+    else:
+        label = "Fully Structured Address"
+    return f"{label}: " + " ".join(f"<{tag}>{text}</{tag}>" for tag, text in parts)
+
+def _chunk_frame(columns):
+    df = pd.DataFrame(columns, columns=INGEST_COLUMNS)
+    for field in INGEST_FIELDS:
+        df[field] = df[field].astype("category")
+    df["Quality Score"] = quality_score(df)
+    return df
+
+def iter_payment_chunks(source, chunk_size=10_000):
+    """Yields Data Quality frames of up to `chunk_size` payments from a pain.001 or pacs.008 file.
+
+    `source` is a path or binary file object. Field columns (the six quality
+    fields plus Debtor IBAN) are categorical; Message ID is the EndToEndId
+    (or InstrId) of each transaction.
+    """
+    columns = {column: [] for column in INGEST_COLUMNS}
+    context = etree.iterparse(source, events=('end',), tag=('{*}CdtTrfTxInf', '{*}PmtInf'), remove_comments=True, huge_tree=True)
+    count = 0
+    for _, tx in context:
+        parent = tx.getparent()
+        if local_name(tx.tag) == 'PmtInf':
+            tx.clear()
+            parent.remove(tx)
+            continue
+
+        count += 1
+        # pacs.008 carries the debtor per transaction, pain.001 per PmtInf
+        holder = tx if tx.find(qualify(tx, 'Dbtr')) is not None else parent
+        dbtr = holder.find(qualify(holder, 'Dbtr'))
+        columns["Message ID"].append(_findtext(tx, 'PmtId/EndToEndId', 'PmtId/InstrId') or f"MSG{count:04d}")
+        columns["Debtor Name"].append(_findtext(dbtr, 'Nm'))
+        columns["Debtor LEI"].append(_findtext(dbtr, 'Id/OrgId/LEI'))
+        columns["Debtor BIC"].append(_findtext(holder, 'DbtrAgt/FinInstnId/BICFI', 'DbtrAgt/FinInstnId/BIC', 'Dbtr/Id/OrgId/AnyBIC'))
+        columns["Debtor IBAN"].append(_findtext(holder, 'DbtrAcct/Id/IBAN'))
+        columns["Purpose Code"].append(_findtext(tx, 'Purp/Cd', 'Purp/Prtry'))
+        columns["Remittance Info"].append(_findtext(tx, 'RmtInf/Ustrd', 'RmtInf/Strd/CdtrRefInf/Ref'))
+        columns["Postal Address"].append(_postal_address(dbtr))
+
+        tx.clear()
+        parent.remove(tx)
+        if count % chunk_size == 0:
+            yield _chunk_frame(columns)
+            columns = {column: [] for column in INGEST_COLUMNS}
+
+    if columns["Message ID"]:
+        yield _chunk_frame(columns)
+
+def load_payments(source, chunk_size=10_000):
+    # Chunks are joined column by column so the categoricals stay categorical
+    chunks = list(iter_payment_chunks(source, chunk_size))
+    if not chunks:
+        return _chunk_frame({column: [] for column in INGEST_COLUMNS})
+    if len(chunks) == 1:
+        return chunks[0]
+    df = pd.DataFrame({
+        "Message ID": pd.concat([chunk["Message ID"] for chunk in chunks], ignore_index=True),
+        **{field: union_categoricals([chunk[field] for chunk in chunks]) for field in INGEST_FIELDS},
+    })
+    df["Quality Score"] = pd.concat([chunk["Quality Score"] for chunk in chunks], ignore_index=True)
+    return df
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from paymentlabs.sanctions import screen_column
+from paymentlabs.velocity import velocity_features
+
+# ---- Rule Configuration ----
+
+FRAUD_CONFIG = {
+    'high_risk_countries': ("IR", "RU", "CN"),
+    'unusual_purposes': ("CASH",),
+    'sanctioned_creditor_terms': ("Iran",),
+    'high_value_threshold': 250000,
+    # Opened sanctions index (paymentlabs.sanctions.open_index); name
+    # screening is skipped without one
+    'sanctions_index': None,
+    'sanctions_threshold': 0.85,
+    # Velocity limits over the sliding windows of paymentlabs.velocity
+    'burst_count_1h': 3,
+    'structuring_count_24h': 4,
+    'fan_out_creditors_24h': 4,
+    'corridor_sum_1h': 1000000,
+    # VelocityTracker instances to carry window state across batches
+    'debtor_tracker': None,
+    'corridor_tracker': None,
+}
+
+def _screen_parties(df, config):
+    index = config['sanctions_index']
+    if index is None:
+        return np.zeros(len(df), dtype=bool)
+    threshold = config['sanctions_threshold']
+    return screen_column(index, df["Debtor"], threshold) | screen_column(index, df["Creditor"], threshold)
+
+def _contains_any(column, terms):
+    # Substring test per distinct value, broadcast back through the codes
+    codes, uniques = pd.factorize(column)
+    hits = np.array([any(term in str(value) for term in terms) for value in uniques] + [False], dtype=bool)
+    return hits[codes]
+
+# ---- Rules ----
+# Each rule's detect(df, config) returns a boolean mask over all rows at
+# once; a rule's position in FRAUD_RULES is its bit in the reason bitmask.
+# Rules marked 'velocity' read the sliding-window columns of
+# paymentlabs.velocity. New rules go at the end so stored bitmasks keep
+# their meaning.
+
+FRAUD_RULES = (
+    {
+        'id': 'FATF_COUNTRY',
+        'reason': "Country is on FATF grey/black list",
+        'source': "FATF",
+        'detect': lambda df, config: df["Country"].isin(config['high_risk_countries']).to_numpy(),
+    },
+    {
+        'id': 'UNUSUAL_PURPOSE',
+        'reason': "Unusual purpose code (CASH) for cross-border payment",
+        'source': "Swift Guidelines",
+        'detect': lambda df, config: df["Purpose Code"].isin(config['unusual_purposes']).to_numpy(),
+    },
+    {
+        'id': 'MISSING_LEI',
+        'reason': "Missing LEI for corporate sender",
+        'source': "Swift Data Quality",
+        'detect': lambda df, config: df["LEI"].fillna("").eq("").to_numpy(),
+    },
+    {
+        'id': 'SANCTIONED_CREDITOR',
+        'reason': "Creditor flagged in OpenSanctions",
+        'source': "OpenSanctions",
+        'detect': lambda df, config: df["Sanction Match"].to_numpy(dtype=bool) & _contains_any(df["Creditor"], config['sanctioned_creditor_terms']),
+    },
+    {
+        'id': 'HIGH_VALUE',
+        'reason': "High-value transaction requiring additional scrutiny",
+        'source': "FATF",
+        'detect': lambda df, config: df["Amount"].to_numpy() > config['high_value_threshold'],
+    },
+    {
+        'id': 'SANCTIONS_NAME_MATCH',
+        'reason': "Debtor or creditor name matches a sanctions list entry",
+        'source': "OpenSanctions",
+        'detect': _screen_parties,
+    },
+    {
+        'id': 'VELOCITY_BURST',
+        'reason': "Burst of payments from the same debtor within an hour",
+        'source': "FATF",
+        'velocity': True,
+        'detect': lambda df, config: df["Debtor Count 1h"].to_numpy() >= config['burst_count_1h'],
+    },
+    {
+        'id': 'STRUCTURING',
+        'reason': "Repeated sub-threshold payments adding up past the high-value threshold within 24h",
+        'source': "FATF",
+        'velocity': True,
+        'detect': lambda df, config: (
+            (df["Amount"].to_numpy() <= config['high_value_threshold'])
+            & (df["Debtor Sum 24h"].to_numpy() > config['high_value_threshold'])
+            & (df["Debtor Count 24h"].to_numpy() >= config['structuring_count_24h'])
+        ),
+    },
+    {
+        'id': 'FAN_OUT',
+        'reason': "Debtor paying many distinct creditors within 24h",
+        'source': "FATF",
+        'velocity': True,
+        'detect': lambda df, config: df["Debtor Creditors 24h"].to_numpy() >= config['fan_out_creditors_24h'],
+    },
+    {
+        'id': 'CORRIDOR_SURGE',
+        'reason': "Corridor volume within an hour above limit",
+        'source': "FATF",
+        'velocity': True,
+        'detect': lambda df, config: df["Corridor Sum 1h"].to_numpy() > config['corridor_sum_1h'],
+    },
+)
+
+RULE_BITS = {rule['id']: 1 << bit for bit, rule in enumerate(FRAUD_RULES)}
+
+# ---- Scoring ----
+
+def score_transactions(df, config=None, enabled=None):
+    """Reason bitmask per transaction; bit i is set when FRAUD_RULES[i] fires.
+
+    `config` overrides FRAUD_CONFIG thresholds and lists, `enabled` limits
+    scoring to a set of rule ids. Velocity features are computed here unless
+    `df` already carries them.
+    """
+    config = {**FRAUD_CONFIG, **(config or {})}
+    rules = [rule for rule in FRAUD_RULES if enabled is None or rule['id'] in enabled]
+    if any(rule.get('velocity') for rule in rules) and "Debtor Count 1h" not in df:
+        df = pd.concat([df, velocity_features(df, config['debtor_tracker'], config['corridor_tracker'])], axis=1)
+    flags = np.zeros(len(df), dtype=np.uint32)
+    for rule in rules:
+        flags |= rule['detect'](df, config).astype(np.uint32) * np.uint32(RULE_BITS[rule['id']])
+    return flags
+
+def flag_count(flags):
+    # Number of rules fired per transaction
+    return np.unpackbits(flags.astype('<u4').view(np.uint8).reshape(-1, 4), axis=1).sum(axis=1)
+
+# ---- Forensic Summary Builder ----
+# Strings are only built for the transactions actually shown.
+
+def get_summary(flags):
+    fired = [rule for rule in FRAUD_RULES if int(flags) & RULE_BITS[rule['id']]]
+    if not fired:
+        return "✅ No fraud indicators detected", []
+    reasons = ", ".join(rule['reason'] for rule in fired)
+    return f"❌ Flagged for: {reasons}", list(dict.fromkeys(rule['source'] for rule in fired))
+
+def risk_summaries(flags, positions):
+    return [get_summary(flags[position]) for position in positions]
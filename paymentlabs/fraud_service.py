@@ -0,0 +1,397 @@
+"""Streaming fraud scoring: transactions in, scored JSONL out.
+
+    python -m paymentlabs.fraud_service --tail incoming.jsonl -o scores.jsonl
+    python -m paymentlabs.fraud_service --listen 127.0.0.1:9009 -o scores.jsonl
+    python -m paymentlabs.fraud_service --demo 100000 -o scores.jsonl
+
+Input lines are JSON objects with the Fraud Investigator columns
+(Transaction ID, Timestamp, Amount, Debtor, ...). Transactions are scored in
+micro-batches; the input queue is bounded, so a slow scorer pauses file
+reads and socket reads instead of buffering without limit. Velocity windows
+carry over from batch to batch. Lines that are not JSON, or that lack a
+usable Timestamp, Amount, Debtor or Creditor, are written to a rejects file
+and the stream carries on.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from paymentlabs.fraud import FRAUD_CONFIG, score_transactions
+from paymentlabs.sanctions import open_index
+from paymentlabs.velocity import VelocityTracker, velocity_features
+from paymentlabs.workload import fraud_frame
+
+DEFAULT_SCORES_FILE = os.environ.get(
+    "PAYMENTLABS_FRAUD_SCORES",
+    os.path.join(os.path.dirname(__file__), "data", "fraud_scores.jsonl")
+)
+# Latency percentiles are taken over this many most recent transactions
+LATENCY_SAMPLES = 10_000
+# Velocity keys idle for longer than the widest window are dropped this often
+PRUNE_EVERY_BATCHES = 100
+# The demo source corrupts one transaction in this many, alternately as
+# broken JSON and as a record without Amount
+DEMO_REJECT_EVERY = 1_000
+
+REQUIRED_FIELDS = ("Timestamp", "Amount", "Debtor", "Creditor")
+OPTIONAL_FIELDS = {
+    "Currency": "USD", "Country": "", "Debtor Country": "", "Purpose Code": "", "LEI": "", "Sanction Match": False,
+}
+# Used as velocity keys or matched as text, so they must be scalars
+KEY_FIELDS = ("Debtor", "Creditor", "Country", "Debtor Country", "Currency", "Purpose Code", "LEI")
+
+# ---- Validation ----
+
+def check_transaction(tx):
+    """(transaction, None) when `tx` can be scored, else (None, reason).
+
+    Timestamps are normalized to naive UTC ISO strings, amounts to floats
+    and numeric key fields to strings; optional fields missing from the
+    record get their defaults.
+    """
+    if not isinstance(tx, dict):
+        return None, "not a JSON object"
+    missing = [field for field in REQUIRED_FIELDS if tx.get(field) in (None, "")]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    keys = {}
+    for field in KEY_FIELDS:
+        value = tx.get(field)
+        if value is None or isinstance(value, str):
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None, f"invalid {field}: {value!r}"
+        keys[field] = str(value)
+    try:
+        timestamp = pd.Timestamp(tx["Timestamp"])
+    except (ValueError, TypeError) as exc:
+        return None, f"invalid Timestamp: {exc}"
+    if timestamp is pd.NaT:
+        return None, "invalid Timestamp"
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    try:
+        amount = float(tx["Amount"])
+    except (ValueError, TypeError):
+        return None, f"invalid Amount: {tx['Amount']!r}"
+    if not math.isfinite(amount):
+        return None, f"invalid Amount: {tx['Amount']!r}"
+    tx = {**tx, **keys, 'Timestamp': timestamp.isoformat(), 'Amount': amount}
+    for field, default in OPTIONAL_FIELDS.items():
+        tx.setdefault(field, default)
+    return tx, None
+
+def parse_transaction(line):
+    # (transaction, reason) for one input line; blank lines give (None, None)
+    line = line.strip()
+    if not line:
+        return None, None
+    try:
+        tx = json.loads(line)
+    except ValueError as exc:
+        return None, f"invalid JSON: {exc}"
+    return check_transaction(tx)
+
+async def _offer(record, queue, reject, parsed=False):
+    # Queues a valid transaction; anything else goes to `reject`
+    if not parsed:
+        record = record.strip()
+    tx, error = check_transaction(record) if parsed else parse_transaction(record)
+    if error is not None:
+        reject(record, error)
+    elif tx is not None:
+        await queue.put((tx, time.perf_counter()))
+
+def _log_reject(record, error):
+    print(f"Rejected transaction ({error}): {str(record)[:200]}", file=sys.stderr)
+
+# ---- Sources ----
+# Each feeds (transaction, arrival time) pairs into the bounded queue and
+# waits on put() while it is full. Records that fail check_transaction go
+# to `reject(record, reason)` instead.
+
+async def feed_queue(source, queue, reject=_log_reject):
+    # Relays transaction dicts from an in-process asyncio.Queue until a None sentinel
+    while (tx := await source.get()) is not None:
+        await _offer(tx, queue, reject, parsed=True)
+
+async def feed_file(path, queue, follow=False, poll=0.2, reject=_log_reject):
+    # Reads a JSONL file; with follow, keeps waiting for appended lines
+    with open(path, encoding="utf-8", errors="replace") as source:
+        partial = ""
+        while True:
+            line = source.readline()
+            if not line:
+                if not follow:
+                    break
+                await asyncio.sleep(poll)
+                continue
+            if not line.endswith("\n") and follow:
+                # A writer is mid-line; pick up the rest on the next read
+                partial += line
+                continue
+            await _offer(partial + line, queue, reject)
+            partial = ""
+
+async def feed_socket(host, port, queue, started=None, reject=_log_reject):
+    # JSONL over TCP, any number of connections; runs until cancelled
+    async def handle(reader, writer):
+        try:
+            while line := await reader.readline():
+                await _offer(line.decode("utf-8", errors="replace"), queue, reject)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    if started is not None:
+        started.set_result(server.sockets[0].getsockname())
+    async with server:
+        await server.serve_forever()
+
+async def feed_demo(num_transactions, queue, seed=None, reject=_log_reject):
+    df = fraud_frame(num_transactions, seed)
+    df["Timestamp"] = df["Timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    for position, tx in enumerate(df.to_dict("records"), 1):
+        line = json.dumps(tx)
+        if position % DEMO_REJECT_EVERY == 0:
+            # Exercise the reject path the way a real feed would
+            if position // DEMO_REJECT_EVERY % 2:
+                line = line[:len(line) // 2]
+            else:
+                line = json.dumps({key: value for key, value in tx.items() if key != "Amount"})
+        await _offer(line, queue, reject)
+
+# ---- Scoring ----
+
+def new_state(config=None):
+    # Everything that persists between micro-batches
+    return {
+        'config': {**FRAUD_CONFIG, **(config or {})},
+        'debtors': VelocityTracker(distinct=True),
+        'corridors': VelocityTracker(),
+        'batches': 0,
+        'latest': 0,
+    }
+
+def score_batch(transactions, state):
+    # Transactions as returned by check_transaction
+    df = pd.DataFrame(transactions)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    scored = df.join(velocity_features(df, state['debtors'], state['corridors']))
+    scored["Flags"] = score_transactions(scored, state['config'])
+
+    # Keys with no events inside the widest window no longer affect any
+    # feature; without pruning the trackers grow with every new debtor
+    state['batches'] += 1
+    state['latest'] = max(state['latest'], int(df["Timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64).max()))
+    if state['batches'] % PRUNE_EVERY_BATCHES == 0:
+        state['debtors'].prune(state['latest'])
+        state['corridors'].prune(state['latest'])
+
+    scored["Timestamp"] = scored["Timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return scored
+
+def new_stats(queue):
+    return {
+        'queue': queue,
+        'started': time.perf_counter(),
+        'scored': 0,
+        'flagged': 0,
+        'rejected': 0,
+        'batches': 0,
+        'latencies': deque(maxlen=LATENCY_SAMPLES),
+    }
+
+def latency_percentiles(samples):
+    if not samples:
+        return {'p50_ms': None, 'p99_ms': None}
+    p50, p99 = np.percentile(np.fromiter(samples, dtype=float), [50, 99]) * 1e3
+    return {'p50_ms': round(float(p50), 3), 'p99_ms': round(float(p99), 3)}
+
+def service_stats(stats):
+    elapsed = time.perf_counter() - stats['started']
+    return {
+        'scored': stats['scored'],
+        'flagged': stats['flagged'],
+        'rejected': stats['rejected'],
+        'batches': stats['batches'],
+        'queue_depth': stats['queue'].qsize(),
+        'per_second': round(stats['scored'] / elapsed, 1) if elapsed else None,
+        **latency_percentiles(stats['latencies']),
+    }
+
+async def score_stream(queue, out, state, batch_size=256, max_wait=0.02, stats=None, reject=_log_reject):
+    """Scores queued transactions until a None sentinel arrives.
+
+    A batch closes at `batch_size` transactions or `max_wait` seconds after
+    its first one. Latency runs from arrival in the queue to the scored line
+    being written. A batch that fails to score goes to `reject`, one record
+    at a time, and the stream carries on.
+    """
+    stats = stats if stats is not None else new_stats(queue)
+    loop = asyncio.get_running_loop()
+    done = False
+    while not done:
+        item = await queue.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = loop.time() + max_wait
+        while len(batch) < batch_size:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                done = True
+                break
+            batch.append(item)
+
+        # Scoring runs off the event loop so sources keep accepting input
+        try:
+            scored = await asyncio.to_thread(score_batch, [tx for tx, _ in batch], state)
+        except Exception as exc:
+            for tx, _ in batch:
+                reject(tx, f"scoring failed: {exc!r}")
+            continue
+        out.write("".join(json.dumps(record) + "\n" for record in scored.to_dict("records")))
+        out.flush()
+        finished = time.perf_counter()
+        stats['latencies'].extend(finished - arrived for _, arrived in batch)
+        stats['scored'] += len(batch)
+        stats['flagged'] += int(np.count_nonzero(scored["Flags"].to_numpy()))
+        stats['batches'] += 1
+    return stats
+
+async def run_service(feeder, out, config=None, batch_size=256, max_wait=0.02, queue_size=10_000, stats_path=None, report_every=5.0, rejects=None):
+    """Runs `feeder(queue, reject)` against the scorer until the feeder finishes.
+
+    Rejected records are appended to the `rejects` file object as
+    {"error", "record"} lines, or logged to stderr without one. Stats
+    (throughput, rejects, queue depth, p50/p99 latency) are written to
+    `stats_path` every `report_every` seconds and on exit.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    state = new_state(config)
+    stats = new_stats(queue)
+
+    def reject(record, error):
+        stats['rejected'] += 1
+        if rejects is None:
+            _log_reject(record, error)
+        else:
+            rejects.write(json.dumps({'error': error, 'record': record}, default=str) + "\n")
+            rejects.flush()
+
+    def report():
+        snapshot = service_stats(stats)
+        if stats_path:
+            with open(stats_path, "w", encoding="utf-8") as target:
+                json.dump(snapshot, target)
+        return snapshot
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(report_every)
+            report()
+
+    async def feed():
+        try:
+            await feeder(queue, reject)
+        finally:
+            await queue.put(None)
+
+    reporting = asyncio.create_task(reporter())
+    feeding = asyncio.create_task(feed())
+    try:
+        await score_stream(queue, out, state, batch_size, max_wait, stats, reject)
+        await feeding
+    finally:
+        feeding.cancel()
+        reporting.cancel()
+    return report()
+
+# ---- Reading Scores ----
+
+def read_scores(path=DEFAULT_SCORES_FILE, limit=500):
+    # Last `limit` scored transactions, read backwards from the end of the file
+    with open(path, "rb") as source:
+        source.seek(0, os.SEEK_END)
+        position = source.tell()
+        data = b""
+        while position and data.count(b"\n") <= limit:
+            step = min(position, 1 << 16)
+            position -= step
+            source.seek(position)
+            data = source.read(step) + data
+    lines = [line for line in data.split(b"\n") if line.strip()]
+    if position:
+        # The first line may have been cut by the block boundary
+        lines = lines[1:]
+    return pd.DataFrame([json.loads(line) for line in lines[-limit:]])
+
+def read_stats(path):
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m paymentlabs.fraud_service", description="Score a stream of transactions with the fraud rules.")
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument("--tail", help="JSONL file to read, following appended lines")
+    inputs.add_argument("--file", help="JSONL file to read once")
+    inputs.add_argument("--listen", help="host:port to accept JSONL over TCP")
+    inputs.add_argument("--demo", type=int, help="Score this many synthetic transactions")
+    parser.add_argument("-o", "--output", default=DEFAULT_SCORES_FILE, help="Scored JSONL (appended)")
+    parser.add_argument("--stats", help="Stats JSON (default: <output>.stats.json)")
+    parser.add_argument("--rejects", help="Unscorable input lines as JSONL (default: <output>.rejects.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=20, help="Longest a transaction waits for its batch to fill")
+    parser.add_argument("--queue-size", type=int, default=10_000, help="Queued transactions before sources are paused")
+    parser.add_argument("--sanctions-index", help="Sanctions index directory for name screening")
+    args = parser.parse_args(argv)
+
+    if args.tail or args.file:
+        feeder = lambda queue, reject: feed_file(args.tail or args.file, queue, follow=bool(args.tail), reject=reject)
+    elif args.listen:
+        host, port = args.listen.rsplit(":", 1)
+        feeder = lambda queue, reject: feed_socket(host, int(port), queue, reject=reject)
+    else:
+        feeder = lambda queue, reject: feed_demo(args.demo, queue, reject=reject)
+    config = {'sanctions_index': open_index(args.sanctions_index)} if args.sanctions_index else None
+    stats_path = args.stats or f"{args.output}.stats.json"
+    rejects_path = args.rejects or f"{args.output}.rejects.jsonl"
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as out, open(rejects_path, "a", encoding="utf-8") as rejects:
+        try:
+            stats = asyncio.run(run_service(
+                feeder, out, config, args.batch_size, args.max_wait_ms / 1e3, args.queue_size, stats_path, rejects=rejects
+            ))
+        except KeyboardInterrupt:
+            return 130
+    print(
+        f"{stats['scored']:,} transactions ({stats['flagged']:,} flagged, {stats['rejected']:,} rejected to {rejects_path}) "
+        f"in {stats['batches']:,} batches — "
+        f"{stats['per_second'] or 0:,.0f}/s, p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms",
+        file=sys.stderr
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,482 @@
+"""Country-aware address structuring backed by a postcode and town gazetteer.
+
+    python -m paymentlabs.gazetteer build allCountries.txt -o gazetteer_index/
+    python -m paymentlabs.gazetteer structure addresses.csv -o structured.jsonl --workers 8
+
+The index is a directory of sorted fixed-width key arrays opened with mmap,
+so opening it reads one small meta file and a lookup is a binary search.
+Without a built index the bundled sample gazetteer is indexed in memory.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+from paymentlabs.address_validation import ADRLINE_PATTERN
+from paymentlabs.string_table import pack_strings, read_strings, string_at, write_strings
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.environ.get(
+    "PAYMENTLABS_GAZETTEER_INDEX",
+    os.path.join(os.path.dirname(__file__), "data", "gazetteer_index")
+)
+SAMPLE_GAZETTEER = os.path.join(os.path.dirname(__file__), "data", "gazetteer_sample.csv")
+MEMO_LIMIT = 100_000
+
+# ---- Countries ----
+
+COUNTRY_NAMES = {
+    "australia": "AU", "canada": "CA", "china": "CN", "france": "FR", "germany": "DE", "deutschland": "DE",
+    "hong kong": "HK", "india": "IN", "japan": "JP", "malaysia": "MY", "netherlands": "NL",
+    "the netherlands": "NL", "singapore": "SG", "switzerland": "CH", "schweiz": "CH", "suisse": "CH",
+    "united arab emirates": "AE", "uae": "AE", "united kingdom": "GB", "uk": "GB", "great britain": "GB",
+    "england": "GB", "scotland": "GB", "wales": "GB", "united states": "US", "united states of america": "US",
+    "usa": "US",
+}
+COUNTRY_CODES = frozenset(COUNTRY_NAMES.values())
+
+# Matched against the normalized postcode (upper case, spaces removed)
+POSTCODE_FORMATS = {
+    'AU': re.compile(r"\d{4}"),
+    'CA': re.compile(r"[A-Z]\d[A-Z]\d[A-Z]\d"),
+    'CH': re.compile(r"\d{4}"),
+    'DE': re.compile(r"\d{5}"),
+    'FR': re.compile(r"\d{5}"),
+    'GB': re.compile(r"[A-Z]{1,2}\d[A-Z\d]?\d[A-Z]{2}"),
+    'IN': re.compile(r"\d{6}"),
+    'JP': re.compile(r"\d{3}-?\d{4}"),
+    'MY': re.compile(r"\d{5}"),
+    'NL': re.compile(r"\d{4}[A-Z]{2}"),
+    'SG': re.compile(r"\d{6}"),
+    'US': re.compile(r"\d{5}(?:-\d{4})?"),
+}
+# Any token with a digit, for countries without a known format
+GENERIC_POSTCODE = re.compile(r"(?=.*\d)[A-Z0-9-]{3,10}")
+
+# ---- Normalization ----
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize_place(text):
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+def normalize_postcode(text):
+    return re.sub(r"\s+", "", text).upper()
+
+# ---- Loading Gazetteers ----
+
+def load_places(path):
+    """(country, postcode, town) rows from a GeoNames postal code dump (.txt,
+    tab-separated) or a CSV with country, postcode and town columns."""
+    with open(path, newline="", encoding="utf-8") as source:
+        if path.lower().endswith(".txt"):
+            for row in csv.reader(source, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if len(row) > 2:
+                    yield row[0], row[1], row[2]
+            return
+        for row in csv.DictReader(line for line in source if not line.startswith("#")):
+            yield row["country"], row.get("postcode") or "", row["town"]
+
+# ---- Index ----
+# Keys are "<normalized name>\x01<country>", sorted, so every country that
+# has a town (or postcode) of that name is one contiguous range.
+
+SEPARATOR = b"\x01"
+
+def _key(name, country):
+    return name.encode("utf-8") + SEPARATOR + country.encode("ascii")
+
+def _sorted_keys(mapping):
+    keys = np.array(list(mapping), dtype=bytes)
+    values = np.fromiter(mapping.values(), dtype=np.uint32, count=len(mapping))
+    order = np.argsort(keys, kind="stable")
+    return keys[order], values[order]
+
+def build_index(places, index_dir=None):
+    towns, town_keys, postcode_keys = {}, {}, {}
+    for country, postcode, town in places:
+        country, postcode, town = country.strip().upper(), postcode.strip(), town.strip()
+        if not country or not town:
+            continue
+        town_id = towns.setdefault((country, town), len(towns))
+        town_keys.setdefault(_key(normalize_place(town), country), town_id)
+        if postcode:
+            postcode_keys.setdefault(_key(normalize_postcode(postcode), country), town_id)
+
+    arrays = {}
+    arrays['town_keys'], arrays['town_ids'] = _sorted_keys(town_keys)
+    arrays['postcode_keys'], arrays['postcode_towns'] = _sorted_keys(postcode_keys)
+    names = [town for _, town in towns]
+    meta = {
+        'version': INDEX_VERSION,
+        'towns': len(towns),
+        'postcodes': len(postcode_keys),
+        'town_words': max((len(normalize_place(town).split()) for town in names), default=1),
+    }
+    if index_dir is None:
+        return {'meta': meta, **arrays, 'town_names': pack_strings(names), 'memo': {}}
+
+    os.makedirs(index_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(index_dir, f"{name}.npy"), array)
+    write_strings(index_dir, "town_names", names)
+    with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as out:
+        json.dump(meta, out)
+    return open_index(index_dir)
+
+def open_index(index_dir=DEFAULT_INDEX_DIR):
+    with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as source:
+        meta = json.load(source)
+    if meta['version'] != INDEX_VERSION:
+        raise ValueError(f"Gazetteer index version {meta['version']} in {index_dir}; rebuild it with this release")
+    index = {'meta': meta, 'town_names': read_strings(index_dir, "town_names"), 'memo': {}}
+    for name in ("town_keys", "town_ids", "postcode_keys", "postcode_towns"):
+        index[name] = np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+    return index
+
+@lru_cache(maxsize=None)
+def default_gazetteer(index_dir=DEFAULT_INDEX_DIR):
+    # The persisted index once built, otherwise the bundled sample
+    if os.path.exists(os.path.join(index_dir, "meta.json")):
+        return open_index(index_dir)
+    return build_index(load_places(SAMPLE_GAZETTEER))
+
+def _lookup(keys, values, name):
+    # [(country, town_id)] for every key of `name`
+    if not name:
+        return []
+    prefix = name.encode("utf-8")
+    if len(prefix) + 1 > keys.dtype.itemsize:
+        return []
+    # Bounds cast to the key width; a wider operand would make numpy cast
+    # the whole mapped array instead
+    start = np.searchsorted(keys, np.array(prefix + SEPARATOR, dtype=keys.dtype))
+    stop = np.searchsorted(keys, np.array(prefix + b"\x02", dtype=keys.dtype))
+    return [(bytes(keys[position]).split(SEPARATOR, 1)[1].decode("ascii"), int(values[position])) for position in range(start, stop)]
+
+def _memoized(gazetteer, kind, text):
+    # Town names and postcodes repeat heavily across payments, so lookups
+    # are memoized per process (bounded by MEMO_LIMIT)
+    memo = gazetteer['memo']
+    key = (kind, text)
+    if key not in memo:
+        if len(memo) >= MEMO_LIMIT:
+            memo.clear()
+        if kind == 'town':
+            memo[key] = _lookup(gazetteer['town_keys'], gazetteer['town_ids'], normalize_place(text))
+        else:
+            memo[key] = _lookup(gazetteer['postcode_keys'], gazetteer['postcode_towns'], normalize_postcode(text))
+    return memo[key]
+
+def find_town(gazetteer, name):
+    return _memoized(gazetteer, 'town', name)
+
+def find_postcode(gazetteer, postcode):
+    return _memoized(gazetteer, 'postcode', postcode)
+
+def town_name(gazetteer, town_id):
+    return string_at(gazetteer['town_names'], town_id)
+
+# ---- Structuring ----
+
+# PstlAdr order from pacs.008.001.08
+ADDRESS_FIELDS = ('StrtNm', 'BldgNb', 'BldgNm', 'Flr', 'PstBx', 'Room', 'PstCd', 'TwnNm', 'DstrctNm', 'Ctry')
+_TOKEN = re.compile(r"[^\s,;]+")
+UNIT_PATTERN = re.compile(r"#(\w+)(?:-(\w+))?")
+UNIT_WORDS = {
+    'unit': 'Room', 'suite': 'Room', 'ste': 'Room', 'apt': 'Room', 'apartment': 'Room',
+    'flat': 'Room', 'room': 'Room', 'rm': 'Room', 'level': 'Flr', 'lvl': 'Flr', 'floor': 'Flr', 'fl': 'Flr',
+}
+UNIT_NUMBER = re.compile(r"\d+[A-Za-z]?|[A-Za-z]\d*")
+# "PO Box 123", "P.O. Box 123", "GPO Box 123", "POB 123", "Postfach 123"
+PO_BOX_PATTERN = re.compile(r"(?:(?:p\.?o\.?|gpo) box|p\.?o\.?b\.?|postfach) \d+", re.IGNORECASE)
+BUILDING_PATTERN = re.compile(r"\d+[A-Za-z]?(?:[-/]\d+[A-Za-z]?)?")
+
+def country_words(code):
+    # Words of the country names that structure_address turns into `code`
+    return {word for name, country in COUNTRY_NAMES.items() if country == code for word in name.split()}
+
+def _pick(candidates, *countries):
+    for country in countries:
+        for candidate in candidates:
+            if candidate[0] == country:
+                return candidate
+    return candidates[0] if candidates else None
+
+def _find_town_span(gazetteer, rows, used):
+    # Longest town name, scanning from the last line and its last word back;
+    # the first line is the street unless it is the only one
+    widths = range(min(gazetteer['meta']['town_words'], 4), 0, -1)
+    for line in range(len(rows) - 1, 0 if len(rows) > 1 else -1, -1):
+        tokens = rows[line]
+        for end in range(len(tokens), 0, -1):
+            for width in widths:
+                start = end - width
+                if start < 0 or any(used[line][start:end]):
+                    continue
+                candidates = find_town(gazetteer, " ".join(tokens[start:end]))
+                if candidates:
+                    return line, start, end, candidates
+    return None
+
+def _find_country(rows, used, line):
+    # Country name or ISO code among the last unused words of `line`
+    tokens = rows[line]
+    for width in (3, 2, 1):
+        start = len(tokens) - width
+        if start < 0 or any(used[line][start:]):
+            continue
+        text = " ".join(tokens[start:])
+        country = COUNTRY_NAMES.get(normalize_place(text))
+        if country is None and width == 1 and text in COUNTRY_CODES:
+            country = text
+        if country:
+            return start, country
+    return None
+
+def _find_postcode(gazetteer, rows, used, lines, countries):
+    # Adjacent word pairs first ("SW1A 1AA"), then single words
+    for line in lines:
+        tokens = rows[line]
+        for width in (2, 1):
+            for start in range(len(tokens) - width, -1, -1):
+                if any(used[line][start:start + width]):
+                    continue
+                text = " ".join(tokens[start:start + width])
+                postcode = normalize_postcode(text)
+                if not any(char.isdigit() for char in postcode):
+                    continue
+                candidates = find_postcode(gazetteer, postcode)
+                if candidates:
+                    return line, start, start + width, candidates
+                formats = [POSTCODE_FORMATS[country] for country in countries if country in POSTCODE_FORMATS]
+                if any(pattern.fullmatch(postcode) for pattern in formats) or (not formats and width == 1 and GENERIC_POSTCODE.fullmatch(postcode)):
+                    return line, start, start + width, []
+    return None
+
+def _find_units(rows, used, fields):
+    # "#05-12", "Unit 7" or "Level 3" on any line: floor and room, and "PO
+    # Box 123": post box, never part of a building or street name. Returns
+    # the positions taken.
+    units = set()
+    for line, tokens in enumerate(rows):
+        taken = used[line]
+        for position, token in enumerate(tokens):
+            if taken[position]:
+                continue
+            if token[0] == "#":
+                unit = UNIT_PATTERN.fullmatch(token)
+                if unit is None:
+                    continue
+                if unit.group(2):
+                    fields.setdefault('Flr', unit.group(1))
+                    fields.setdefault('Room', unit.group(2))
+                else:
+                    fields.setdefault('Room', unit.group(1))
+                taken[position] = True
+                units.add((line, position))
+            elif token[0] in "PpGg" and _take_po_box(tokens, taken, line, position, fields, units):
+                continue
+            elif token.lower() in UNIT_WORDS and position + 1 < len(tokens) and not taken[position + 1] and UNIT_NUMBER.fullmatch(tokens[position + 1]):
+                # The designator stays with the number so no word is dropped
+                fields.setdefault(UNIT_WORDS[token.lower()], f"{token} {tokens[position + 1]}")
+                taken[position] = taken[position + 1] = True
+                units.update(((line, position), (line, position + 1)))
+    return units
+
+def _take_po_box(tokens, taken, line, position, fields, units):
+    # The whole "PO Box 123" goes into PstBx so no word is dropped
+    for width in (3, 2):
+        end = position + width
+        if end <= len(tokens) and not any(taken[position:end]) and PO_BOX_PATTERN.fullmatch(" ".join(tokens[position:end])):
+            fields.setdefault('PstBx', " ".join(tokens[position:end]))
+            for slot in range(position, end):
+                taken[slot] = True
+                units.add((line, slot))
+            return True
+    return False
+
+def _mark(used, line, start, end):
+    for position in range(start, end):
+        used[line][position] = True
+
+def structure_address(lines, country=None, gazetteer=None, default_country=None):
+    """ISO 20022 PstlAdr fields for unstructured address lines.
+
+    Town and postcode are recognised against the gazetteer and Ctry comes
+    from `country` (an existing Ctry), a country named in the text, the
+    gazetteer, or `default_country`, in that order. Every input word lands in
+    some field, except a country name, which is replaced by its ISO code in
+    Ctry. Returns (fields, hits) where hits names what the gazetteer
+    confirmed.
+    """
+    gazetteer = gazetteer or default_gazetteer()
+    rows = [tokens for tokens in (_TOKEN.findall(line or "") for line in lines) if tokens]
+    if not rows:
+        return ({'Ctry': country or default_country} if country or default_country else {}), set()
+    used = [[False] * len(tokens) for tokens in rows]
+    fields, hits = {}, set()
+
+    town = _find_town_span(gazetteer, rows, used)
+    if town:
+        _mark(used, *town[:3])
+    place_line = town[0] if town else len(rows) - 1
+    stated = None
+    for line in dict.fromkeys((len(rows) - 1, place_line)):
+        found = _find_country(rows, used, line)
+        if found:
+            _mark(used, line, found[0], len(rows[line]))
+            stated = found[1]
+            break
+
+    postcode_lines = [place_line] + [line for line in range(len(rows) - 1, 0, -1) if line != place_line]
+    hinted = [code for code in (country, stated, *(candidate[0] for candidate in (town[3] if town else []))) if code]
+    postcode = _find_postcode(gazetteer, rows, used, postcode_lines, hinted)
+    if postcode is None and town:
+        # Next to a recognised town, a word with digits is the postcode even
+        # when it fits no known format
+        line, start, end, _ = town
+        for position in (start - 1, end):
+            if 0 <= position < len(rows[line]) and not used[line][position] and GENERIC_POSTCODE.fullmatch(normalize_postcode(rows[line][position])):
+                postcode = line, position, position + 1, []
+                break
+    if postcode:
+        _mark(used, *postcode[:3])
+        fields['PstCd'] = " ".join(rows[postcode[0]][postcode[1]:postcode[2]])
+
+    postcode_candidates = postcode[3] if postcode else []
+    postcode_countries = [candidate[0] for candidate in postcode_candidates]
+    town_match = _pick(town[3], country, stated, *postcode_countries) if town else None
+    if town:
+        fields['TwnNm'] = " ".join(rows[town[0]][town[1]:town[2]])
+        hits.add('town')
+    postcode_match = _pick(postcode_candidates, country, stated, town_match[0] if town_match else None)
+    if postcode_match:
+        hits.add('postcode')
+        if not town:
+            fields['TwnNm'] = town_name(gazetteer, postcode_match[1])
+            hits.add('town_from_postcode')
+    resolved = country or stated or (town_match or postcode_match or (None,))[0] or default_country
+    if resolved:
+        fields['Ctry'] = resolved
+
+    units = _find_units(rows, used, fields)
+
+    # Street line: the first with a building number among what is left
+    remaining = [line for line in range(len(rows)) if not all(used[line])]
+    numbered = [
+        line for line in remaining
+        if any(BUILDING_PATTERN.fullmatch(token) for token, taken in zip(rows[line], used[line]) if not taken)
+    ]
+    street_line = (numbered or remaining or [None])[0]
+    if street_line is not None:
+        words = [token for token, taken in zip(rows[street_line], used[street_line]) if not taken]
+        _mark(used, street_line, 0, len(rows[street_line]))
+        for position in (0, -1):
+            if len(words) > 1 and BUILDING_PATTERN.fullmatch(words[position]):
+                fields['BldgNb'] = words.pop(position)
+                break
+        if words:
+            fields['StrtNm'] = " ".join(words)
+
+    # Whole lines before the street, bar any unit, are building names; other
+    # leftovers are districts
+    building, district = [], []
+    for line, tokens in enumerate(rows):
+        left = [token for token, taken in zip(tokens, used[line]) if not taken]
+        if left:
+            whole = len(left) == len(tokens) or all(not taken or (line, position) in units for position, taken in enumerate(used[line]))
+            (building if street_line is not None and line < street_line and whole else district).append(" ".join(left))
+    if building:
+        fields['BldgNm'] = " ".join(building)
+    if district:
+        fields['DstrctNm'] = " ".join(district)
+    return {tag: fields[tag] for tag in ADDRESS_FIELDS if tag in fields}, hits
+
+def address_lines(value):
+    # AdrLine elements of a <PstlAdr> block, or plain newline-separated lines
+    lines = ADRLINE_PATTERN.findall(value or "")
+    return [line.strip() for line in lines] if lines else [line.strip() for line in (value or "").splitlines() if line.strip()]
+
+# ---- Bulk ----
+
+def _iter_records(path):
+    with open(path, newline="", encoding="utf-8") as source:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(source)
+        else:
+            yield from (json.loads(line) for line in source if line.strip())
+
+def structure_records(records, index_dir=DEFAULT_INDEX_DIR, default_country=None):
+    gazetteer = default_gazetteer(index_dir)
+    results = []
+    for record in records:
+        fields, hits = structure_address(address_lines(record.get("adrline")), record.get("country") or None, gazetteer, default_country)
+        results.append({'id': record.get("id"), 'fields': fields, 'hits': sorted(hits)})
+    return results
+
+def run_bulk(records, workers=None, index_dir=DEFAULT_INDEX_DIR, default_country=None, chunk_size=5_000):
+    # Yields results in input order; at most two chunks per worker are in
+    # flight, so input of any size is streamed rather than loaded
+    workers = workers or os.cpu_count()
+    records = iter(records)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        while chunk := list(islice(records, chunk_size)):
+            pending.append(pool.submit(structure_records, chunk, index_dir, default_country))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m paymentlabs.gazetteer", description="Build a gazetteer index or structure addresses in bulk.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index a GeoNames postal code dump or a country,postcode,town CSV")
+    build.add_argument("source")
+    build.add_argument("-o", "--index-dir", default=DEFAULT_INDEX_DIR)
+    structure = commands.add_parser("structure", help="Structure a CSV/JSONL of id, adrline[, country]")
+    structure.add_argument("input")
+    structure.add_argument("-o", "--output", help="JSONL results (default: stdout)")
+    structure.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    structure.add_argument("--default-country", help="Ctry when neither the record nor the gazetteer gives one")
+    structure.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == "build":
+        meta = build_index(load_places(args.source), args.index_dir)['meta']
+        print(f"Indexed {meta['towns']:,} towns / {meta['postcodes']:,} postcodes into {args.index_dir} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return 0
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    count = matched = 0
+    try:
+        for result in run_bulk(_iter_records(args.input), args.workers, args.index_dir, args.default_country):
+            count += 1
+            matched += bool(result['hits'])
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"{count:,} addresses ({matched:,} matched the gazetteer) in {elapsed:.2f}s — {count / elapsed:,.0f}/s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
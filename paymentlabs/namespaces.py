@@ -0,0 +1,50 @@
+from lxml import etree
+
+# ---- Namespaces ----
+
+ENVELOPE_NS = 'urn:swift:xsd:envelope'
+ENVELOPE_NSMAP = {
+    'env': ENVELOPE_NS,
+    'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
+}
+HEAD_NS = 'urn:iso:std:iso:20022:tech:xsd:head.001.001.02'
+PACS008_NS = 'urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08'
+
+# ---- Tag Helpers ----
+# Trees keep the namespaces they were parsed with; rules and lookups are
+# written against local names and qualified on the fly.
+
+def local_name(tag):
+    return tag.rpartition('}')[2]
+
+def namespace_of(tag):
+    return tag.rpartition('}')[0][1:]
+
+_QUALIFIED_PATHS = {}
+
+def qualify(elem, path):
+    # 'Id/OrgId/LEI' -> '{ns}Id/{ns}OrgId/{ns}LEI' in the namespace of `elem`
+    namespace = namespace_of(elem.tag)
+    key = (namespace, path)
+    qualified = _QUALIFIED_PATHS.get(key)
+    if qualified is None:
+        if namespace:
+            qualified = '/'.join(f"{{{namespace}}}{step}" for step in path.split('/'))
+        else:
+            qualified = path
+        _QUALIFIED_PATHS[key] = qualified
+    return qualified
+
+def adopt_namespace(elem, namespace):
+    # Re-homes an un-namespaced subtree under `namespace` as the default
+    # namespace. Only legacy input without xmlns declarations needs this.
+    if namespace_of(elem.tag):
+        return elem
+    adopted = etree.Element(f"{{{namespace}}}{elem.tag}", attrib=dict(elem.attrib), nsmap={None: namespace})
+    adopted.text = elem.text
+    for child in list(elem):
+        adopted.append(child)
+    for node in adopted.iterdescendants(tag=etree.Element):
+        if not namespace_of(node.tag):
+            node.tag = f"{{{namespace}}}{node.tag}"
+    return adopted
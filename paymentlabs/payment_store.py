@@ -0,0 +1,184 @@
+"""On-disk history of settled payments for Advanced Reporting.
+
+    python -m paymentlabs.payment_store generate 1000000 --days 365 -o payment_store/
+    python -m paymentlabs.payment_store import settled.csv -o payment_store/
+    python -m paymentlabs.payment_store info payment_store/
+
+Payments are stored as Parquet, partitioned hive-style by settlement month
+and currency (SettlementMonth=2025-05/Ccy=EUR/part-*.parquet) and sorted by
+SettlementDate inside each file. A query plan becomes an Arrow filter
+expression: the month and currency terms skip whole directories, the
+date, amount and party terms are checked against row-group statistics
+before any page is decoded, and only the columns a report needs are read.
+Files are memory-mapped, so the history stays in the page cache rather
+than the Streamlit process.
+"""
+import argparse
+import operator
+import os
+import sys
+import time
+import uuid
+from functools import reduce
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from paymentlabs.cache import content_hash
+from paymentlabs.reporting import AMOUNT_OPERATORS, CUBE_DIMENSIONS, FILTER_COLUMNS, RollupCube, prepare_reporting
+from paymentlabs.workload import reporting_frame
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "PAYMENTLABS_PAYMENT_STORE",
+    os.path.join(os.path.dirname(__file__), "data", "payment_store")
+)
+PAYMENT_COLUMNS = (
+    "SettlementDate", "TxnRef", "InstdAmt", "Ccy", "DbtrNm", "DbtrAcct",
+    "CdtrNm", "CdtrAcct", "CdtrCountry", "PurposeCode",
+)
+PARTITIONING = ds.partitioning(pa.schema([("SettlementMonth", pa.string()), ("Ccy", pa.string())]), flavor="hive")
+ROW_GROUP_SIZE = 64 * 1024
+
+# ---- Writing ----
+
+def write_payments(df, store_dir=DEFAULT_STORE_DIR):
+    """Appends reporting rows to the store and returns the number written.
+
+    Existing files are left alone; each call adds new part files to the
+    partitions it touches.
+    """
+    df = df.sort_values("SettlementDate", kind="stable")
+    df = df.astype({column: str for column in CUBE_DIMENSIONS})
+    table = pa.Table.from_pandas(df[list(PAYMENT_COLUMNS)], preserve_index=False)
+    dates = table["SettlementDate"].cast(pa.timestamp("us"))
+    table = table.set_column(0, "SettlementDate", dates)
+    table = table.append_column("SettlementMonth", pc.strftime(dates, format="%Y-%m"))
+    ds.write_dataset(
+        table, store_dir, format="parquet", partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=min(ROW_GROUP_SIZE, len(table)) or None,
+    )
+    return len(table)
+
+def read_payment_file(path):
+    # CSV or Parquet with the reporting columns
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, parse_dates=["SettlementDate"])
+
+# ---- Reading ----
+
+def store_exists(store_dir=DEFAULT_STORE_DIR):
+    return os.path.isdir(store_dir) and any(name.startswith("SettlementMonth=") for name in os.listdir(store_dir))
+
+def store_version(store_dir=DEFAULT_STORE_DIR):
+    # Changes whenever a part file is added, replaced or removed
+    entries = []
+    for root, _, names in os.walk(store_dir):
+        for name in names:
+            if name.endswith(".parquet"):
+                info = os.stat(os.path.join(root, name))
+                entries.append(f"{os.path.relpath(os.path.join(root, name), store_dir)}:{info.st_size}:{info.st_mtime_ns}")
+    return content_hash("\n".join(sorted(entries)))
+
+def open_store(store_dir=DEFAULT_STORE_DIR):
+    return ds.dataset(
+        os.path.abspath(store_dir), format="parquet", partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+
+def plan_filter(plan):
+    # Arrow filter expression for a reporting plan, or None for everything
+    conditions = [pc.field(column).isin(plan[key]) for key, column in FILTER_COLUMNS if plan[key]]
+    if plan['date_from'] is not None:
+        conditions.append(pc.field("SettlementMonth") >= plan['date_from'].strftime("%Y-%m"))
+        conditions.append(pc.field("SettlementDate") >= pa.scalar(plan['date_from'].to_pydatetime(), pa.timestamp("us")))
+    if plan['date_to'] is not None:
+        conditions.append(pc.field("SettlementMonth") <= plan['date_to'].strftime("%Y-%m"))
+        end = plan['date_to'] + pd.Timedelta(days=1)
+        conditions.append(pc.field("SettlementDate") < pa.scalar(end.to_pydatetime(), pa.timestamp("us")))
+    for comparison, value in plan['amounts']:
+        conditions.append(AMOUNT_OPERATORS[comparison](pc.field("InstdAmt"), value))
+    return reduce(operator.and_, conditions) if conditions else None
+
+def plan_columns(plan):
+    # The columns a chart for `plan` reads: filters, amount, date and group
+    columns = ["SettlementDate", "InstdAmt"] + [column for key, column in FILTER_COLUMNS if plan[key]]
+    if plan['group_by'] in PAYMENT_COLUMNS:
+        columns.append(plan['group_by'])
+    return list(dict.fromkeys(columns))
+
+def scan_payments(store, plan=None, columns=PAYMENT_COLUMNS, limit=None):
+    """Reporting frame of the stored payments matching `plan`, limited to
+    `columns` and ready for reporting.plan_positions and aggregate.
+
+    With `limit`, the scan stops after that many matches.
+    """
+    expression = plan_filter(plan) if plan is not None else None
+    if limit is None:
+        table = store.to_table(columns=list(columns), filter=expression)
+    else:
+        table = store.head(limit, columns=list(columns), filter=expression)
+    return prepare_reporting(table.to_pandas())
+
+def iter_payments(store, plan=None, columns=PAYMENT_COLUMNS, batch_size=ROW_GROUP_SIZE):
+    # Matching payments as DataFrame chunks, for exports that never hold them all
+    expression = plan_filter(plan) if plan is not None else None
+    for batch in store.to_batches(columns=list(columns), filter=expression, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def count_payments(store, plan=None):
+    return store.count_rows(filter=plan_filter(plan) if plan is not None else None)
+
+def store_cube(store, batch_size=ROW_GROUP_SIZE):
+    # Rollup cube over the whole store, built one record batch at a time
+    cube = RollupCube()
+    for batch in store.to_batches(columns=[*CUBE_DIMENSIONS, "SettlementDate", "InstdAmt"], batch_size=batch_size):
+        cube.append(batch.to_pandas())
+    return cube
+
+def store_info(store):
+    return {
+        'payments': store.count_rows(),
+        'files': len(store.files),
+        'bytes': sum(os.path.getsize(path) for path in store.files),
+    }
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m paymentlabs.payment_store", description="Build or inspect the partitioned Parquet payment store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="Append synthetic settled payments")
+    generate.add_argument("payments", type=int)
+    generate.add_argument("--days", type=int, default=365)
+    generate.add_argument("--start", default="2025-01-01")
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument("-o", "--store-dir", default=DEFAULT_STORE_DIR)
+    load = commands.add_parser("import", help="Append payments from a CSV or Parquet file")
+    load.add_argument("source")
+    load.add_argument("-o", "--store-dir", default=DEFAULT_STORE_DIR)
+    info = commands.add_parser("info", help="Count stored payments and files")
+    info.add_argument("store_dir", nargs="?", default=DEFAULT_STORE_DIR)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == "info":
+        summary = store_info(open_store(args.store_dir))
+        print(f"{summary['payments']:,} payments in {summary['files']:,} files, {summary['bytes'] / 1e6:,.1f} MB")
+        return 0
+    if args.command == "generate":
+        df = reporting_frame(args.payments, args.seed, args.start, args.days)
+    else:
+        df = read_payment_file(args.source)
+    written = write_payments(df, args.store_dir)
+    print(f"Stored {written:,} payments in {args.store_dir} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Chunked report export to XLSX, CSV or Parquet.
+
+    python -m paymentlabs.report_export "supplier payments to Germany in 2025" -f xlsx -o report.xlsx
+
+Reports are written chunk by chunk into a file on disk, so memory stays at
+one chunk however many rows match. XLSX uses openpyxl's write-only mode and
+starts a new sheet before Excel's row limit.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from paymentlabs.payment_store import DEFAULT_STORE_DIR, iter_payments, open_store
+from paymentlabs.reporting import plan_query
+
+EXPORT_CHUNK_ROWS = 50_000
+# Excel's limit is 1,048,576 rows per sheet, one of them the header
+EXCEL_MAX_ROWS = 1_048_575
+EXPORT_FORMATS = {
+    'xlsx': {'label': "Excel", 'mime': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    'csv': {'label': "CSV", 'mime': "text/csv"},
+    'parquet': {'label': "Parquet", 'mime': "application/vnd.apache.parquet"},
+}
+
+# ---- Sources ----
+
+def frame_chunks(df, positions=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Rows of an in-memory frame, optionally only those at `positions`
+    count = len(df) if positions is None else len(positions)
+    for start in range(0, count, chunk_rows):
+        if positions is None:
+            yield df.iloc[start:start + chunk_rows]
+        else:
+            yield df.iloc[positions[start:start + chunk_rows]]
+
+def _plain(chunk):
+    # Categoricals as their values, so every chunk has the same column types
+    return chunk.astype({column: str for column, dtype in chunk.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)})
+
+# ---- Writers ----
+# Each takes an iterable of DataFrame chunks and a path and returns the
+# number of rows written.
+
+def write_xlsx(chunks, path, sheet_name="Report", max_rows=EXCEL_MAX_ROWS):
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheets, rows = None, 0, 0, 0
+    for chunk in chunks:
+        columns = list(chunk.columns)
+        for values in chunk.itertuples(index=False, name=None):
+            if sheet is None or sheet_rows == max_rows:
+                sheets += 1
+                sheet = workbook.create_sheet(sheet_name if sheets == 1 else f"{sheet_name} {sheets}")
+                sheet.append(columns)
+                sheet_rows = 0
+            sheet.append(values)
+            sheet_rows += 1
+        rows += len(chunk)
+    if sheet is None:
+        workbook.create_sheet(sheet_name)
+    workbook.save(path)
+    return rows
+
+def write_csv(chunks, path):
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as target:
+        for chunk in chunks:
+            chunk.to_csv(target, header=not rows, index=False, quoting=csv.QUOTE_MINIMAL)
+            rows += len(chunk)
+    return rows
+
+def write_parquet(chunks, path):
+    writer, rows = None, 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(_plain(chunk), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return rows
+
+WRITERS = {'xlsx': write_xlsx, 'csv': write_csv, 'parquet': write_parquet}
+
+def export_report(chunks, fmt, path=None):
+    """Writes `chunks` as `fmt` and returns (path, rows).
+
+    Without `path` the report goes to a new temporary file, which the
+    caller removes once it has been served.
+    """
+    if path is None:
+        handle, path = tempfile.mkstemp(prefix="report-", suffix=f".{fmt}")
+        os.close(handle)
+    try:
+        return path, WRITERS[fmt](chunks, path)
+    except BaseException:
+        os.remove(path)
+        raise
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m paymentlabs.report_export", description="Export the payments matching a report request.")
+    parser.add_argument("query", help="Report request, as typed on the Advanced Reporting page")
+    parser.add_argument("-f", "--format", choices=list(EXPORT_FORMATS), default="xlsx")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    chunks = iter_payments(open_store(args.store_dir), plan_query(args.query))
+    _, rows = export_report(chunks, args.format, args.output)
+    print(f"Exported {rows:,} payments to {args.output} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,475 @@
+import calendar
+import operator
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from paymentlabs.validators import purpose_codes
+
+# ---- Basic NLP Parsing ----
+
+COUNTRIES_MAP = {
+    "canada": "CA",
+    "france": "FR",
+    "india": "IN",
+    "hong kong": "HK",
+    "malaysia": "MY",
+    "uae": "AE",
+    "germany": "DE",
+    "singapore": "SG"
+}
+
+PURPOSES_MAP = {
+    "salaries": "SALA",
+    "salary": "SALA",
+    "supplier": "SUPP",
+    "supplies": "SUPP",
+    "internal": "INTC",
+    "intercompany": "INTC"
+}
+
+# Longer phrases first, so "singapore dollars" is a currency, not a country
+CURRENCIES_MAP = {
+    "singapore dollars": "SGD",
+    "singapore dollar": "SGD",
+    "us dollars": "USD",
+    "us dollar": "USD",
+    "dollars": "USD",
+    "dollar": "USD",
+    "euros": "EUR",
+    "euro": "EUR",
+    "pounds": "GBP",
+    "pound": "GBP",
+    "sterling": "GBP",
+    "usd": "USD",
+    "eur": "EUR",
+    "gbp": "GBP",
+    "sgd": "SGD",
+}
+
+GROUP_BY_MAP = {
+    "country": "CdtrCountry",
+    "purpose": "PurposeCode",
+    "currency": "Ccy",
+    "creditor": "CdtrNm",
+    "debtor": "DbtrNm",
+    "day": "day",
+    "date": "day",
+    "month": "month",
+}
+
+METRIC_LABELS = {'count': "Number of payments", 'sum': "Total InstdAmt", 'mean': "Average InstdAmt"}
+
+# ---- Query Planning ----
+# A query is turned into a plan: filter lists, an inclusive SettlementDate
+# range, amount comparisons, a group-by column and a metric. Plans hold no
+# data, so one plan can run against any frame.
+
+_DATE = r"(\d{4}-\d{2}-\d{2})"
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)\s*(k|m)?\b"
+_MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+
+AMOUNT_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+_AMOUNT_PHRASES = (
+    (r"(?:over|above|more than|greater than|exceeding)", '>'),
+    (r"(?:at least|minimum of|no less than)", '>='),
+    (r"(?:under|below|less than)", '<'),
+    (r"(?:at most|up to|no more than|maximum of)", '<='),
+)
+
+def _words(query, phrases):
+    # Codes of every phrase present as whole words, in first-seen order; the
+    # matched text is blanked so shorter phrases cannot match inside it
+    found = []
+    for phrase, code in phrases.items():
+        pattern = rf"\b{re.escape(phrase)}\b"
+        if re.search(pattern, query):
+            query = re.sub(pattern, " ", query)
+            if code not in found:
+                found.append(code)
+    return found, query
+
+def _number(digits, suffix):
+    value = float(digits.replace(",", ""))
+    return value * {'k': 1e3, 'm': 1e6}.get(suffix or "", 1)
+
+def _parse_dates(query, today):
+    # (date_from, date_to, remaining query); bounds are inclusive days
+    patterns = (
+        (rf"\b(?:between|from)\s+{_DATE}\s+(?:and|to|until)\s+{_DATE}", lambda a, b: (a, b)),
+        (rf"\bon\s+{_DATE}", lambda a: (a, a)),
+        (rf"\bsince\s+{_DATE}", lambda a: (a, None)),
+        (rf"\bafter\s+{_DATE}", lambda a: (a + pd.Timedelta(days=1), None)),
+        (rf"\buntil\s+{_DATE}", lambda a: (None, a)),
+        (rf"\bbefore\s+{_DATE}", lambda a: (None, a - pd.Timedelta(days=1))),
+    )
+    for pattern, bounds in patterns:
+        match = re.search(pattern, query)
+        if match:
+            return (*bounds(*(pd.Timestamp(value) for value in match.groups())), query.replace(match.group(0), " "))
+
+    month_names = "|".join(sorted(_MONTHS, key=len, reverse=True))
+    match = re.search(rf"\bin\s+({month_names})(?:\s+(\d{{4}}))?\b", query)
+    if match:
+        year = int(match.group(2) or today.year)
+        month = _MONTHS[match.group(1)]
+        start = pd.Timestamp(year=year, month=month, day=1)
+        return start, start + pd.offsets.MonthEnd(0), query.replace(match.group(0), " ")
+    match = re.search(r"\bin\s+(\d{4})\b", query)
+    if match:
+        year = int(match.group(1))
+        return pd.Timestamp(year=year, month=1, day=1), pd.Timestamp(year=year, month=12, day=31), query.replace(match.group(0), " ")
+    match = re.search(r"\b(?:last|past)\s+(\d+)\s+(day|week|month)s?\b", query)
+    if match:
+        count = int(match.group(1))
+        days = {'day': 1, 'week': 7}.get(match.group(2))
+        start = today - (pd.Timedelta(days=count * days - 1) if days else pd.DateOffset(months=count) - pd.Timedelta(days=1))
+        return start, today, query.replace(match.group(0), " ")
+    for word, offset in (("yesterday", 1), ("today", 0)):
+        if re.search(rf"\b{word}\b", query):
+            day = today - pd.Timedelta(days=offset)
+            return day, day, re.sub(rf"\b{word}\b", " ", query)
+    return None, None, query
+
+def _parse_amounts(query):
+    # (conditions, remaining query); "amount over 10k" is consumed whole so
+    # the word does not also pick the metric
+    conditions = []
+    lead = r"(?:(?:amounts?|values?)\s+(?:of\s+)?)?"
+    match = re.search(rf"{lead}\bbetween\s+{_NUMBER}\s+and\s+{_NUMBER}", query)
+    if match:
+        low, high = _number(*match.group(1, 2)), _number(*match.group(3, 4))
+        conditions += [('>=', min(low, high)), ('<=', max(low, high))]
+        query = query.replace(match.group(0), " ")
+    for phrase, comparison in _AMOUNT_PHRASES:
+        for match in list(re.finditer(rf"{lead}\b{phrase}\s+{_NUMBER}", query)):
+            conditions.append((comparison, _number(*match.groups())))
+            query = query.replace(match.group(0), " ")
+    return conditions, query
+
+# A bare country code only counts after "to", "from" or "country", so
+# "payments IN 2025" stays a date rather than India; lists like "to SG, DE
+# or FR" are taken whole
+_COUNTRY_CODES = re.compile(r"\b(?i:to|from|country|countries)\s+([A-Z]{2}\b(?:\s*(?:,|(?i:and|or))\s*[A-Z]{2}\b)*)")
+
+def plan_query(query, today=None):
+    """Query plan for a free-text report request.
+
+    Every country, purpose and currency mentioned is kept (an OR within each
+    list, AND across them). Relative dates ("last 30 days", "in May") are
+    taken from `today`.
+    """
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    text = query.lower()
+
+    date_from, date_to, text = _parse_dates(text, today)
+    currencies, text = _words(text, CURRENCIES_MAP)
+    countries, text = _words(text, COUNTRIES_MAP)
+    purposes, text = _words(text, PURPOSES_MAP)
+    # Explicit upper-case codes: "purpose code SALA", "payments to SG"
+    for token in re.findall(r"\b[A-Z]{4}\b", query):
+        if token in purpose_codes() and token not in purposes:
+            purposes.append(token)
+    for match in _COUNTRY_CODES.finditer(query):
+        for token in re.findall(r"\b[A-Z]{2}\b", match.group(1)):
+            if token in COUNTRIES_MAP.values() and token not in countries:
+                countries.append(token)
+    amounts, text = _parse_amounts(text)
+
+    if re.search(r"\b(?:average|avg|mean)\b", text):
+        metric = 'mean'
+    elif "amount" in text or "volume" in text or re.search(r"\b(?:sum|value)\b", text):
+        metric = 'sum'
+    elif "count" in text or "number of" in text or "how many" in text:
+        metric = 'count'
+    elif re.search(r"\btotal\b", text):
+        metric = 'sum'
+    else:
+        metric = None
+
+    match = re.search(rf"\b(?:by|per)\s+({'|'.join(GROUP_BY_MAP)})\b", text)
+    group_by = GROUP_BY_MAP[match.group(1)] if match else ("CdtrCountry" if metric else None)
+
+    return {
+        'countries': countries,
+        'purposes': purposes,
+        'currencies': currencies,
+        'date_from': date_from,
+        'date_to': date_to,
+        'amounts': amounts,
+        'group_by': group_by,
+        'metric': metric,
+    }
+
+def describe_plan(plan):
+    steps = []
+    for key, label in (('countries', "CdtrCountry"), ('purposes', "PurposeCode"), ('currencies', "Ccy")):
+        if plan[key]:
+            steps.append(f"{label} in {', '.join(plan[key])}")
+    if plan['date_from'] is not None or plan['date_to'] is not None:
+        start = plan['date_from'].date() if plan['date_from'] is not None else "…"
+        end = plan['date_to'].date() if plan['date_to'] is not None else "…"
+        steps.append(f"SettlementDate {start} → {end}")
+    for comparison, value in plan['amounts']:
+        steps.append(f"InstdAmt {comparison} {value:,.2f}")
+    if plan['metric']:
+        steps.append(f"{METRIC_LABELS[plan['metric']]} by {plan['group_by']}")
+    return steps or ["All payments"]
+
+# ---- Plan Execution ----
+# Reporting frames are sorted by SettlementDate, so a date range is a slice
+# found by binary search; the other filters are ANDed into one mask over
+# that slice and only the surviving row positions are materialized.
+
+FILTER_COLUMNS = (('countries', "CdtrCountry"), ('purposes', "PurposeCode"), ('currencies', "Ccy"))
+CUBE_DIMENSIONS = tuple(column for _, column in FILTER_COLUMNS)
+
+def prepare_reporting(df):
+    """Reporting frame ready for plans: sorted by SettlementDate, with the
+    filter and group-by columns as categoricals. Projected frames keep
+    whichever of those columns they have."""
+    df = df.sort_values("SettlementDate", kind="stable", ignore_index=True)
+    for column in CUBE_DIMENSIONS:
+        if column in df:
+            df[column] = df[column].astype("category")
+    return df
+
+def _date_slice(plan, dates):
+    start, stop = 0, len(dates)
+    if plan['date_from'] is not None:
+        start = np.searchsorted(dates, np.datetime64(plan['date_from'], "ns"), side="left")
+    if plan['date_to'] is not None:
+        stop = np.searchsorted(dates, np.datetime64(plan['date_to'] + pd.Timedelta(days=1), "ns"), side="left")
+    return start, max(start, stop)
+
+def _isin(column, values):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Compare integer codes rather than strings
+        wanted = [column.cat.categories.get_loc(value) for value in values if value in column.cat.categories]
+        return np.isin(column.cat.codes.to_numpy(), wanted)
+    return column.isin(values).to_numpy()
+
+def plan_positions(plan, df):
+    # Row positions of `df` matching the plan
+    dates = df["SettlementDate"].to_numpy()
+    if df["SettlementDate"].is_monotonic_increasing:
+        start, stop = _date_slice(plan, dates)
+        mask = np.ones(stop - start, dtype=bool)
+    else:
+        start, stop = 0, len(df)
+        mask = np.ones(len(df), dtype=bool)
+        if plan['date_from'] is not None:
+            mask &= dates >= np.datetime64(plan['date_from'], "ns")
+        if plan['date_to'] is not None:
+            mask &= dates < np.datetime64(plan['date_to'] + pd.Timedelta(days=1), "ns")
+
+    for key, column in FILTER_COLUMNS:
+        if plan[key]:
+            mask &= _isin(df[column].iloc[start:stop], plan[key])
+    if plan['amounts']:
+        amounts = df["InstdAmt"].to_numpy()[start:stop]
+        for comparison, value in plan['amounts']:
+            mask &= AMOUNT_OPERATORS[comparison](amounts, value)
+    return np.flatnonzero(mask) + start
+
+def aggregate(plan, df, positions):
+    """Metric per group for the matched rows, or None when the plan has no metric.
+
+    Groups come from categorical codes (or dates truncated to day/month) and
+    are summed with bincount, without building the filtered frame.
+    """
+    if not plan['metric']:
+        return None
+    group_by = plan['group_by']
+    if group_by in ("day", "month"):
+        dates = df["SettlementDate"].to_numpy()[positions].astype("datetime64[D]" if group_by == "day" else "datetime64[M]")
+        codes, labels = pd.factorize(dates, sort=True)
+        labels = pd.Index(labels.astype(str), name=group_by)
+    else:
+        column = df[group_by]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()[positions]
+            labels = pd.Index(column.cat.categories, name=group_by)
+        else:
+            codes, labels = pd.factorize(column.to_numpy()[positions], sort=True)
+            labels = pd.Index(labels, name=group_by)
+
+    counts = np.bincount(codes, minlength=len(labels))
+    if plan['metric'] == 'count':
+        values = counts
+    else:
+        values = np.bincount(codes, weights=df["InstdAmt"].to_numpy()[positions], minlength=len(labels))
+        if plan['metric'] == 'mean':
+            values = np.divide(values, counts, out=np.zeros(len(values)), where=counts > 0)
+    present = counts > 0
+    return pd.Series(values[present], index=labels[present], name=METRIC_LABELS[plan['metric']])
+
+def run_query(query, df, today=None):
+    plan = plan_query(query, today)
+    positions = plan_positions(plan, df)
+    return plan, positions, aggregate(plan, df, positions)
+
+# ---- Rollup Cube ----
+# Count and InstdAmt sum per CdtrCountry x PurposeCode x Ccy x settlement
+# day, held as two dense arrays. Appending a batch adds its bincount into
+# the cells (growing an axis when a new label or day shows up), so the cube
+# never rescans earlier payments. A plan without amount bounds, grouped by
+# a cube dimension, day or month, is answered from the cells alone.
+
+class RollupCube:
+    def __init__(self):
+        self.labels = {dimension: [] for dimension in CUBE_DIMENSIONS}
+        self.first_day = None
+        self.rows = 0
+        self._positions = {dimension: {} for dimension in CUBE_DIMENSIONS}
+        self._counts = np.zeros((0,) * (len(CUBE_DIMENSIONS) + 1), dtype=np.int64)
+        self._sums = np.zeros(self._counts.shape)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, df):
+        # Adds a batch of reporting rows, in any order
+        if not len(df):
+            return
+        days = df["SettlementDate"].to_numpy().astype("datetime64[D]")
+        with self._lock:
+            first_day = days.min() if self.first_day is None else min(self.first_day, days.min())
+            shift = 0 if self.first_day is None else int((self.first_day - first_day).astype(int))
+            indices = [self._label_codes(dimension, df[dimension]) for dimension in CUBE_DIMENSIONS]
+            indices.append((days - first_day).astype(np.int64))
+            shape = tuple(len(self.labels[dimension]) for dimension in CUBE_DIMENSIONS)
+            shape += (max(self._counts.shape[-1] + shift, int(indices[-1].max()) + 1),)
+
+            if shape != self._counts.shape:
+                counts, sums = np.zeros(shape, dtype=np.int64), np.zeros(shape)
+                old = tuple(slice(0, size) for size in self._counts.shape[:-1])
+                old += (slice(shift, shift + self._counts.shape[-1]),)
+                counts[old], sums[old] = self._counts, self._sums
+                self._counts, self._sums = counts, sums
+            cells = np.ravel_multi_index(indices, shape)
+            self._counts += np.bincount(cells, minlength=self._counts.size).reshape(shape)
+            self._sums += np.bincount(cells, weights=df["InstdAmt"].to_numpy(dtype=float), minlength=self._sums.size).reshape(shape)
+            self.first_day = first_day
+            self.rows += len(df)
+
+    def _label_codes(self, dimension, column):
+        codes, uniques = pd.factorize(column)
+        positions, labels = self._positions[dimension], self.labels[dimension]
+        for label in uniques:
+            if label not in positions:
+                positions[label] = len(labels)
+                labels.append(label)
+        return np.array([positions[label] for label in uniques], dtype=np.int64)[codes]
+
+    def covers(self, plan):
+        group_by = plan['group_by']
+        return not plan['amounts'] and (group_by is None or group_by in CUBE_DIMENSIONS or group_by in ("day", "month"))
+
+    def _cells(self, plan):
+        # The counts and sums sub-cubes selected by the plan's filters
+        selection = []
+        for key, dimension in FILTER_COLUMNS:
+            if plan[key]:
+                selection.append([self._positions[dimension][value] for value in plan[key] if value in self._positions[dimension]])
+            else:
+                selection.append(range(len(self.labels[dimension])))
+        start, stop = 0, self._counts.shape[-1]
+        if self.first_day is not None:
+            if plan['date_from'] is not None:
+                start = min(max(0, int((np.datetime64(plan['date_from'].date()) - self.first_day).astype(int))), stop)
+            if plan['date_to'] is not None:
+                stop = max(start, min(stop, int((np.datetime64(plan['date_to'].date()) - self.first_day).astype(int)) + 1))
+        selection.append(range(start, stop))
+        index = np.ix_(*[np.asarray(axis, dtype=np.int64) for axis in selection])
+        return self._counts[index], self._sums[index], selection
+
+    def matched(self, plan):
+        with self._lock:
+            return int(self._cells(plan)[0].sum())
+
+    def aggregate(self, plan):
+        """Same result as aggregate(plan, df, positions) over the appended rows."""
+        if not plan['metric']:
+            return None
+        with self._lock:
+            counts, sums, selection = self._cells(plan)
+            first_day = self.first_day
+        group_by = plan['group_by']
+        if group_by in ("day", "month"):
+            axis = len(CUBE_DIMENSIONS)
+            counts, sums = counts.sum(axis=(0, 1, 2)), sums.sum(axis=(0, 1, 2))
+            days = first_day + np.asarray(selection[axis], dtype=np.int64)
+            if group_by == "month":
+                codes, months = pd.factorize(days.astype("datetime64[M]"), sort=True)
+                counts, sums = np.bincount(codes, counts, len(months)), np.bincount(codes, sums, len(months))
+                days = months
+            labels = pd.Index(np.asarray(days).astype(str), name=group_by)
+        else:
+            axis = CUBE_DIMENSIONS.index(group_by)
+            others = tuple(other for other in range(len(CUBE_DIMENSIONS) + 1) if other != axis)
+            counts, sums = counts.sum(axis=others), sums.sum(axis=others)
+            labels = pd.Index([self.labels[group_by][position] for position in selection[axis]], name=group_by)
+
+        if plan['metric'] == 'count':
+            values = counts
+        elif plan['metric'] == 'sum':
+            values = sums
+        else:
+            values = np.divide(sums, counts, out=np.zeros(len(sums)), where=counts > 0)
+        present = counts > 0
+        return pd.Series(values[present], index=labels[present], name=METRIC_LABELS[plan['metric']]).sort_index()
+
+def rollup_cube(df):
+    cube = RollupCube()
+    cube.append(df)
+    return cube
+
+def chart_report(plan, df, cube=None):
+    """(matched payments, metric per group) for a plan; from the cube when
+    it covers the plan, otherwise by scanning `df`."""
+    if cube is not None and cube.covers(plan):
+        return cube.matched(plan), cube.aggregate(plan)
+    positions = plan_positions(plan, df)
+    return len(positions), aggregate(plan, df, positions)
+
+# ---- Result Caching ----
+# Requests worded differently often parse to the same plan; the key below
+# is what a report result is cached under, alongside the data version.
+
+def report_key(plan):
+    """Canonical plan: filter lists sorted, dates as ISO days, then the
+    amount bounds, grouping and metric."""
+    day = lambda value: None if value is None else value.date().isoformat()
+    return (
+        tuple(sorted(plan['countries'])), tuple(sorted(plan['purposes'])), tuple(sorted(plan['currencies'])),
+        day(plan['date_from']), day(plan['date_to']), tuple(sorted(plan['amounts'])),
+        plan['group_by'], plan['metric'],
+    )
+
+def report_nbytes(report):
+    # Approximate memory held by a cached report's frames and series
+    return sum(
+        int(value.memory_usage(deep=True).sum()) if isinstance(value, pd.DataFrame) else int(value.memory_usage(deep=True))
+        for value in report.values() if isinstance(value, (pd.DataFrame, pd.Series))
+    )
+
+# ---- Backwards-Compatible Entry Points ----
+
+REPORT_TYPES = {'sum': "amount", 'count': "count"}
+
+def parse_nlp_query(query, df):
+    plan = plan_query(query)
+    positions = plan_positions(plan, df)
+    return df.iloc[positions], REPORT_TYPES.get(plan['metric'], "general")
+
+def group_report(filtered_df, report_type):
+    if report_type == "amount":
+        return filtered_df.groupby("CdtrCountry", observed=True)["InstdAmt"].sum()
+    if report_type == "count":
+        return filtered_df.groupby("CdtrCountry", observed=True)["TxnRef"].count()
+    return None
@@ -0,0 +1,236 @@
+"""Fuzzy sanctions name screening over a persisted, memory-mapped trigram index.
+
+    python -m paymentlabs.sanctions build targets.simple.csv -o sanctions_index/
+    python -m paymentlabs.sanctions screen sanctions_index/ "Iran Financial Org"
+
+The index is a directory of flat numpy arrays opened with mmap, so every
+worker process shares the same pages instead of rebuilding or copying it.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from paymentlabs.string_table import read_strings, string_at, write_strings
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.environ.get(
+    "PAYMENTLABS_SANCTIONS_INDEX",
+    os.path.join(os.path.dirname(__file__), "data", "sanctions_index")
+)
+
+# ---- Name Normalization ----
+
+LEGAL_FORMS = frozenset({
+    "ag", "bv", "co", "company", "corp", "corporation", "gmbh", "inc", "incorporated", "jsc", "limited",
+    "llc", "llp", "lp", "ltd", "nv", "ojsc", "ooo", "pjsc", "plc", "sa", "srl",
+})
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize_name(name):
+    # Casefolded, accents and punctuation removed, legal forms dropped
+    text = unicodedata.normalize("NFKD", str(name or "")).casefold()
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    tokens = [token for token in _NON_WORD.sub(" ", text).split() if token]
+    kept = [token for token in tokens if token not in LEGAL_FORMS]
+    return " ".join(kept or tokens)
+
+def name_grams(normalized):
+    # Distinct character trigrams of " name ", packed as 21-bit code points
+    padded = f" {normalized} "
+    return sorted({
+        (ord(padded[i]) << 42) | (ord(padded[i + 1]) << 21) | ord(padded[i + 2])
+        for i in range(len(padded) - 2)
+    }) if normalized else []
+
+# ---- Loading Dumps ----
+
+def _split_aliases(value):
+    return [alias.strip() for alias in (value or "").split(";") if alias.strip()]
+
+def load_entities(path):
+    """Entities from an OpenSanctions-style dump.
+
+    CSV needs id and name columns (aliases are ';'-separated, as in
+    targets.simple.csv). JSON may be FollowTheMoney entity lines with
+    properties.name/alias, or a list of {id, name, aliases} objects.
+    """
+    entities = []
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as source:
+            for row in csv.DictReader(source):
+                names = [row.get("name") or row.get("caption"), *_split_aliases(row.get("aliases"))]
+                entities.append({'id': row["id"], 'caption': names[0] or row["id"], 'names': [name for name in names if name]})
+        return entities
+
+    with open(path, encoding="utf-8") as source:
+        first = source.read(1)
+        source.seek(0)
+        records = json.load(source) if first == "[" else (json.loads(line) for line in source if line.strip())
+        for record in records:
+            properties = record.get("properties", {})
+            names = [
+                *properties.get("name", []),
+                *([record["name"]] if record.get("name") else []),
+                *properties.get("alias", []),
+                *properties.get("weakAlias", []),
+                *(record.get("aliases") or []),
+            ]
+            caption = record.get("caption") or (names[0] if names else record["id"])
+            entities.append({'id': record["id"], 'caption': caption, 'names': names})
+    return entities
+
+# ---- Persisted Index ----
+
+def build_index(entities, index_dir, source=None):
+    os.makedirs(index_dir, exist_ok=True)
+    names, name_entity = [], []
+    for position, entity in enumerate(entities):
+        for name in dict.fromkeys(normalize_name(name) for name in entity['names']):
+            if name:
+                names.append(name)
+                name_entity.append(position)
+
+    gram_lists = [name_grams(name) for name in names]
+    name_gram_counts = np.array([len(grams) for grams in gram_lists], dtype=np.uint16)
+    keys = np.fromiter((gram for grams in gram_lists for gram in grams), dtype=np.uint64, count=int(name_gram_counts.sum()))
+    ids = np.repeat(np.arange(len(names), dtype=np.uint32), name_gram_counts)
+    # Postings sorted by gram, then by name id within each gram
+    order = np.lexsort((ids, keys))
+    keys, ids = keys[order], ids[order]
+    gram_keys, starts = np.unique(keys, return_index=True)
+
+    np.save(os.path.join(index_dir, "gram_keys.npy"), gram_keys)
+    np.save(os.path.join(index_dir, "gram_offsets.npy"), np.append(starts, len(keys)).astype(np.uint64))
+    np.save(os.path.join(index_dir, "postings.npy"), ids)
+    np.save(os.path.join(index_dir, "name_grams.npy"), name_gram_counts)
+    np.save(os.path.join(index_dir, "name_entity.npy"), np.array(name_entity, dtype=np.uint32))
+    write_strings(index_dir, "names", names)
+    write_strings(index_dir, "entity_ids", [entity['id'] for entity in entities])
+    write_strings(index_dir, "captions", [entity['caption'] for entity in entities])
+    with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as out:
+        json.dump({'version': INDEX_VERSION, 'entities': len(entities), 'names': len(names), 'grams': len(gram_keys), 'source': source}, out)
+    return open_index(index_dir)
+
+def open_index(index_dir=DEFAULT_INDEX_DIR):
+    with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as source:
+        meta = json.load(source)
+    if meta['version'] != INDEX_VERSION:
+        raise ValueError(f"Sanctions index version {meta['version']} in {index_dir}; rebuild it with this release")
+
+    def array(name):
+        return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+
+    return {
+        'meta': meta,
+        'gram_keys': array("gram_keys"),
+        'gram_offsets': array("gram_offsets"),
+        'postings': array("postings"),
+        'name_grams': array("name_grams"),
+        'name_entity': array("name_entity"),
+        'names': read_strings(index_dir, "names"),
+        'entity_ids': read_strings(index_dir, "entity_ids"),
+        'captions': read_strings(index_dir, "captions"),
+    }
+
+# ---- Screening ----
+# Similarity is the Dice coefficient of trigram sets. A name can only reach
+# `threshold` if it shares at least t*q/(2-t) of the q query grams and has
+# between t*q/(2-t) and (2-t)*q/t grams itself. Candidates are collected
+# from the rarest posting lists only (prefix filtering), then counted
+# against the longer lists by binary search, dropping every candidate that
+# can no longer reach the required overlap before each list. Both bounds
+# get BOUND_SLACK so float rounding never pushes them past the exact value
+# and drops a name that scores exactly `threshold`.
+
+BOUND_SLACK = 1e-9
+
+def screen_name(index, name, threshold=0.8, limit=5):
+    query = normalize_name(name)
+    grams = np.array(name_grams(query), dtype=np.uint64)
+    if not len(grams) or not len(index['gram_keys']):
+        return []
+
+    gram_keys, offsets, postings = index['gram_keys'], index['gram_offsets'], index['postings']
+    positions = np.minimum(np.searchsorted(gram_keys, grams), len(gram_keys) - 1)
+    positions = positions[gram_keys[positions] == grams]
+    required = int(np.ceil(threshold * len(grams) / (2 - threshold) - BOUND_SLACK))
+    if required > len(positions):
+        return []
+    lists = sorted((postings[int(offsets[position]):int(offsets[position + 1])] for position in positions), key=len)
+
+    prefix = len(lists) - required + 1
+    candidates, overlap = np.unique(np.concatenate(lists[:prefix]), return_counts=True)
+    lengths = index['name_grams'][candidates]
+    fits = (lengths >= required) & (lengths <= (2 - threshold) * len(grams) / threshold + BOUND_SLACK)
+    candidates, overlap = candidates[fits], overlap[fits]
+
+    for position in range(prefix, len(lists)):
+        alive = overlap + (len(lists) - position) >= required
+        candidates, overlap = candidates[alive], overlap[alive]
+        if not len(candidates):
+            return []
+        plist = lists[position]
+        slots = np.minimum(np.searchsorted(plist, candidates), len(plist) - 1)
+        overlap = overlap + (plist[slots] == candidates)
+
+    scores = 2 * overlap / (len(grams) + index['name_grams'][candidates].astype(np.int64))
+    keep = scores >= threshold
+    best = {}
+    for name_id, score in sorted(zip(candidates[keep].tolist(), scores[keep].tolist()), key=lambda item: -item[1]):
+        entity = int(index['name_entity'][name_id])
+        if entity not in best:
+            best[entity] = {
+                'entity_id': string_at(index['entity_ids'], entity),
+                'caption': string_at(index['captions'], entity),
+                'matched_name': string_at(index['names'], name_id),
+                'score': round(score, 3),
+            }
+        if len(best) == limit:
+            break
+    return list(best.values())
+
+def screen_column(index, names, threshold=0.8):
+    # Match flag per row; each distinct name is screened once
+    codes, uniques = pd.factorize(pd.Series(names))
+    hits = np.array([bool(screen_name(index, value, threshold, limit=1)) for value in uniques] + [False], dtype=bool)
+    return hits[codes]
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m paymentlabs.sanctions", description="Build or query a sanctions screening index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index an OpenSanctions-style CSV or JSON dump")
+    build.add_argument("dump")
+    build.add_argument("-o", "--index-dir", default=DEFAULT_INDEX_DIR)
+    screen = commands.add_parser("screen", help="Screen names against an index")
+    screen.add_argument("index_dir")
+    screen.add_argument("names", nargs="+")
+    screen.add_argument("--threshold", type=float, default=0.8)
+    screen.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        index = build_index(load_entities(args.dump), args.index_dir, source=os.path.basename(args.dump))
+        meta = index['meta']
+        print(f"Indexed {meta['entities']:,} entities / {meta['names']:,} names into {args.index_dir} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return 0
+
+    index = open_index(args.index_dir)
+    for name in args.names:
+        started = time.perf_counter()
+        matches = screen_name(index, name, args.threshold, args.limit)
+        print(json.dumps({'name': name, 'matches': matches, 'ms': round((time.perf_counter() - started) * 1e3, 3)}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
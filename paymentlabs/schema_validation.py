@@ -0,0 +1,144 @@
+"""XSD validation of CBPR+ envelopes against local schema files.
+
+Schemas are compiled once per process and kept for its lifetime, so a batch
+worker pays the compile cost on its first file only.
+
+    python -m paymentlabs.schema_validation repaired/ --workers 8 --summary validation.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from lxml import etree
+
+from paymentlabs.copilot import find_envelope_parts
+from paymentlabs.copilot_batch import collect_files
+from paymentlabs.namespaces import HEAD_NS, PACS008_NS, namespace_of
+
+# ---- Schema Files ----
+# Official ISO 20022 / CBPR+ XSDs are dropped into SCHEMA_DIR under these
+# names (or PAYMENTLABS_SCHEMA_DIR points somewhere else).
+
+SCHEMA_DIR = os.environ.get("PAYMENTLABS_SCHEMA_DIR", os.path.join(os.path.dirname(__file__), "schemas"))
+SCHEMA_FILES = {
+    HEAD_NS: "head.001.001.02.xsd",
+    PACS008_NS: "pacs.008.001.08.xsd",
+}
+
+class SchemaUnavailable(Exception):
+    pass
+
+@lru_cache(maxsize=None)
+def load_schema(namespace, schema_dir=SCHEMA_DIR):
+    filename = SCHEMA_FILES.get(namespace)
+    if filename is None:
+        raise SchemaUnavailable(f"No schema registered for namespace '{namespace or '(none)'}'")
+    path = os.path.join(schema_dir, filename)
+    if not os.path.exists(path):
+        raise SchemaUnavailable(f"Schema file not found: {path}")
+    return etree.XMLSchema(etree.parse(path))
+
+def available_schemas(schema_dir=SCHEMA_DIR):
+    return [namespace for namespace, filename in SCHEMA_FILES.items() if os.path.exists(os.path.join(schema_dir, filename))]
+
+# ---- Validation ----
+
+def _error(part, message, line=None, path=None):
+    return {'part': part, 'line': line, 'path': path, 'message': message}
+
+def validate_message(root, schema_dir=SCHEMA_DIR):
+    """Schema errors for the AppHdr and Document of an envelope (or a bare Document).
+
+    Each part is validated against the schema of its own namespace; an empty
+    list means both parts are valid.
+    """
+    errors = []
+    apphdr, document = find_envelope_parts(root)
+    for part_name, part in (("AppHdr", apphdr), ("Document", document)):
+        if part is None:
+            errors.append(_error(part_name, f"{part_name} is missing"))
+            continue
+        try:
+            schema = load_schema(namespace_of(part.tag), schema_dir)
+        except SchemaUnavailable as exc:
+            errors.append(_error(part_name, str(exc)))
+            continue
+        if not schema.validate(part):
+            errors.extend(_error(part_name, entry.message, entry.line, entry.path) for entry in schema.error_log)
+    return errors
+
+def validate_file(path, schema_dir=SCHEMA_DIR):
+    started = time.perf_counter()
+    try:
+        root = etree.parse(path).getroot()
+    except etree.XMLSyntaxError as exc:
+        errors = [_error(None, str(exc))]
+    else:
+        errors = validate_message(root, schema_dir)
+    return {
+        'file': path,
+        'status': 'invalid' if errors else 'valid',
+        'errors': errors,
+        'seconds': round(time.perf_counter() - started, 4)
+    }
+
+# ---- Batch ----
+
+def _warm_schemas(schema_dir):
+    # Compile every available schema once per worker, before the first file
+    for namespace in available_schemas(schema_dir):
+        load_schema(namespace, schema_dir)
+
+def run_batch(files, workers=None, schema_dir=SCHEMA_DIR, chunksize=16):
+    # Yields one summary per file, in input order
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_schemas, initargs=(schema_dir,)) as pool:
+        yield from pool.map(validate_file, files, [schema_dir] * len(files), chunksize=chunksize)
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m paymentlabs.schema_validation",
+        description="Validate CBPR+ envelopes against the head.001 and pacs.008.001.08 schemas."
+    )
+    parser.add_argument("inputs", nargs="+", help="Directories or glob patterns of XML files")
+    parser.add_argument("--summary", help="JSONL file for per-file results (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--schema-dir", default=SCHEMA_DIR, help="Directory holding the XSD files")
+    args = parser.parse_args(argv)
+
+    missing = [SCHEMA_FILES[namespace] for namespace in SCHEMA_FILES if namespace not in available_schemas(args.schema_dir)]
+    if missing:
+        print(f"Missing schema files in {args.schema_dir}: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    files = collect_files(args.inputs)
+    if not files:
+        print("No input files matched.", file=sys.stderr)
+        return 1
+
+    out = open(args.summary, 'w', encoding='utf-8') if args.summary else sys.stdout
+    started = time.perf_counter()
+    statuses = Counter()
+    try:
+        for result in run_batch(files, args.workers, args.schema_dir):
+            statuses[result['status']] += 1
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(files)} files ({statuses['valid']} valid, {statuses['invalid']} invalid) in {elapsed:.2f}s — "
+        f"{len(files) / elapsed * 60:,.0f} files/min",
+        file=sys.stderr
+    )
+    return 0 if not statuses['invalid'] else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
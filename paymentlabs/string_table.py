@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+
+# ---- String Tables ----
+# Variable-length strings stored as one UTF-8 blob plus an offsets array, so a
+# persisted index can memory-map them like its numeric arrays.
+
+def pack_strings(strings):
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def write_strings(index_dir, stem, strings):
+    blob, offsets = pack_strings(strings)
+    with open(os.path.join(index_dir, f"{stem}.bin"), "wb") as out:
+        out.write(blob.tobytes())
+    np.save(os.path.join(index_dir, f"{stem}_offsets.npy"), offsets)
+
+def read_strings(index_dir, stem):
+    path = os.path.join(index_dir, f"{stem}.bin")
+    blob = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+    return blob, np.load(os.path.join(index_dir, f"{stem}_offsets.npy"), mmap_mode="r")
+
+def string_at(table, position):
+    blob, offsets = table
+    return blob[int(offsets[position]):int(offsets[position + 1])].tobytes().decode("utf-8")
@@ -0,0 +1,65 @@
+import re
+import xml.etree.ElementTree as ET
+
+# ---- MT103 ----
+
+# Extract UETR from MT103 (supports multiple formats)
+def extract_uetr_mt103(text):
+    patterns = [
+        r"\{3:\{121:([A-Za-z0-9\-]+)\}\}",
+        r"\{121:([A-Za-z0-9\-]+)\}",
+        r":121:([A-Za-z0-9\-]+)"
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text)
+        if match:
+            return match.group(1).strip()
+    return None
+
+# Split block 4 into (tag, value) pairs; continuation lines join the previous tag
+def parse_block4(mt_text):
+    mt_block4 = re.search(r"\{4:(.*?)-\}", mt_text, re.DOTALL)
+    mt_fields = []
+    if mt_block4:
+        lines = mt_block4.group(1).strip().split('\n')
+        current_tag = None
+        current_value = ""
+        for line in lines:
+            tag_match = re.match(r":(\d{2}[A-Z]?):", line)
+            if tag_match:
+                if current_tag:
+                    mt_fields.append((current_tag, current_value.strip()))
+                current_tag = tag_match.group(1)
+                current_value = line.split(":", 2)[-1].strip()
+            else:
+                current_value += " " + line.strip()
+        if current_tag:
+            mt_fields.append((current_tag, current_value.strip()))
+    return mt_fields
+
+def truncation_rows(mt_fields):
+    return [
+        {
+            "Field Tag": tag,
+            "Value": val,
+            "Truncated (ends with '+')": val.endswith('+')
+        }
+        for tag, val in mt_fields
+    ]
+
+# ---- pacs.008 ----
+
+# Extract UETR and Travel Rule fields from pacs.008
+def extract_fields_pacs008(xml_content):
+    try:
+        root = ET.fromstring(xml_content)
+        ns = {'ns': 'urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08'}
+        return {
+            "UETR": root.find('.//ns:CdtTrfTxInf/ns:PmtId/ns:UETR', ns).text if root.find('.//ns:CdtTrfTxInf/ns:PmtId/ns:UETR', ns) is not None else None,
+            "Debtor Name": root.find('.//ns:Dbtr/ns:Nm', ns).text if root.find('.//ns:Dbtr/ns:Nm', ns) is not None else "",
+            "Debtor Address": " ".join([e.text for e in root.findall('.//ns:Dbtr/ns:PstlAdr/ns:AdrLine', ns)]),
+            "Creditor Name": root.find('.//ns:Cdtr/ns:Nm', ns).text if root.find('.//ns:Cdtr/ns:Nm', ns) is not None else "",
+            "Creditor Address": " ".join([e.text for e in root.findall('.//ns:Cdtr/ns:PstlAdr/ns:AdrLine', ns)])
+        }
+    except:
+        return {}
@@ -0,0 +1,108 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# ---- Column Validators ----
+# Each validator takes a whole column and returns a boolean numpy mask.
+# Columns are factorized first, so every distinct value is checked once and
+# the result is broadcast back through the codes; payment files repeat the
+# same LEIs, BICs and purpose codes many times over.
+
+LEI_FORMAT = r"[A-Z0-9]{18}[0-9]{2}"
+BIC_FORMAT = r"[A-Z]{4}[A-Z]{2}[A-Z0-9]{2}(?:[A-Z0-9]{3})?"
+IBAN_FORMAT = r"[A-Z]{2}[0-9]{2}[A-Z0-9]{11,30}"
+
+PURPOSE_CODES_FILE = os.environ.get(
+    "PAYMENTLABS_PURPOSE_CODES",
+    os.path.join(os.path.dirname(__file__), "data", "purpose_codes.csv")
+)
+
+def _per_value(column, check):
+    codes, uniques = pd.factorize(pd.Series(column), use_na_sentinel=True)
+    if len(uniques) == 0:
+        return np.zeros(len(codes), dtype=bool)
+    valid = np.asarray(check(pd.Series(uniques, dtype=object).fillna("").astype(str)), dtype=bool)
+    # NaN factorizes to -1; append a False slot for it
+    return np.append(valid, False)[codes]
+
+def _mod97(values):
+    # ISO 7064 MOD 97-10 over equal-length strings of digits and A-Z, where
+    # letters count as two digits (A=10 .. Z=35)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    width = len(values.iloc[0])
+    chars = np.frombuffer("".join(values).encode("ascii"), dtype=np.uint8).reshape(len(values), width).astype(np.int64)
+    digits = np.where(chars >= 65, chars - 55, chars - 48)
+    remainder = np.zeros(len(values), dtype=np.int64)
+    for position in range(width):
+        value = digits[:, position]
+        remainder = np.where(value >= 10, remainder * 100 + value, remainder * 10 + value) % 97
+    return remainder
+
+def _format_mask(values, pattern):
+    return np.array(values.str.fullmatch(pattern), dtype=bool)
+
+def _lei_check(values):
+    valid = _format_mask(values, LEI_FORMAT)
+    valid[valid] = _mod97(values[valid]) == 1
+    return valid
+
+def _iban_check(values):
+    values = values.str.replace(" ", "", regex=False)
+    valid = _format_mask(values, IBAN_FORMAT)
+    candidates = values[valid]
+    rearranged = candidates.str[4:] + candidates.str[:4]
+    # IBAN lengths differ by country, so the checksum runs per length
+    results = np.zeros(len(candidates), dtype=bool)
+    lengths = rearranged.str.len().to_numpy()
+    for length in np.unique(lengths):
+        same = lengths == length
+        results[same] = _mod97(rearranged[same]) == 1
+    valid[valid] = results
+    return valid
+
+def valid_lei(column):
+    """ISO 17442: 18 alphanumerics plus two check digits, MOD 97-10 == 1."""
+    return _per_value(column, _lei_check)
+
+def valid_bic(column):
+    """ISO 9362 structure: institution, country, location and optional branch code."""
+    return _per_value(column, lambda values: _format_mask(values, BIC_FORMAT))
+
+def valid_iban(column):
+    """ISO 13616: country, check digits and BBAN, MOD 97-10 == 1 after rotating the first four characters."""
+    return _per_value(column, _iban_check)
+
+# ---- Single Values ----
+# The same checks for one value, for rules that look at a value at a time
+# (the Copilot's per-element rules) where a column round trip would dominate.
+
+_LEI_REGEX = re.compile(LEI_FORMAT)
+_BIC_REGEX = re.compile(BIC_FORMAT)
+
+def is_valid_lei(value):
+    # Letters count as two digits, as in _mod97
+    return bool(_LEI_REGEX.fullmatch(value)) and int("".join(str(int(char, 36)) for char in value)) % 97 == 1
+
+def is_valid_bic(value):
+    return bool(_BIC_REGEX.fullmatch(value))
+
+def load_purpose_codes(path=PURPOSE_CODES_FILE):
+    return frozenset(pd.read_csv(path, dtype=str, comment="#")["Code"].str.strip())
+
+_PURPOSE_CODES = {}
+
+def purpose_codes(path=PURPOSE_CODES_FILE):
+    if path not in _PURPOSE_CODES:
+        _PURPOSE_CODES[path] = load_purpose_codes(path)
+    return _PURPOSE_CODES[path]
+
+def valid_purpose(column, codes=None):
+    """Listed in the ExternalPurpose1Code set."""
+    codes = purpose_codes() if codes is None else codes
+    return _per_value(column, lambda values: values.isin(codes).to_numpy())
+
+def present(column):
+    return _per_value(column, lambda values: values.str.strip().ne("").to_numpy())
@@ -0,0 +1,186 @@
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+# ---- Windows ----
+# Each window is a queue of fixed-width time buckets, so its edge is exact to
+# one bucket (1 minute for 1h, 24 minutes for 24h, 2.8 hours for 7d).
+
+WINDOWS = (("1h", 3600), ("24h", 86400), ("7d", 7 * 86400))
+BUCKETS_PER_WINDOW = 60
+
+# ---- Sliding-Window Tracker ----
+# Per key and window: the bucket queue plus running count, sum and
+# counterparty multiset. Adding an event touches the newest bucket only and
+# every bucket is expired once, so updates are O(1) amortized and history is
+# never rescanned.
+
+class VelocityTracker:
+    def __init__(self, windows=WINDOWS, buckets=BUCKETS_PER_WINDOW, distinct=False):
+        self.windows = windows
+        self.distinct = distinct
+        self._widths = [max(1, seconds // buckets) for _, seconds in windows]
+        self._buckets = buckets
+        self._state = {}
+
+    def __len__(self):
+        return len(self._state)
+
+    def update(self, key, timestamp, amount, counterparty=None):
+        """Adds one event and returns (count, sum, distinct) per window, including it.
+
+        `timestamp` is in seconds; an event older than the newest bucket of
+        its key is counted in that bucket.
+        """
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = [[deque(), 0, 0.0, Counter()] for _ in self.windows]
+        features = []
+        for window, width in zip(state, self._widths):
+            queue = window[0]
+            epoch = timestamp // width
+            if queue and queue[-1][0] >= epoch:
+                bucket = queue[-1]
+            else:
+                bucket = [epoch, 0, 0.0, Counter()]
+                queue.append(bucket)
+                self._expire(window, epoch - self._buckets)
+            bucket[1] += 1
+            bucket[2] += amount
+            window[1] += 1
+            window[2] += amount
+            if self.distinct:
+                bucket[3][counterparty] += 1
+                window[3][counterparty] += 1
+            features.append((window[1], window[2], len(window[3])))
+        return features
+
+    def _expire(self, window, oldest):
+        queue, counterparties = window[0], window[3]
+        while queue[0][0] <= oldest:
+            _, count, total, seen = queue.popleft()
+            window[1] -= count
+            window[2] -= total
+            for counterparty, times in seen.items():
+                if counterparties[counterparty] == times:
+                    del counterparties[counterparty]
+                else:
+                    counterparties[counterparty] -= times
+
+    def prune(self, now):
+        # Drops keys with no events inside the longest window
+        horizon = max(seconds for _, seconds in self.windows)
+        width = self._widths[-1]
+        for key in [key for key, state in self._state.items() if (state[-1][0][-1][0] + 1) * width <= now - horizon]:
+            del self._state[key]
+
+# ---- Features ----
+
+def corridor_keys(df):
+    return list(zip(df["Debtor Country"], df["Country"]))
+
+def feature_columns():
+    columns = []
+    for label, _ in WINDOWS:
+        columns += [f"Debtor Count {label}", f"Debtor Sum {label}", f"Debtor Creditors {label}"]
+    for label, _ in WINDOWS:
+        columns += [f"Corridor Count {label}", f"Corridor Sum {label}"]
+    return columns
+
+def _key_order(codes, seconds):
+    # Key-major, then time order; ties keep input order as the replay does
+    by_time = np.argsort(seconds, kind="stable")
+    return by_time[np.argsort(codes[by_time], kind="stable")]
+
+def _window_features(order, codes, seconds, amounts, width, buckets, counterparties=None):
+    """(count, sum, distinct) per event for one window, without trackers.
+
+    Same result as replaying the events through a VelocityTracker: events
+    are taken in Timestamp order and an event sees every earlier event of
+    its key whose bucket is among the last `buckets` up to its own.
+    """
+    n = len(codes)
+    keys, epochs = codes[order], seconds[order] // width
+    span = int(epochs.max() - epochs.min()) + buckets + 1
+    slots = keys * span + (epochs - epochs.min() + buckets)
+    # First event still inside the window of each event; nondecreasing
+    first = np.searchsorted(slots, slots - buckets + 1, side="left")
+    positions = np.arange(n)
+
+    sums = np.concatenate(([0.0], np.cumsum(amounts[order])))
+    count = positions - first + 1
+    total = sums[positions + 1] - sums[first]
+
+    distinct = np.zeros(n)
+    if counterparties is not None:
+        # An event counts towards the events from itself up to (not
+        # including) the next event for the same counterparty, or the first
+        # event whose window has moved past it
+        pairs = keys * (int(counterparties.max()) + 1) + counterparties[order]
+        by_pair = np.argsort(pairs, kind="stable")
+        following = np.full(n, n)
+        same = pairs[by_pair[1:]] == pairs[by_pair[:-1]]
+        following[by_pair[:-1][same]] = by_pair[1:][same]
+        end = np.minimum(following, np.searchsorted(first, positions, side="right"))
+        distinct = positions + 1 - np.cumsum(np.bincount(end, minlength=n + 1)[:n])
+
+    result = np.empty((n, 3))
+    result[order] = np.column_stack((count, total, distinct))
+    return result
+
+def _codes(*columns):
+    # One integer code per distinct combination of the columns' values
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        codes = codes * len(uniques) + column_codes
+    return pd.factorize(codes)[0].astype(np.int64)
+
+def velocity_features(df, debtors=None, corridors=None):
+    """Per-debtor and per-corridor window aggregates as of each transaction.
+
+    Without trackers the windows are computed for all rows at once with
+    sorted-key cumulative sums. Passing trackers replays the transactions
+    in Timestamp order through them instead, so window state carries over
+    from earlier batches (as the streaming service does).
+    """
+    if debtors is None and corridors is None:
+        return _bulk_features(df)
+    debtors = debtors if debtors is not None else VelocityTracker(distinct=True)
+    corridors = corridors if corridors is not None else VelocityTracker()
+    seconds = df["Timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+    order = np.argsort(seconds, kind="stable")
+    amounts = df["Amount"].to_numpy(dtype=float)
+    debtor_keys = df["Debtor"].to_numpy(dtype=object)
+    creditor_keys = df["Creditor"].to_numpy(dtype=object)
+    corridor_key = corridor_keys(df)
+
+    values = np.zeros((len(df), 5 * len(WINDOWS)))
+    for position in order.tolist():
+        timestamp, amount = int(seconds[position]), amounts[position]
+        row = [value for window in debtors.update(debtor_keys[position], timestamp, amount, creditor_keys[position]) for value in window]
+        row += [value for window in corridors.update(corridor_key[position], timestamp, amount) for value in window[:2]]
+        values[position] = row
+    return pd.DataFrame(values, index=df.index, columns=feature_columns())
+
+def _bulk_features(df):
+    values = np.zeros((len(df), 5 * len(WINDOWS)))
+    if len(df):
+        seconds = df["Timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+        amounts = df["Amount"].to_numpy(dtype=float)
+        debtor_codes = _codes(df["Debtor"])
+        creditor_codes = _codes(df["Creditor"])
+        corridor_codes = _codes(df["Debtor Country"], df["Country"])
+        debtor_order = _key_order(debtor_codes, seconds)
+        corridor_order = _key_order(corridor_codes, seconds)
+        for position, (_, window) in enumerate(WINDOWS):
+            width = max(1, window // BUCKETS_PER_WINDOW)
+            values[:, 3 * position:3 * position + 3] = _window_features(
+                debtor_order, debtor_codes, seconds, amounts, width, BUCKETS_PER_WINDOW, creditor_codes
+            )
+            corridor = 3 * len(WINDOWS) + 2 * position
+            values[:, corridor:corridor + 2] = _window_features(
+                corridor_order, corridor_codes, seconds, amounts, width, BUCKETS_PER_WINDOW
+            )[:, :2]
+    return pd.DataFrame(values, index=df.index, columns=feature_columns())
@@ -0,0 +1,343 @@
+"""Seedable synthetic ISO 20022 / MT workloads.
+
+Every format is rendered from the same transaction records, so pacs.008,
+pain.001, camt.053 and MT103 generated with one seed describe the same
+payments (matching UETRs, amounts and parties).
+
+    python -m paymentlabs.workload pacs008 100k bulk.xml --seed 7
+"""
+import argparse
+import sys
+import uuid
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+# ---- Value Pools ----
+
+DEBTOR_NAMES = ["ABC Corp", "XYZ Ltd", "Global Inc", "ACME Corp", "Global Exports", "Midland Ltd", "Unknown Entity"]
+CREDITOR_NAMES = ["SafeBank", "XYZ Bank", "Iran Financial Org", "ABC Corp", "Volkswagen AG", "Maersk Line"]
+DEBTOR_LEIS = ["529900T8BM49AURSDO55", "5493001KJTIIGC8Y1R12", "875300T3KM43AURXYZ99", ""]
+AGENT_BICS = ["HDFCINBBXXX", "SBININBBXXX", "CITIUS33XXX", "DEUTDEFFXXX", "DBSSSGSGXXX", "SBININBB123"]
+CURRENCIES = ["USD", "EUR", "GBP", "SGD"]
+PURPOSE_CODES = ["SALA", "SUPP", "INTC", "GDDS", "CASH", "TAXS", ""]
+REMITTANCE = ["Invoice #123", "PO #45678", "Invoice ref 330", ""]
+# (country, town, postcode prefix, streets)
+LOCALITIES = [
+    ("SG", "Singapore", "35", ["Leicester Road", "Pine Grove", "Orchard Road"]),
+    ("DE", "Wolfsburg", "384", ["Berliner Ring", "Porschestrasse"]),
+    ("IN", "Mumbai", "400", ["Marine Drive", "Nariman Point"]),
+    ("FR", "Paris", "750", ["Rue de Rivoli", "Avenue Montaigne"]),
+    ("CA", "Toronto", "M5", ["King Street West", "Bay Street"]),
+    ("AE", "Dubai", "00", ["Sheikh Zayed Road"]),
+]
+# share of debtor addresses that are structured / AdrLine only / missing
+ADDRESS_STYLES = (("structured", 0.5), ("unstructured", 0.4), ("missing", 0.1))
+
+# Page-specific pools, kept identical to the values the pages used to build inline
+DQ_FIELDS = {
+    "Debtor Name": ["ABC Corp", "XYZ Ltd", "Global Inc"],
+    "Debtor LEI": ["529900T8BM49AURSDO55", "", "875300T3KM43AURXYZ99"],
+    "Debtor BIC": ["HDFCINBBXXX", "", "SBININBB123"],
+    "Purpose Code": ["SALA", "", "CASH"],
+    "Remittance Info": ["Invoice #123", "", "PO #45678"],
+}
+DQ_ADDRESS_OPTIONS = [
+    "Hybrid Address: <AdrLine>#18-16 Leicester Road</AdrLine>",
+    "Fully Structured Address: <StrtNm>Leicester Road</StrtNm> <BldgNb>18-16</BldgNb> <TwnNm>Singapore</TwnNm>",
+    ""
+]
+FRAUD_DEBTORS = ["ACME Corp", "Global Exports", "Unknown Entity", "Midland Ltd"]
+FRAUD_CREDITORS = ["SafeBank", "XYZ Bank", "Iran Financial Org", "ABC Corp"]
+FRAUD_DEBTOR_COUNTRIES = {"ACME Corp": "US", "Global Exports": "GB", "Unknown Entity": "AE", "Midland Ltd": "GB"}
+FRAUD_COUNTRIES = ["IR", "US", "RU", "SG", "IN", "CN"]
+FRAUD_PURPOSES = ["SALA", "GDSV", "INTE", "CASH", "TAXS"]
+REPORTING_CURRENCIES = ['USD', 'EUR', 'GBP', 'SGD']
+REPORTING_PURPOSES = ['SALA', 'SUPP', 'INTC']
+REPORTING_COUNTRIES = ['CA', 'FR', 'IN', 'HK', 'MY', 'AE', 'DE', 'SG']
+
+def resolve_size(size):
+    return SIZES[size.lower()] if isinstance(size, str) and size.lower() in SIZES else int(size)
+
+def iban(country, bban):
+    # Check digits so that the rotated IBAN is 1 mod 97
+    digits = "".join(str(int(char, 36)) for char in f"{bban}{country}00")
+    return f"{country}{98 - int(digits) % 97:02d}{bban}"
+
+def _ids(prefix, start, count, width):
+    return [f"{prefix}{i:0{width}d}" for i in range(start, start + count)]
+
+# ---- Page Frames ----
+
+def data_quality_frame(num_messages=100, seed=None):
+    rng = np.random.default_rng(seed)
+    frame = {"Message ID": _ids("MSG", 1, num_messages, 4)}
+    for field, options in DQ_FIELDS.items():
+        frame[field] = rng.choice(options, num_messages)
+    frame["Postal Address"] = rng.choice(DQ_ADDRESS_OPTIONS, num_messages)
+    return pd.DataFrame(frame)
+
+def fraud_frame(num_transactions=50, seed=None, start="2025-04-01"):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Transaction ID": _ids("TXN", 1000, num_transactions, 0),
+        "Amount": rng.uniform(5000, 500000, num_transactions).round(2),
+        "Currency": "USD",
+        "Debtor": rng.choice(FRAUD_DEBTORS, num_transactions),
+        "Creditor": rng.choice(FRAUD_CREDITORS, num_transactions),
+        "Country": rng.choice(FRAUD_COUNTRIES, num_transactions),
+        "Purpose Code": rng.choice(FRAUD_PURPOSES, num_transactions),
+        "LEI": rng.choice(["", "5493001KJTIIGC8Y1R12"], num_transactions),
+        "Sanction Match": rng.choice([True, False, False], num_transactions),
+    })
+    # About one transaction an hour, at most a year of history
+    seconds = np.sort(rng.integers(0, min(num_transactions, 8760) * 3600, num_transactions))
+    df.insert(1, "Timestamp", pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s"))
+    df.insert(5, "Debtor Country", df["Debtor"].map(FRAUD_DEBTOR_COUNTRIES))
+    return df
+
+def reporting_frame(num_payments=50, seed=42, start="2025-04-01", days=None):
+    # One payment per day for small frames; larger ones spread over `days`
+    rng = np.random.default_rng(seed)
+    days = days or min(num_payments, 365)
+    offsets = np.arange(num_payments) * days // num_payments
+    numbers = range(1, num_payments + 1)
+    return pd.DataFrame({
+        "SettlementDate": pd.Timestamp(start) + pd.to_timedelta(offsets, unit="D"),
+        "TxnRef": _ids("TRX", 1, num_payments, 3),
+        "InstdAmt": rng.integers(4000, 20001, num_payments),
+        "Ccy": rng.choice(REPORTING_CURRENCIES, num_payments),
+        "DbtrNm": [f"Debtor {i}" for i in numbers],
+        "DbtrAcct": [f"DBTRACCT{i}" for i in numbers],
+        "CdtrNm": [f"Creditor {i}" for i in numbers],
+        "CdtrAcct": [f"CDTRACCT{i}" for i in numbers],
+        "CdtrCountry": rng.choice(REPORTING_COUNTRIES, num_payments),
+        "PurposeCode": rng.choice(REPORTING_PURPOSES, num_payments),
+    })
+
+# ---- Transaction Records ----
+
+def generate_transactions(num_transactions, seed=None, chunk_size=10_000, start_date="2025-04-01"):
+    """Yields lists of transaction dicts, `chunk_size` at a time.
+
+    Columns are drawn per chunk with numpy, so a million records cost a few
+    seconds and never sit in memory all at once.
+    """
+    rng = np.random.default_rng(seed)
+    styles, weights = zip(*ADDRESS_STYLES)
+    start = np.datetime64(start_date)
+    for offset in range(0, num_transactions, chunk_size):
+        count = min(chunk_size, num_transactions - offset)
+        raw = rng.bytes(16 * count)
+        uetrs = [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+        amounts = np.round(rng.lognormal(9, 1.2, count), 2)
+        debtor_loc = rng.integers(0, len(LOCALITIES), count)
+        creditor_loc = rng.integers(0, len(LOCALITIES), count)
+        street_pick = rng.integers(0, 3, count)
+        columns = {
+            'currency': rng.choice(CURRENCIES, count),
+            'debtor_name': rng.choice(DEBTOR_NAMES, count),
+            'debtor_lei': rng.choice(DEBTOR_LEIS, count),
+            'debtor_bic': rng.choice(AGENT_BICS, count),
+            'creditor_name': rng.choice(CREDITOR_NAMES, count),
+            'creditor_bic': rng.choice(AGENT_BICS, count),
+            'purpose': rng.choice(PURPOSE_CODES, count),
+            'remittance': rng.choice(REMITTANCE, count),
+            'address_style': rng.choice(styles, count, p=weights),
+            'building': rng.integers(1, 200, count),
+            'postcode': rng.integers(1000, 9999, count),
+            'settlement_date': start + rng.integers(0, 365, count).astype('timedelta64[D]'),
+        }
+        chunk = []
+        for i in range(count):
+            d_country, d_town, d_prefix, d_streets = LOCALITIES[debtor_loc[i]]
+            c_country, c_town, _, _ = LOCALITIES[creditor_loc[i]]
+            chunk.append({
+                'tx_id': f"TX{offset + i + 1:08d}",
+                'uetr': uetrs[i],
+                'amount': f"{amounts[i]:.2f}",
+                'currency': str(columns['currency'][i]),
+                'settlement_date': str(columns['settlement_date'][i]),
+                'debtor_name': str(columns['debtor_name'][i]),
+                'debtor_lei': str(columns['debtor_lei'][i]),
+                'debtor_bic': str(columns['debtor_bic'][i]),
+                'debtor_iban': iban('DE', f"37040044{offset + i:010d}"),
+                'address_style': str(columns['address_style'][i]),
+                'street': d_streets[street_pick[i] % len(d_streets)],
+                'building': str(columns['building'][i]),
+                'postcode': f"{d_prefix}{columns['postcode'][i]}",
+                'town': d_town,
+                'country': d_country,
+                'creditor_name': str(columns['creditor_name'][i]),
+                'creditor_bic': str(columns['creditor_bic'][i]),
+                'creditor_account': f"{9194280585234 + offset + i}",
+                'creditor_town': c_town,
+                'creditor_country': c_country,
+                'purpose': str(columns['purpose'][i]),
+                'remittance': str(columns['remittance'][i]),
+            })
+        yield chunk
+
+# ---- XML Rendering ----
+
+def _postal_address(tx):
+    if tx['address_style'] == 'missing':
+        return ''
+    if tx['address_style'] == 'unstructured':
+        return (
+            f"<PstlAdr><AdrLine>{tx['building']} {escape(tx['street'])}</AdrLine>"
+            f"<AdrLine>{tx['postcode']} {escape(tx['town'])}</AdrLine></PstlAdr>"
+        )
+    return (
+        f"<PstlAdr><StrtNm>{escape(tx['street'])}</StrtNm><BldgNb>{tx['building']}</BldgNb>"
+        f"<PstCd>{tx['postcode']}</PstCd><TwnNm>{escape(tx['town'])}</TwnNm><Ctry>{tx['country']}</Ctry></PstlAdr>"
+    )
+
+def _debtor(tx):
+    lei = f"<Id><OrgId><LEI>{tx['debtor_lei']}</LEI></OrgId></Id>" if tx['debtor_lei'] else ''
+    return f"<Dbtr><Nm>{escape(tx['debtor_name'])}</Nm>{_postal_address(tx)}{lei}</Dbtr>"
+
+def _creditor(tx):
+    return (
+        f"<Cdtr><Nm>{escape(tx['creditor_name'])}</Nm><PstlAdr><TwnNm>{escape(tx['creditor_town'])}</TwnNm>"
+        f"<Ctry>{tx['creditor_country']}</Ctry></PstlAdr></Cdtr>"
+    )
+
+def _purpose(tx):
+    return f"<Purp><Cd>{tx['purpose']}</Cd></Purp>" if tx['purpose'] else ''
+
+def _remittance(tx):
+    return f"<RmtInf><Ustrd>{escape(tx['remittance'])}</Ustrd></RmtInf>" if tx['remittance'] else ''
+
+def pacs008_transaction(tx):
+    return (
+        f"<CdtTrfTxInf><PmtId><InstrId>{tx['tx_id']}</InstrId><EndToEndId>{tx['tx_id']}</EndToEndId>"
+        f"<UETR>{tx['uetr']}</UETR></PmtId>"
+        f"<IntrBkSttlmAmt Ccy=\"{tx['currency']}\">{tx['amount']}</IntrBkSttlmAmt>"
+        f"<IntrBkSttlmDt>{tx['settlement_date']}</IntrBkSttlmDt><ChrgBr>SHAR</ChrgBr>"
+        f"{_debtor(tx)}<DbtrAcct><Id><IBAN>{tx['debtor_iban']}</IBAN></Id></DbtrAcct>"
+        f"<DbtrAgt><FinInstnId><BICFI>{tx['debtor_bic']}</BICFI></FinInstnId></DbtrAgt>"
+        f"<CdtrAgt><FinInstnId><BICFI>{tx['creditor_bic']}</BICFI></FinInstnId></CdtrAgt>"
+        f"{_creditor(tx)}<CdtrAcct><Id><Othr><Id>{tx['creditor_account']}</Id></Othr></Id></CdtrAcct>"
+        f"{_purpose(tx)}{_remittance(tx)}</CdtTrfTxInf>"
+    )
+
+def pain001_payment(tx):
+    return (
+        f"<PmtInf><PmtInfId>{tx['tx_id']}</PmtInfId><PmtMtd>TRF</PmtMtd>"
+        f"<ReqdExctnDt><Dt>{tx['settlement_date']}</Dt></ReqdExctnDt>{_debtor(tx)}"
+        f"<DbtrAcct><Id><IBAN>{tx['debtor_iban']}</IBAN></Id></DbtrAcct>"
+        f"<DbtrAgt><FinInstnId><BICFI>{tx['debtor_bic']}</BICFI></FinInstnId></DbtrAgt>"
+        f"<CdtTrfTxInf><PmtId><EndToEndId>{tx['tx_id']}</EndToEndId><UETR>{tx['uetr']}</UETR></PmtId>"
+        f"<Amt><InstdAmt Ccy=\"{tx['currency']}\">{tx['amount']}</InstdAmt></Amt>"
+        f"<CdtrAgt><FinInstnId><BICFI>{tx['creditor_bic']}</BICFI></FinInstnId></CdtrAgt>"
+        f"{_creditor(tx)}<CdtrAcct><Id><Othr><Id>{tx['creditor_account']}</Id></Othr></Id></CdtrAcct>"
+        f"{_purpose(tx)}{_remittance(tx)}</CdtTrfTxInf></PmtInf>"
+    )
+
+def camt053_entry(tx):
+    return (
+        f"<Ntry><Amt Ccy=\"{tx['currency']}\">{tx['amount']}</Amt><CdtDbtInd>DBIT</CdtDbtInd><Sts><Cd>BOOK</Cd></Sts>"
+        f"<BookgDt><Dt>{tx['settlement_date']}</Dt></BookgDt><ValDt><Dt>{tx['settlement_date']}</Dt></ValDt>"
+        f"<BkTxCd><Domn><Cd>PMNT</Cd><Fmly><Cd>ICDT</Cd><SubFmlyCd>XBCT</SubFmlyCd></Fmly></Domn></BkTxCd>"
+        f"<NtryDtls><TxDtls><Refs><EndToEndId>{tx['tx_id']}</EndToEndId><UETR>{tx['uetr']}</UETR></Refs>"
+        f"<RltdPties><Cdtr><Pty><Nm>{escape(tx['creditor_name'])}</Nm></Pty></Cdtr></RltdPties>"
+        f"{_remittance(tx)}</TxDtls></NtryDtls></Ntry>"
+    )
+
+FORMATS = {
+    'pacs008': (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Envelope xmlns="urn:swift:xsd:envelope">'
+        '<AppHdr xmlns="urn:iso:std:iso:20022:tech:xsd:head.001.001.02"><BizMsgIdr>{msg_id}</BizMsgIdr>'
+        '<MsgDefIdr>pacs.008.001.08</MsgDefIdr></AppHdr>'
+        '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08"><FIToFICstmrCdtTrf>'
+        '<GrpHdr><MsgId>{msg_id}</MsgId><CreDtTm>2025-04-01T09:00:00</CreDtTm><NbOfTxs>{count}</NbOfTxs>'
+        '<SttlmInf><SttlmMtd>INDA</SttlmMtd></SttlmInf></GrpHdr>',
+        pacs008_transaction,
+        '</FIToFICstmrCdtTrf></Document></Envelope>'
+    ),
+    'pain001': (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.09"><CstmrCdtTrfInitn>'
+        '<GrpHdr><MsgId>{msg_id}</MsgId><CreDtTm>2025-04-01T09:00:00</CreDtTm><NbOfTxs>{count}</NbOfTxs>'
+        '<InitgPty><Nm>PaymentLabs Corporate</Nm></InitgPty></GrpHdr>',
+        pain001_payment,
+        '</CstmrCdtTrfInitn></Document>'
+    ),
+    'camt053': (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.08"><BkToCstmrStmt>'
+        '<GrpHdr><MsgId>{msg_id}</MsgId><CreDtTm>2025-04-01T09:00:00</CreDtTm></GrpHdr>'
+        '<Stmt><Id>{msg_id}</Id><Acct><Id><IBAN>DE89370400440532013000</IBAN></Id></Acct>',
+        camt053_entry,
+        '</Stmt></BkToCstmrStmt></Document>'
+    ),
+}
+
+def write_xml(fmt, out, num_transactions, seed=None, msg_id="SYNTH0001"):
+    """Writes a pacs008 / pain001 / camt053 file of `num_transactions` to a path or binary file."""
+    header, render, footer = FORMATS[fmt]
+    handle = open(out, 'wb') if isinstance(out, str) else out
+    try:
+        handle.write(header.format(msg_id=msg_id, count=num_transactions).encode('utf-8'))
+        for chunk in generate_transactions(num_transactions, seed):
+            handle.write("".join(render(tx) for tx in chunk).encode('utf-8'))
+        handle.write(footer.encode('utf-8'))
+    finally:
+        if handle is not out:
+            handle.close()
+
+def pacs008_message(num_transactions, seed=None):
+    import io
+    buffer = io.BytesIO()
+    write_xml('pacs008', buffer, num_transactions, seed)
+    return buffer.getvalue()
+
+# ---- MT103 Rendering ----
+
+def mt103_message(tx):
+    return (
+        f"{{1:F01{tx['debtor_bic'][:8]}AXXX0000000000}}{{2:I103{tx['creditor_bic'][:8]}XXXXN}}"
+        f"{{3:{{121:{tx['uetr']}}}}}{{4:\n"
+        f":20:{tx['tx_id']}\n:23B:CRED\n"
+        f":32A:{tx['settlement_date'][2:].replace('-', '')}{tx['currency']}{tx['amount'].replace('.', ',')}\n"
+        f":50F:/{tx['debtor_iban']}\n1/{tx['debtor_name']}\n2/{tx['street']},{tx['building']}\n3/{tx['country']}/{tx['town']},{tx['postcode']}\n"
+        f":52A:{tx['debtor_bic']}\n:57A:{tx['creditor_bic']}\n"
+        f":59F:/{tx['creditor_account']}\n1/{tx['creditor_name']}\n3/{tx['creditor_country']}/{tx['creditor_town']}\n"
+        f":70:{tx['remittance'] or 'NOTPROVIDED'}\n:71A:SHA\n-}}"
+    )
+
+def mt103_messages(num_messages, seed=None):
+    for chunk in generate_transactions(num_messages, seed):
+        for tx in chunk:
+            yield mt103_message(tx)
+
+def write_mt103(out, num_messages, seed=None):
+    with open(out, 'w', encoding='utf-8') as handle:
+        for message in mt103_messages(num_messages, seed):
+            handle.write(message + "\n")
+
+# ---- Command Line ----
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m paymentlabs.workload", description="Generate synthetic payment files.")
+    parser.add_argument("format", choices=sorted(FORMATS) + ["mt103"])
+    parser.add_argument("size", help="1k, 100k, 1m or a transaction count")
+    parser.add_argument("output", help="File to write")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    size = resolve_size(args.size)
+    if args.format == "mt103":
+        write_mt103(args.output, size, args.seed)
+    else:
+        write_xml(args.format, args.output, size, args.seed)
+    print(f"Wrote {size} {args.format} transactions to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import copy
+import re
+from collections import Counter
+from lxml import etree
+from paymentlabs.namespaces import local_name
+
+# ---- Structural Diff ----
+# Children are paired by (local name, occurrence), which is how ISO 20022
+# sequences line up: a repair that inserts Purp does not shift PmtId or Dbtr.
+# Namespaces are ignored so legacy input re-homed into pacs.008 diffs cleanly.
+
+def _keyed_children(elem):
+    seen = Counter()
+    keyed = {}
+    for child in elem.iterchildren(tag=etree.Element):
+        tag = local_name(child.tag)
+        seen[tag] += 1
+        keyed[(tag, seen[tag])] = child
+    return keyed, seen
+
+def _step(tag, occurrence, repeated):
+    return f"{tag}[{occurrence}]" if repeated else tag
+
+def _text(elem):
+    return (elem.text or '').strip()
+
+def _change(kind, path, before, after):
+    return {'kind': kind, 'path': path, 'before': before, 'after': after}
+
+def diff_trees(before, after):
+    """Changed subtrees between two trees, in document order.
+
+    Each change has a kind ('added', 'removed', 'changed'), the path of the
+    subtree and the before/after elements. Nothing is serialized here; use
+    render_change()/render_context() for the parts actually displayed.
+    """
+    changes = []
+    _diff_element(before, after, local_name(before.tag), changes)
+    return changes
+
+def _diff_element(before, after, path, changes):
+    if _text(before) != _text(after) or dict(before.attrib) != dict(after.attrib):
+        changes.append(_change('changed', path, before, after))
+        return
+
+    before_children, before_counts = _keyed_children(before)
+    after_children, after_counts = _keyed_children(after)
+    added = [key for key in after_children if key not in before_children]
+    removed = [key for key in before_children if key not in after_children]
+
+    # Children both dropped and added means the element was rebuilt
+    # (e.g. AdrLine -> StrtNm/BldgNb); report it as one changed subtree
+    if added and removed:
+        changes.append(_change('changed', path, before, after))
+        return
+
+    def child_path(key):
+        tag, occurrence = key
+        repeated = max(before_counts[tag], after_counts[tag]) > 1
+        return f"{path}/{_step(tag, occurrence, repeated)}"
+
+    for key, child in after_children.items():
+        if key in before_children:
+            _diff_element(before_children[key], child, child_path(key), changes)
+        else:
+            changes.append(_change('added', child_path(key), None, child))
+    for key in removed:
+        changes.append(_change('removed', child_path(key), before_children[key], None))
+
+# ---- Rendering ----
+
+def render_element(elem):
+    if elem is None:
+        return ''
+    # Indent a copy; the live tree's whitespace is left alone
+    snippet = copy.deepcopy(elem)
+    snippet.tail = None
+    etree.indent(snippet)
+    return etree.tostring(snippet, pretty_print=True, encoding='unicode').strip()
+
+def render_change(change):
+    return render_element(change['before']), render_element(change['after'])
+
+def render_context(change, levels=1):
+    # Enclosing subtree of a change, only serialized when someone asks for it
+    elem = change['after'] if change['after'] is not None else change['before']
+    for _ in range(levels):
+        parent = elem.getparent()
+        if parent is None:
+            break
+        elem = parent
+    return render_element(elem)
+
+_OCCURRENCE = re.compile(r"\[\d+\]")
+
+def summarize_changes(changes):
+    # Same change repeated across transactions collapses into one line
+    counts = Counter((change['kind'], _OCCURRENCE.sub('', change['path'])) for change in changes)
+    return [
+        {'kind': kind, 'path': path, 'count': count}
+        for (kind, path), count in counts.items()
+    ]
@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from paymentlabs.sanctions import build_index, name_grams, normalize_name, screen_name
+
+WORDS = ["al", "bank", "noor", "trade", "petro", "sina", "kish", "ocean", "mellat", "saman", "pars", "delta"]
+
+def _dice(query, name):
+    query_grams, name_grams_ = set(name_grams(query)), set(name_grams(name))
+    return 2 * len(query_grams & name_grams_) / (len(query_grams) + len(name_grams_))
+
+@pytest.fixture(scope="module")
+def screening(tmp_path_factory):
+    rng = random.Random(7)
+    entities = [
+        {'id': f"E{number}", 'caption': name, 'names': [name]}
+        for number, name in enumerate(dict.fromkeys(" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(300)))
+    ]
+    index = build_index(entities, str(tmp_path_factory.mktemp("sanctions")))
+    queries = [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(40)]
+    return entities, index, queries
+
+def test_screen_name_matches_brute_force_at_exact_threshold_scores(screening):
+    entities, index, queries = screening
+    checked = 0
+    for query in queries:
+        normalized = normalize_name(query)
+        scores = {entity['id']: _dice(normalized, normalize_name(entity['names'][0])) for entity in entities}
+        # Thresholds equal to scores that occur, so some names sit exactly on them
+        for threshold in sorted({score for score in scores.values() if score >= 0.5})[:10]:
+            expected = {entity_id for entity_id, score in scores.items() if score >= threshold}
+            found = {match['entity_id'] for match in screen_name(index, query, threshold, limit=len(entities))}
+            assert found == expected, (query, threshold)
+            checked += 1
+    assert checked